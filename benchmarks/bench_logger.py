@@ -0,0 +1,39 @@
+import timeit
+from calliopy.logger.logger import Logger, LogPrinter, LogObject, LogLevel
+from calliopy.logger.recorder import FlightRecorderPrinter
+
+
+class NullPrinter(LogPrinter):
+    def print(self, obj: LogObject) -> None:
+        pass
+
+
+def noop(text, *args, **context):
+    pass
+
+
+def bench(name: str, stmt, number: int = 1_000_000) -> None:
+    best = min(timeit.repeat(stmt, number=number, repeat=5))
+    print(f"{name:<32} {best / number * 1e9:8.1f} ns/call")
+
+
+def main() -> None:
+    suppressed = Logger(NullPrinter(), for_cls="bench.suppressed")
+    suppressed.level = LogLevel.WARN
+    disabled = Logger(NullPrinter(), for_cls="bench.disabled", disabled=True)
+    emitted = Logger(NullPrinter(), for_cls="bench.emitted")
+    value = {"key": "value"}
+
+    bench("empty function call", lambda: noop("text", value))
+    bench("suppressed debug()", lambda: suppressed.debug("text", value))
+    bench("disabled debug()", lambda: disabled.debug("text", value))
+    bench("suppressed with context", lambda: suppressed.debug("text", k=value))
+    recorded = Logger(FlightRecorderPrinter(), for_cls="bench.recorded")
+    bench("emitted debug() (null printer)",
+          lambda: emitted.debug("text", value), number=100_000)
+    bench("emitted debug() (flight recorder)",
+          lambda: recorded.debug("text", value), number=100_000)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import Callable, Any
 from calliopy.core.annotations import Component
+from calliopy.diagnostics.metrics import metrics
 
 
 @dataclass
@@ -22,21 +23,32 @@ class Animation:
     ease_func: Callable[[float], float] = lambda t: t
     block: bool = False
     soft_block: bool = False
+    # elapsed before the last tick
+    previous: float = 0.0
 
     def tick(self, dt: float) -> bool:
+        self.previous = self.elapsed
         self.elapsed += dt
-        t = min(self.elapsed / self.duration, 1.0)
+        self.apply(self.elapsed)
+        if self.elapsed >= self.duration:
+            if self.on_end:
+                self.on_end()
+            return True
+        return False
+
+    def apply(self, elapsed: float) -> None:
+        """Sets the animated value at elapsed seconds"""
+        t = min(elapsed / self.duration, 1.0)
         t = self.ease_func(t)
         value = self.get_value(t)
         if self.on_update:
             self.on_update(value)
         if self.field:
             setattr(self.field.obj, self.field.field_name, value)
-        if self.elapsed >= self.duration:
-            if self.on_end:
-                self.on_end()
-            return True
-        return False
+
+    def interpolate(self, alpha: float) -> None:
+        """Sets the value alpha of the way from the previous tick"""
+        self.apply(self.previous + (self.elapsed - self.previous) * alpha)
 
     def get_value(self, t: float):
         return self.start_value +\
@@ -171,9 +183,14 @@ class AnimationManager:
         self.animations: list[Animation] = []
         self.blocking = False
         self.soft_blocking = False
+        self.started = metrics.counter(
+                "calliopy_animations_started_total", "Animations started"
+        )
 
     def animate(self, animation: Animation):
         self.animations.append(animation)
+        if metrics.enabled:
+            self.started.inc()
 
     def tick(self, dt: float):
         i = 0
@@ -191,10 +208,17 @@ class AnimationManager:
                 elif anim.soft_block:
                     self.soft_blocking = True
 
+    def interpolate(self, alpha: float):
+        """Blends running animations between their last two steps"""
+        for anim in self.animations:
+            anim.interpolate(alpha)
+
     def clear(self):
         for anim in self.animations:
             anim.tick(anim.duration)
         self.animations.clear()
+        self.blocking = False
+        self.soft_blocking = False
 
     def on_script_control(self):
         self.clear()
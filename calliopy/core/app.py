@@ -1,29 +1,51 @@
 import inspect
 import importlib
+import importlib.util
 import os
 import sys
 import pkgutil
 from typing import Any, List, Type, Tuple
 from types import ModuleType
 from calliopy.core.container import CalliopyContainer
+from calliopy.core.flagstore import open_flag_store
+from calliopy.core.story import load_program, story_scenes
 from calliopy.logger.logger import LoggerFactory
+from calliopy.diagnostics.tracing import tracer
+from calliopy.diagnostics.profiler import scene_profiler
+from calliopy.diagnostics.memory import memory_accountant
+from calliopy.diagnostics.metrics import (
+        metrics, MetricsServer, register_engine_metrics
+)
 from pathlib import Path
 import json
+import time
 
 
 class CalliopyApp:
     def __init__(
             self,
             module_name: str | None = None,
+            flags: dict[str, Any] | None = None,
             ) -> None:
         self.logger = LoggerFactory.get_logger()
         if module_name is None:
             module_name = '__main__'
         self.container = CalliopyContainer()
         self.container.flags = self.load_config()
+        # overrides the config file and environment
+        self.container.flags.update(flags or {})
         self.logger.debug("Config loaded", flags=self.container.flags)
+        # opened before modules load so @Component(if_true=...) can use it
+        self.container.store = open_flag_store(self.container.flags)
+        self.init_tracing()
+        self.init_profiler()
+        self.init_memory_accounting()
+        # chapter modules are only imported when the story gets to them
+        self.chapters = self.find_chapters()
         self.load_module("calliopy.core")
         self.load_module(module_name)
+        self.load_chapters()
+        self.load_stories()
 
     def inspect_module_class(self, module: ModuleType) -> Any:
         return inspect.getmembers(module, inspect.isclass)
@@ -33,14 +55,132 @@ class CalliopyApp:
 
     def run(self) -> None:
         self.frontend = self.container.get_component(None, "frontend")
+        server = self.start_metrics()
         self.frontend.run()
+        if server:
+            server.stop()
+        if tracer.enabled:
+            path = tracer.save()
+            self.logger.info("Trace saved to {}", path)
+        if scene_profiler.enabled:
+            scene_profiler.stop()
+            path = scene_profiler.save(self.profile_path)
+            self.logger.info("Scene profile saved to {}", path)
+        if memory_accountant.enabled:
+            memory_accountant.stop()
+            path = memory_accountant.save(self.memory_path)
+            self.logger.info("Memory report saved to {}", path)
+        self.container.store.close()
+        LoggerFactory.get_factory().shutdown()
+
+    def start_metrics(self) -> MetricsServer | None:
+        port = self.container.flags.get("metrics")
+        if not port or port in ["0", "false", False]:
+            return None
+        port = 9464 if port in ["1", "true", True] else int(port)
+        register_engine_metrics(metrics, self.container)
+        server = MetricsServer(metrics, port)
+        try:
+            server.start()
+        except OSError as e:
+            self.logger.error("Couldn't start metrics server", error=e)
+            return None
+        metrics.enabled = True
+        self.logger.info("Serving metrics on port {}", server.port)
+        return server
+
+    def init_profiler(self) -> None:
+        profile = self.container.flags.get("profile")
+        if not profile or profile in ["0", "false", False]:
+            return
+        self.profile_path = "calliopy_profile.txt"
+        if profile not in ["1", "true", True]:
+            self.profile_path = str(profile)
+        scene_profiler.start()
+
+    def init_memory_accounting(self) -> None:
+        memory = self.container.flags.get("memory")
+        if not memory or memory in ["0", "false", False]:
+            return
+        self.memory_path = "calliopy_memory.txt"
+        if memory not in ["1", "true", True]:
+            self.memory_path = str(memory)
+        memory_accountant.start()
+
+    def init_tracing(self) -> None:
+        trace = self.container.flags.get("trace")
+        if not trace or trace in ["0", "false", False]:
+            return
+        path = None if trace in ["1", "true", True] else str(trace)
+        tracer.start(path)
+
+    def find_chapters(self) -> dict[str, Path]:
+        """Source paths of the chapters in the `chapters` packages"""
+        packages = self.container.flags.get("chapters")
+        chapters = {}
+        if not packages:
+            return chapters
+        for package_name in str(packages).split(","):
+            _, package = self.import_module(package_name.strip())
+            for info in pkgutil.iter_modules(
+                    package.__path__, package.__name__ + "."
+            ):
+                spec = importlib.util.find_spec(info.name)
+                path = Path(spec.origin)
+                chapters[info.name] = path.parent if info.ispkg else path
+        return chapters
+
+    def load_chapters(self) -> None:
+        if not self.chapters:
+            return
+        manager = self.container.get_component(None, "chapter_manager")
+        manager.loader = self.load_module
+        for name, path in list(self.chapters.items()):
+            if manager.add(name, path) is None:
+                self.logger.warn(
+                        "Chapter {} has scenes with computed arguments, "
+                        "loading it now", name
+                )
+                del self.chapters[name]
+                self.load_module(name)
+
+    def in_chapter(self, module_name: str, loading: str) -> bool:
+        """True if module_name belongs to a chapter other than loading"""
+        for chapter in self.chapters:
+            if loading == chapter or loading.startswith(chapter + "."):
+                continue
+            if module_name == chapter or module_name.startswith(chapter + "."):
+                return True
+        return False
+
+    def load_stories(self) -> None:
+        stories = self.container.flags.get("story")
+        if not stories:
+            return
+        for path in str(stories).split(","):
+            self.load_story(path.strip())
+
+    def load_story(self, path: str | Path) -> None:
+        """Registers a scene for every label of a story script"""
+        cache = self.container.flags.get("story.cache", "__storycache__")
+        if cache in ["0", "false", False]:
+            cache = None
+        start = time.perf_counter()
+        program = load_program(path, cache)
+        for scene in story_scenes(program):
+            self.container.register(scene)
+        self.logger.info(
+                "Loaded story {} ({} labels) in {:.1f} ms",
+                path, len(program.labels),
+                (time.perf_counter() - start) * 1000
+        )
 
     def load_module(self, module_name: str) -> None:
         all_classes, all_funcs = self.get_module_classes(module_name)
         components = self.get_components(all_classes)
-        self.logger.debug(components)
+        self.logger.debug("Class components: {}", components)
         components_func = self.get_components(all_funcs)
-        self.logger.debug(components_func)
+        self.logger.debug("Function components: {}", components_func)
         for cls in components_func:
             self.container.register(cls)
         for cls in components:
@@ -55,14 +195,14 @@ class CalliopyApp:
                         os.path.basename(main_module.__file__)
                 )[0]
                 module_name = f"{package_name}.{file_stem}"
-                self.logger.debug("MAIN:", module_name, name)
+                self.logger.debug("MAIN: {} {}", module_name, name)
                 if module_name == name:
-                    self.logger.debug(f"Skipping __main__ module: {name}")
+                    self.logger.debug("Skipping __main__ module: {}", name)
                     return True, main_module
         if name in sys.modules:
             package = sys.modules[name]
             loaded = True
-            self.logger.debug(f"Skipping already loaded module: {name}")
+            self.logger.debug("Skipping already loaded module: {}", name)
         else:
             package = importlib.import_module(name)
             loaded = False
@@ -94,6 +234,8 @@ class CalliopyApp:
 
             for _, module_name, is_pkg in pkgutil.\
                     walk_packages([package_dir], prefix=package_name + "."):
+                if self.in_chapter(module_name, package_name):
+                    continue
                 try:
                     _, module = self.import_module(module_name)
                     all_classes.update(self.inspect_module_class(module))
@@ -0,0 +1,282 @@
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+from calliopy.core.state import Stateful
+from calliopy.logger.logger import LoggerFactory
+from array import array
+from collections import deque
+from enum import IntEnum
+from typing import IO, NamedTuple
+import struct
+
+CHUNK_SIZE = 256
+# texts up to this length are interned, longer ones are stored inline
+INTERN_MAX = 48
+
+_CHUNK_HEADER = struct.Struct("<II")
+
+
+class EntryKind(IntEnum):
+    LINE = 0
+    NARRATION = 1
+    CHOICE = 2
+
+
+class BacklogEntry(NamedTuple):
+    kind: EntryKind
+    speaker: str | None
+    text: str
+
+
+class _Chunk:
+    """Up to `CHUNK_SIZE` entries stored in flat arrays.
+
+    `speakers` and `refs` index the string table (0 is none); a text
+    that isn't interned is kept UTF-8 encoded in `text`, ending at the
+    offset in `ends`.
+    """
+    __slots__ = ("kinds", "speakers", "refs", "ends", "text")
+
+    def __init__(self) -> None:
+        self.kinds = array("B")
+        self.speakers = array("I")
+        self.refs = array("I")
+        self.ends = array("I")
+        self.text = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.kinds) * 13 + len(self.text)
+
+    def append(self, kind: int, speaker: int, ref: int, data: bytes) -> None:
+        self.kinds.append(kind)
+        self.speakers.append(speaker)
+        self.refs.append(ref)
+        self.text += data
+        self.ends.append(len(self.text))
+
+    def text_at(self, i: int) -> str:
+        start = self.ends[i - 1] if i else 0
+        return self.text[start:self.ends[i]].decode("utf-8")
+
+    def truncate(self, n: int) -> None:
+        end = self.ends[n - 1] if n else 0
+        del self.kinds[n:]
+        del self.speakers[n:]
+        del self.refs[n:]
+        del self.ends[n:]
+        del self.text[end:]
+
+    def pack(self) -> bytes:
+        return b"".join((
+                _CHUNK_HEADER.pack(len(self.kinds), len(self.text)),
+                self.kinds.tobytes(),
+                self.speakers.tobytes(),
+                self.refs.tobytes(),
+                self.ends.tobytes(),
+                self.text,
+        ))
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "_Chunk":
+        chunk = cls()
+        count, text_len = _CHUNK_HEADER.unpack_from(data)
+        offset = _CHUNK_HEADER.size
+        for arr in (chunk.kinds, chunk.speakers, chunk.refs, chunk.ends):
+            size = count * arr.itemsize
+            arr.frombytes(data[offset:offset + size])
+            offset += size
+        chunk.text = bytearray(data[offset:offset + text_len])
+        return chunk
+
+
+@Component(tags=["backlog"])
+class Backlog(Stateful):
+    """History of the lines and choices shown to the player.
+
+    Entries are kept in chunks of flat arrays instead of an object per
+    line. Speakers and short texts such as choice options are interned
+    in a string table, so repeated strings are stored once. Reading any
+    entry or page is O(1) from its index.
+
+    With the `backlog.max_bytes` flag set, the oldest full chunks are
+    dropped when the chunks in memory grow over the limit, or written
+    to the file given by `backlog.spill` and read back from it when
+    they are paged in.
+
+    Texts are the keys passed to `DialogueManager`, so the backlog can
+    be shown in whatever locale is current when it is displayed.
+
+    The saved state is the number of entries, so a rollback or a load
+    cuts the backlog back to the lines that were shown at that point.
+    """
+
+    def __init__(self, container: CalliopyContainer) -> None:
+        self.logger = LoggerFactory.get_logger()
+        flags = container.flags if container else {}
+        self.max_bytes = int(flags.get("backlog.max_bytes", 0))
+        spill = flags.get("backlog.spill")
+        if spill in ["0", "false", False]:
+            spill = None
+        self.spill_path = spill
+        self.spill_file: IO[bytes] | None = None
+        # chunk number -> (file offset, size) of spilled chunks
+        self.spilled: dict[int, tuple[int, int]] = {}
+        self.cached: tuple[int, _Chunk] | None = None
+
+        self.strings: list[str | None] = [None]
+        self.string_ids: dict[str, int] = {}
+        # None for dropped and spilled chunks
+        self.chunks: list[_Chunk | None] = []
+        # full chunks kept in memory, oldest first
+        self.resident: deque[int] = deque()
+        self.resident_bytes = 0
+        self.count = 0
+        # index of the oldest entry that wasn't dropped
+        self.first = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def intern(self, value: str) -> int:
+        sid = self.string_ids.get(value)
+        if sid is None:
+            sid = len(self.strings)
+            self.strings.append(value)
+            self.string_ids[value] = sid
+        return sid
+
+    def add(self, kind: EntryKind, speaker: str | None, text: str) -> None:
+        if self.count % CHUNK_SIZE == 0:
+            self.chunks.append(_Chunk())
+        speaker_id = self.intern(speaker) if speaker is not None else 0
+        if len(text) <= INTERN_MAX:
+            ref, data = self.intern(text), b""
+        else:
+            ref, data = 0, text.encode("utf-8")
+        chunk = self.chunks[-1]
+        chunk.append(kind, speaker_id, ref, data)
+        self.count += 1
+        if len(chunk) == CHUNK_SIZE:
+            self.seal(len(self.chunks) - 1)
+
+    def line(self, speaker: str | None, text: str) -> None:
+        kind = EntryKind.NARRATION if speaker is None else EntryKind.LINE
+        self.add(kind, speaker, str(text))
+
+    def choice(self, options: list[str], index: int | None) -> None:
+        if index is None or not 0 <= index < len(options):
+            return
+        self.add(EntryKind.CHOICE, None, str(options[index]))
+
+    def seal(self, number: int) -> None:
+        """Keeps full chunk within the memory limit"""
+        self.resident.append(number)
+        self.resident_bytes += self.chunks[number].nbytes
+        if not self.max_bytes:
+            return
+        while self.resident and self.resident_bytes > self.max_bytes:
+            self.evict(self.resident.popleft())
+
+    def evict(self, number: int) -> None:
+        chunk = self.chunks[number]
+        self.resident_bytes -= chunk.nbytes
+        self.chunks[number] = None
+        if self.spill_path is None:
+            self.first = (number + 1) * CHUNK_SIZE
+            return
+        try:
+            if self.spill_file is None:
+                self.spill_file = open(self.spill_path, "w+b")
+            data = chunk.pack()
+            self.spill_file.seek(0, 2)
+            self.spilled[number] = (self.spill_file.tell(), len(data))
+            self.spill_file.write(data)
+        except OSError as e:
+            self.logger.error("Couldn't spill backlog", error=e)
+            self.spilled.pop(number, None)
+            self.first = (number + 1) * CHUNK_SIZE
+
+    def chunk(self, number: int) -> _Chunk:
+        chunk = self.chunks[number]
+        if chunk is not None:
+            return chunk
+        if self.cached is not None and self.cached[0] == number:
+            return self.cached[1]
+        offset, size = self.spilled[number]
+        self.spill_file.seek(offset)
+        chunk = _Chunk.unpack(self.spill_file.read(size))
+        self.cached = (number, chunk)
+        return chunk
+
+    def __getitem__(self, index: int) -> BacklogEntry:
+        if index < 0:
+            index += self.count
+        if not self.first <= index < self.count:
+            raise IndexError(index)
+        number, i = divmod(index, CHUNK_SIZE)
+        chunk = self.chunk(number)
+        strings = self.strings
+        ref = chunk.refs[i]
+        return BacklogEntry(
+                EntryKind(chunk.kinds[i]),
+                strings[chunk.speakers[i]],
+                strings[ref] if ref else chunk.text_at(i),
+        )
+
+    def page(self, start: int, size: int) -> list[BacklogEntry]:
+        """Entries from start, oldest first"""
+        start = max(start, self.first)
+        end = min(start + size, self.count)
+        return [self[i] for i in range(start, end)]
+
+    def truncate(self, count: int) -> None:
+        """Drops entries after the first `count`"""
+        count = max(count, self.first)
+        if count >= self.count:
+            return
+        # chunks still holding entries, the last one may become partial
+        keep = -(-count // CHUNK_SIZE)
+        partial = count % CHUNK_SIZE
+        if partial:
+            self.chunks[keep - 1] = self.chunk(keep - 1)
+            self.chunks[keep - 1].truncate(partial)
+        sealed = keep - 1 if partial else keep
+        removed = [
+                self.spilled.pop(n)
+                for n in range(sealed, len(self.chunks))
+                if n in self.spilled
+        ]
+        if removed:
+            self.spill_file.truncate(min(offset for offset, _ in removed))
+        del self.chunks[keep:]
+        self.cached = None
+        self.resident = deque(n for n in self.resident if n < sealed)
+        self.resident_bytes = sum(
+                self.chunks[n].nbytes for n in self.resident
+        )
+        self.count = count
+
+    def clear(self) -> None:
+        self.chunks.clear()
+        self.spilled.clear()
+        self.cached = None
+        self.resident.clear()
+        self.resident_bytes = 0
+        self.count = 0
+        self.first = 0
+        if self.spill_file is not None:
+            self.spill_file.truncate(0)
+
+    def save_state(self) -> int:
+        return self.count
+
+    def load_state(self, state: int) -> None:
+        self.truncate(state)
+
+    def close(self) -> None:
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
@@ -0,0 +1,192 @@
+from calliopy.core.annotations import Component, Scene
+from calliopy.core.container import CalliopyContainer
+from calliopy.logger.logger import LoggerFactory
+from calliopy.diagnostics.tracing import tracer
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+import ast
+import sys
+import time
+
+# positional parameters of @Scene
+_SCENE_ARGS = (
+    "after", "default", "if_true", "branch", "repeatable", "priority",
+    "probability", "tags",
+)
+
+
+@dataclass
+class Chapter:
+    name: str
+    # scene name -> stub registered at startup
+    stubs: dict[str, Callable] = field(default_factory=dict)
+    # scene name -> real scene function while the chapter is loaded
+    scenes: dict[str, Callable] = field(default_factory=dict)
+    loaded: bool = False
+
+
+# marks a decorator argument that isn't a literal
+_DEFERRED = object()
+
+
+def _scene_args(decorator: ast.expr) -> dict[str, Any] | None:
+    """Arguments of an `@Scene(...)` decorator, None for other ones.
+
+    Arguments that aren't literals are returned as `_DEFERRED`.
+    """
+    if not isinstance(decorator, ast.Call):
+        return None
+    func = decorator.func
+    if isinstance(func, ast.Name):
+        name = func.id
+    else:
+        name = getattr(func, "attr", None)
+    if name != "Scene":
+        return None
+    args = {}
+    pairs = list(zip(_SCENE_ARGS, decorator.args))
+    pairs += [(kw.arg, kw.value) for kw in decorator.keywords]
+    for key, node in pairs:
+        try:
+            args[key] = ast.literal_eval(node)
+        except ValueError:
+            args[key] = _DEFERRED
+    return args
+
+
+def _module_files(name: str, path: Path) -> list[tuple[str, Path]]:
+    if path.is_file():
+        return [(name, path)]
+    files = []
+    for file in sorted(path.rglob("*.py")):
+        parts = file.relative_to(path).with_suffix("").parts
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        files.append((".".join((name,) + parts), file))
+    return files
+
+
+@Component(tags=["chapters", "chapter_manager"])
+class ChapterManager:
+    """Loads chapter modules when the story gets to them.
+
+    At startup only the sources of a chapter (a module or subpackage)
+    are parsed and a stub is registered for each of its `@Scene`
+    functions, so the scene graph is complete without importing it.
+    When `ScriptManager` routes into a chapter its modules are imported
+    and registered. Scenes outside of chapters, like hubs, keep it
+    loaded; when the story moves on to another chapter, the
+    components defined in it are unregistered and its modules removed,
+    so their objects can be collected. Components kept by other modules
+    (listeners, `Stateful` state, characters) should live outside of
+    chapters.
+    """
+
+    def __init__(self, container: CalliopyContainer) -> None:
+        self.logger = LoggerFactory.get_logger()
+        self.container = container
+        self.chapters: dict[str, Chapter] = {}
+        self.active: str | None = None
+        # imports and registers a module, set by the app
+        self.loader: Callable[[str], None] | None = None
+
+    def add(self, name: str, path: str | Path) -> Chapter | None:
+        """Registers scene stubs of chapter module or package at path.
+
+        Returns None if the chapter can't be loaded lazily because a
+        scene has arguments that aren't literals. Conditions must be
+        flag strings: a computed `if_true` could only be evaluated by
+        importing the chapter while scenes are selected.
+        """
+        chapter = Chapter(name)
+        stubs = []
+        for module, file in _module_files(name, Path(path)):
+            tree = ast.parse(file.read_bytes(), str(file))
+            for node in tree.body:
+                if not isinstance(node, ast.FunctionDef):
+                    continue
+                for decorator in node.decorator_list:
+                    args = _scene_args(decorator)
+                    if args is None:
+                        continue
+                    if _DEFERRED in args.values():
+                        return None
+                    stubs.append((module, node.name, args))
+        for module, scene, args in stubs:
+            chapter.stubs[scene] = self.make_stub(name, module, scene, args)
+        self.chapters[name] = chapter
+        for stub in chapter.stubs.values():
+            self.container.register(stub)
+        return chapter
+
+    def make_stub(
+            self, chapter: str, module: str, scene: str, args: dict
+    ) -> Callable:
+        def stub():
+            raise RuntimeError(f"Scene {scene} of {chapter} isn't loaded")
+
+        stub.__name__ = scene
+        stub.__qualname__ = scene
+        stub.__calliopy_chapter__ = chapter
+        # module defining the real scene, imported with the chapter
+        stub.__calliopy_module__ = module
+        return Scene(**args)(stub)
+
+    def scene(self, chapter: str, name: str) -> Callable:
+        """Real scene function, loads its chapter if needed"""
+        self.load(chapter)
+        return self.chapters[chapter].scenes[name]
+
+    def enter(self, chapter: str | None) -> None:
+        """Called when the story starts a scene of chapter.
+
+        chapter is None for scenes outside of chapters, which leave the
+        active chapter loaded so the story can come back to it.
+        """
+        if chapter is None:
+            return
+        if self.active is not None and self.active != chapter:
+            self.release(self.active)
+        self.active = chapter
+        self.load(chapter)
+
+    def load(self, name: str) -> None:
+        chapter = self.chapters[name]
+        if chapter.loaded:
+            return
+        start = time.perf_counter()
+        if tracer.enabled:
+            tracer.begin("load_chapter", "chapters", chapter=name)
+        try:
+            self.loader(name)
+            for scene in chapter.stubs:
+                module = chapter.stubs[scene].__calliopy_module__
+                chapter.scenes[scene] = getattr(sys.modules[module], scene)
+            chapter.loaded = True
+        finally:
+            if tracer.enabled:
+                tracer.end("load_chapter", "chapters")
+        self.logger.info(
+                "Loaded chapter {} in {:.1f} ms",
+                name, (time.perf_counter() - start) * 1000
+        )
+
+    def release(self, name: str) -> None:
+        chapter = self.chapters[name]
+        if not chapter.loaded:
+            return
+        chapter.scenes.clear()
+        chapter.loaded = False
+        self.container.unregister_module(name)
+        prefix = name + "."
+        for module in [m for m in sys.modules if m.startswith(prefix)]:
+            del sys.modules[module]
+        sys.modules.pop(name, None)
+        parent, _, child = name.rpartition(".")
+        if parent in sys.modules:
+            # the parent package keeps submodules as attributes
+            vars(sys.modules[parent]).pop(child, None)
+        if self.active == name:
+            self.active = None
+        self.logger.info("Released chapter {}", name)
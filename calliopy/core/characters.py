@@ -6,8 +6,10 @@ from calliopy.core.raylib import (
         WHITE
 )
 from calliopy.core.animation import Animation
+from calliopy.core.state import Stateful
+from calliopy.core.persistent import PersistentDict
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 
 
@@ -109,9 +111,16 @@ class ImageDef:
     resolved_texture_name: str | None = None
     animation: Animation | None = None
 
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        # running animations hold callbacks and are finished on load
+        if isinstance(self.animation, Animation):
+            state["animation"] = None
+        return state
+
 
 @Component(tags=["char_manager", "chars"])
-class CharacterManager:
+class CharacterManager(Stateful):
     def __init__(self, characters: list[Character]) -> None:
         self.logger = LoggerFactory.get_logger()
         if characters is None:
@@ -126,7 +135,8 @@ class CharacterManager:
         self.center = (250, 200)
         self.left = (0, 200)
         self.set_textures()
-        self.visible = {}
+        # images are replaced, not mutated, so snapshots stay valid
+        self.visible = PersistentDict()
         self.auto_speaker_portraits = True
 
     def set_textures(self) -> None:
@@ -203,11 +213,9 @@ class CharacterManager:
         self.visible.clear()
 
     def reset_temp(self) -> None:
-        new_visible = {}
-        for key, value in self.visible.items():
-            if not value.temporary:
-                new_visible[key] = value
-        self.visible = new_visible
+        temporary = [k for k, v in self.visible.items() if v.temporary]
+        for key in temporary:
+            del self.visible[key]
 
     def show_temp(
             self,
@@ -266,6 +274,24 @@ class CharacterManager:
         image.name = image.name.capitalize()
         self.visible[image.name] = image
 
+    def save_state(self) -> dict:
+        return {
+            "visible": self.visible.snapshot(),
+            "characters": {
+                name: (getattr(char, "_mood", None),
+                       getattr(char, "_img_pos", None))
+                for name, char in self.characters.items()
+            },
+        }
+
+    def load_state(self, state: dict) -> None:
+        self.visible.restore(state["visible"])
+        for name, (mood, pos) in state["characters"].items():
+            char = self.characters.get(name)
+            if char is not None:
+                char._mood = mood
+                char._img_pos = pos
+
     def get_texture(self, name: str) -> None | Texture2D:
         image = self.visible.get(name)
         if not image or not image.resolved_texture_name:
@@ -305,29 +331,31 @@ class CharacterManager:
         return char._color
 
     def update_moods_from_chars(self) -> None:
-        for image in self.visible.values():
-            self.update_mood_from_char(image)
-            self.update_pos_from_char(image)
+        for key, image in list(self.visible.items()):
+            updated = self.update_mood_from_char(image)
+            updated = self.update_pos_from_char(updated)
+            if updated is not image:
+                self.visible[key] = updated
 
-    def update_mood_from_char(self, image: ImageDef) -> None:
+    def update_mood_from_char(self, image: ImageDef) -> ImageDef:
         if image.temporary and image.mood:
-            return
+            return image
         char = self.characters.get(image.name)
         if not char or not char._mood or char._mood == image.mood:
-            return
+            return image
 
         mood = f"{image.name}_{char._mood}"
         mood_tex_info = self.textures.get(mood.capitalize())
         if not mood_tex_info:
-            return
-        image.resolved_texture_name = mood.capitalize()
+            return image
+        return replace(image, resolved_texture_name=mood.capitalize())
 
-    def update_pos_from_char(self, image: ImageDef) -> None:
+    def update_pos_from_char(self, image: ImageDef) -> ImageDef:
         if image.temporary:
-            return
+            return image
         char = self.characters.get(image.name)
         if not char or not char._img_pos:
-            return
+            return image
 
         pos = char._img_pos
         if type(pos) is str:
@@ -335,4 +363,6 @@ class CharacterManager:
         if type(pos) is ImagePosition:
             pos = self.enum_to_pos(pos)
 
-        image.pos = pos
+        if pos == image.pos:
+            return image
+        return replace(image, pos=pos)
@@ -0,0 +1,55 @@
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+import math
+
+
+@Component(tags=["clock"])
+class Clock:
+    """Turns variable frame time into fixed simulation steps.
+
+    Frame time, multiplied by `scale`, is accumulated and consumed in
+    steps of `step` seconds. At most `max_steps` steps (times the scale
+    when fast-forwarding) run in one frame; time above that is dropped
+    so a long stall doesn't make animations jump or timers fire late.
+    `alpha` is how far the leftover time is into the next step and is
+    used to interpolate drawing between two simulation states.
+    """
+
+    def __init__(self, container: CalliopyContainer) -> None:
+        flags = container.flags if container else {}
+        self.step = 1 / float(flags.get("clock.rate", 60))
+        self.max_steps = int(flags.get("clock.max_steps", 5))
+        self.scale = float(flags.get("clock.scale", 1.0))
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.time = 0.0
+        self.steps = 0
+        self.dropped = 0.0
+
+    def set_scale(self, scale: float) -> None:
+        if scale < 0:
+            raise ValueError("Time scale can't be negative")
+        self.scale = scale
+
+    def step_limit(self) -> int:
+        return self.max_steps * max(1, math.ceil(self.scale))
+
+    def advance(self, dt: float) -> int:
+        """Adds frame time and returns number of steps to simulate"""
+        self.accumulator += dt * self.scale
+        # epsilon keeps exact multiples of step from rounding down
+        steps = int(self.accumulator / self.step + 1e-9)
+        limit = self.step_limit()
+        if steps > limit:
+            self.dropped += (steps - limit) * self.step
+            self.accumulator -= (steps - limit) * self.step
+            steps = limit
+        self.accumulator = max(0.0, self.accumulator - steps * self.step)
+        self.alpha = self.accumulator / self.step
+        self.time += steps * self.step
+        self.steps += steps
+        return steps
+
+    def reset(self) -> None:
+        self.accumulator = 0.0
+        self.alpha = 0.0
@@ -0,0 +1,105 @@
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+from calliopy.logger.logger import LoggerFactory
+from calliopy.diagnostics.tracing import tracer
+from calliopy.diagnostics.metrics import metrics
+import gc
+import time
+
+
+@Component(tags=["gc_scheduler"])
+class GCScheduler:
+    """Moves cyclic garbage collection out of busy frames.
+
+    Enabled with the `gc.frame` flag. After startup the objects created
+    so far (components, textures metadata, scenes) are frozen, automatic
+    collection thresholds are raised so that full collections don't
+    happen mid-animation, and the scheduler collects explicitly at scene
+    boundaries and in idle frames. Pauses of all collections are reported
+    to the tracer and metrics when they are enabled.
+    """
+
+    def __init__(self, container: CalliopyContainer) -> None:
+        self.logger = LoggerFactory.get_logger()
+        flags = container.flags if container else {}
+        self.enabled = flags.get("gc.frame") not in [None, "0", "false", False]
+        self.threshold_scale = int(flags.get("gc.threshold.scale", 10))
+        self.idle_interval = float(flags.get("gc.idle.interval", 1.0))
+        self.old_thresholds: tuple[int, ...] | None = None
+        self.last_idle_collect = 0.0
+        self.collect_start = 0.0
+        self.frame_pause = 0.0
+        self.collections = 0
+        self.installed = False
+        self.pauses = metrics.histogram(
+                "calliopy_gc_pause_seconds", "Garbage collection pauses",
+                buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                         0.025, 0.05, 0.1)
+        )
+
+    def on_startup(self) -> None:
+        if self.enabled or tracer.enabled or metrics.enabled:
+            gc.callbacks.append(self._on_gc)
+            self.installed = True
+        if not self.enabled:
+            return
+        gc.collect()
+        gc.freeze()
+        self.old_thresholds = gc.get_threshold()
+        gen0, gen1, _ = self.old_thresholds
+        # gen2 runs only when scheduled explicitly
+        gc.set_threshold(gen0 * self.threshold_scale, gen1, 1_000_000)
+        self.logger.debug(
+                "Froze {} objects, thresholds {}",
+                gc.get_freeze_count(), gc.get_threshold()
+        )
+
+    def on_scene_boundary(self) -> None:
+        if not self.enabled:
+            return
+        gc.collect()
+        self.last_idle_collect = time.monotonic()
+
+    def on_idle_frame(self) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self.last_idle_collect < self.idle_interval:
+            return
+        self.last_idle_collect = now
+        gc.collect(1)
+
+    def end_frame(self) -> float:
+        """Returns time spent in GC during the frame and resets it"""
+        pause = self.frame_pause
+        self.frame_pause = 0.0
+        return pause
+
+    def on_shutdown(self) -> None:
+        if self.installed:
+            gc.callbacks.remove(self._on_gc)
+            self.installed = False
+        if not self.enabled:
+            return
+        if self.old_thresholds is not None:
+            gc.set_threshold(*self.old_thresholds)
+            self.old_thresholds = None
+        gc.unfreeze()
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self.collect_start = time.perf_counter()
+            if tracer.enabled:
+                tracer.begin("gc", "gc", generation=info["generation"])
+            return
+        pause = time.perf_counter() - self.collect_start
+        self.frame_pause += pause
+        self.collections += 1
+        if tracer.enabled:
+            tracer.end(
+                    "gc", "gc",
+                    collected=info["collected"],
+                    uncollectable=info["uncollectable"]
+            )
+        if metrics.enabled:
+            self.pauses.observe(pause)
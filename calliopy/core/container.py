@@ -3,6 +3,7 @@ from typing import Any, get_type_hints, Callable, List
 from typing import get_args, get_origin
 import inspect
 from calliopy.logger.logger import LoggerFactory
+from calliopy.diagnostics.tracing import tracer
 
 
 @dataclass
@@ -45,6 +46,8 @@ class CalliopyContainer:
         self.logger = LoggerFactory.get_logger()
         # TODO: load flags
         self.flags = {}
+        # persistent flags (FlagStore) also checked by conditions
+        self.store = None
         # TODO: not sure if having this as field is a good idea
         # we don't allow any multithreading anyway, so it can
         # stay for now
@@ -60,7 +63,7 @@ class CalliopyContainer:
             return
 
         constructable = comp_dec.get('constructable', True)
-        self.logger.debug(component.__name__)
+        self.logger.debug("Registering {}", component)
 
         component_name: str | None = None
         component_resolved_type: type | None = None
@@ -69,8 +72,8 @@ class CalliopyContainer:
 
             type_hints = get_type_hints(component, globals(), locals())
             return_type = type_hints.get('return')
-            self.logger.debug(type_hints)
-            self.logger.debug("Returns", return_type)
+            self.logger.debug("Type hints: {}", type_hints)
+            self.logger.debug("Returns {}", return_type)
             if return_type is not None and constructable:
                 component_name = get_type_name(return_type)
                 component_resolved_type = return_type
@@ -100,6 +103,32 @@ class CalliopyContainer:
         self.add_component(comp_data, component_name, component_resolved_type, tags)
         self.names.add(comp_orig_name)
 
+    def unregister_module(self, module_name: str) -> None:
+        """Forgets components defined in module and its submodules.
+
+        Chapter scene stubs are kept, the scene graph uses them while
+        their chapter isn't loaded.
+        """
+        prefix = module_name + "."
+
+        def inside(comp_data: ComponentData) -> bool:
+            component = comp_data.component_class
+            if hasattr(component, "__calliopy_chapter__"):
+                return False
+            module = getattr(component, "__module__", "")
+            return module == module_name or module.startswith(prefix)
+
+        for name, comps in list(self.components_by_class.items()):
+            kept = [comp for comp in comps if not inside(comp)]
+            if kept:
+                self.components_by_class[name] = kept
+            else:
+                del self.components_by_class[name]
+        for tag, comp in list(self.components_by_tag.items()):
+            if inside(comp):
+                del self.components_by_tag[tag]
+        self.names = {n for n in self.names if not n.startswith(prefix)}
+
     def add_component(
             self,
             comp_data: ComponentData,
@@ -177,9 +206,9 @@ class CalliopyContainer:
             type_name: str | None,
             tag: str | None = None
     ) -> ComponentData | None:
-        self.logger.debug("getting component", type_name, tag)
+        self.logger.debug("Getting component {} (tag: {})", type_name, tag)
         if tag:
-            self.logger.debug(self.components_by_tag.get(tag))
+            self.logger.debug("Tagged component: {}", self.components_by_tag.get(tag))
             comp_data: ComponentData = self.components_by_tag.get(tag)
             if comp_data:
                 self.logger.debug("Tag found")
@@ -211,20 +240,32 @@ class CalliopyContainer:
         return None
 
     def construct_component(self, comp_data: ComponentData) -> Any:
-        self.logger.debug("constructing", comp_data)
-        kwargs = {}
-        for dep in comp_data.dependencies:
-            dep_instance = self.construct_dependency(dep)
-            if dep_instance is None:
-                self.logger.warn(f"Cannot resolve dependency {dep.name} of type {dep.dep_type}")
-                if dep.name in ["args", "kwargs"]:
-                    continue
-            kwargs[dep.name] = dep_instance
+        self.logger.debug("Constructing {}", comp_data)
+        if tracer.enabled:
+            tracer.begin(
+                    "construct_component", "container",
+                    component=get_type_name(comp_data.component_class)
+            )
+        try:
+            kwargs = {}
+            for dep in comp_data.dependencies:
+                dep_instance = self.construct_dependency(dep)
+                if dep_instance is None:
+                    self.logger.warn(
+                            "Cannot resolve dependency {} of type {}",
+                            dep.name, dep.dep_type
+                    )
+                    if dep.name in ["args", "kwargs"]:
+                        continue
+                kwargs[dep.name] = dep_instance
 
-        if inspect.isclass(comp_data.component_class):
-            component = comp_data.component_class(**kwargs)
-        else:
-            component = comp_data.component_class(**kwargs)
+            if inspect.isclass(comp_data.component_class):
+                component = comp_data.component_class(**kwargs)
+            else:
+                component = comp_data.component_class(**kwargs)
+        finally:
+            if tracer.enabled:
+                tracer.end("construct_component", "container")
 
         self.context.constructed.append(comp_data)
 
@@ -236,7 +277,10 @@ class CalliopyContainer:
             for dep in setter.dependencies:
                 dep_instance = self.construct_dependency(dep)
                 if dep_instance is None:
-                    self.logger.warn(f"Cannot resolve setter dependency {dep.name} of type {dep.dep_type}")
+                    self.logger.warn(
+                            "Cannot resolve setter dependency {} of type {}",
+                            dep.name, dep.dep_type
+                    )
                 kwargs[dep.name] = dep_instance
             setter.method(component, **kwargs)
 
@@ -263,14 +307,17 @@ class CalliopyContainer:
         self.context.reset()
         comp = self.components_by_class.get(get_type_name(func))
         if not comp:
-            self.logger.warn(f"No function {get_type_name(func)}")
+            self.logger.warn("No function {}.{}", func.__module__, func.__name__)
             return None
         component = comp[0]
         kwargs = {}
         for dep in component.dependencies:
             dep_instance = self.do_get_component(dep.dep_type, dep.name)
             if dep_instance is None:
-                self.logger.warn(f"Cannot resolve dependency {dep.name} of type {dep.dep_type}")
+                self.logger.warn(
+                        "Cannot resolve dependency {} of type {}",
+                        dep.name, dep.dep_type
+                )
             kwargs[dep.name] = dep_instance
         self.post_construction()
 
@@ -280,14 +327,17 @@ class CalliopyContainer:
         self.context.reset()
         comp = self.components_by_class.get(get_type_name(func))
         if not comp:
-            self.logger.warn(f"No function {get_type_name(func)}")
+            self.logger.warn("No function {}.{}", func.__module__, func.__name__)
             return None
         component = comp[0]
         kwargs = {}
         for dep in component.dependencies:
             dep_instance = self.do_get_component(dep.dep_type, dep.name)
             if dep_instance is None:
-                self.logger.warn(f"Cannot resolve dependency {dep.name} of type {dep.dep_type}")
+                self.logger.warn(
+                        "Cannot resolve dependency {} of type {}",
+                        dep.name, dep.dep_type
+                )
             kwargs[dep.name] = dep_instance
         self.post_construction()
 
@@ -349,8 +399,13 @@ class CalliopyContainer:
             return True
         if var.startswith('not '):
             var = var.split()[1]
-            return var not in self.flags
-        return var in self.flags
+            return not self.has_flag(var)
+        return self.has_flag(var)
+
+    def has_flag(self, name: str) -> bool:
+        if name in self.flags:
+            return True
+        return self.store is not None and bool(self.store.get(name))
 
 
 def get_type_name(cls: type) -> str:
@@ -1,5 +1,12 @@
-from calliopy.core.annotations import Component
+from calliopy.core.annotations import Component, Inject
+from calliopy.core.backlog import Backlog
+from calliopy.core.skip import SkipManager
+from calliopy.core.strings import StringManager
+from calliopy.diagnostics.tracing import tracer
+from calliopy.diagnostics.metrics import metrics
+from calliopy.diagnostics.profiler import scene_profiler
 from greenlet import greenlet
+import sys
 
 
 class ChoiceResult:
@@ -7,21 +14,58 @@ class ChoiceResult:
         self.index = index
 
 
+class DialogueListener:
+    """Gets notified about lines and choices shown by DialogueManager"""
+
+    def on_line(self, speaker: str | None, text: str) -> None:
+        pass
+
+    def on_choice_start(self, options: list[str]) -> None:
+        pass
+
+    def on_choice(self, options: list[str], index: int | None) -> None:
+        pass
+
+
 @Component(tags="scene_scheduler")
 class SceneScheduler:
     def __init__(self):
         self.current = None
         self.main = greenlet.getcurrent()
         self.result = None
+        self.scene_name: str | None = None
+        # code of the running scene, to find its frame from nested calls
+        self.scene_code = None
+        self.scenes_started = metrics.counter(
+                "calliopy_scenes_started_total", "Scenes started"
+        )
 
     def run_scene(self, scene_func, *args, **kwargs):
         g = greenlet(lambda: scene_func(*args, **kwargs))
         self.current = g
-        g.switch()
+        self.scene_name = scene_func.__name__
+        self.scene_code = getattr(scene_func, "__code__", None)
+        if metrics.enabled:
+            self.scenes_started.inc()
+        if scene_profiler.enabled:
+            scene_profiler.register_scene(g, scene_func)
+        if tracer.enabled:
+            tracer.begin("run_scene", "scene", scene=scene_func.__name__)
+        try:
+            self.result = g.switch()
+        finally:
+            if tracer.enabled:
+                tracer.end("run_scene", "scene")
 
     def resume(self):
         if self.current and not self.current.dead:
-            self.result = self.current.switch()
+            if tracer.enabled:
+                tracer.begin("resume", "scene")
+            try:
+                self.result = self.current.switch()
+            finally:
+                if tracer.enabled:
+                    tracer.end("resume", "scene")
 
 
 @Component(tags=["dialogue", "dial"])
@@ -38,31 +82,111 @@ class DialogueManager:
         self.pause_for = 0
         self.blocking_pause = False
         self.transition_key: str | None = None
+        self.skip: SkipManager | None = None
+        self.backlog: Backlog | None = None
+        self.strings: StringManager | None = None
+        self.listeners: list[DialogueListener] = []
+        # say/narrate/choice/pause/transition calls, used to find the
+        # same place in a scene when it is replayed
+        self.beats = 0
+        # set while a scene is replayed to restore a save or rollback
+        self.replaying = False
+        # call site of the next line for interpreted scenes, e.g.
+        # (story name, instruction index); used instead of a line number
+        self.site = None
+
+    @Inject()
+    def set_skip(self, skip_manager: SkipManager) -> None:
+        self.skip = skip_manager
+
+    @Inject()
+    def set_backlog(self, backlog: Backlog) -> None:
+        self.backlog = backlog
+
+    @Inject()
+    def set_strings(self, string_manager: StringManager) -> None:
+        self.strings = string_manager
+
+    @Inject()
+    def set_listeners(self, listeners: list[DialogueListener]) -> None:
+        self.listeners = listeners
+
+    def skip_line(self, text) -> bool:
+        """Marks line as read; True when skip mode passes over it"""
+        site, self.site = self.site, None
+        if self.skip is None:
+            return False
+        if site is None:
+            site = self.call_line(sys._getframe(2))
+        return self.skip.line(self.scheduler.scene_name, site, text)
+
+    def call_line(self, frame) -> int:
+        """Line of the scene that led to the call made from frame.
+
+        Lines said through helpers (e.g. `Character.say`) are keyed by
+        the line in the scene, not by the line in the helper.
+        """
+        code = getattr(self.scheduler, "scene_code", None)
+        caller = frame
+        while caller is not None and caller.f_code is not code:
+            caller = caller.f_back
+        return (caller or frame).f_lineno
+
+    def localize(self, text):
+        """Text of the current locale for a string table key"""
+        if self.strings is None or not isinstance(text, str):
+            return text
+        return self.strings.resolve(text)
 
     def say(self, speaker, text):
         if self._abort:
             return
+        self.beats += 1
         self.speaker = speaker
-        self.current_text = text
-        self.scheduler.main.switch()
+        shown = self.localize(text)
+        self.current_text = shown
+        # the backlog keeps keys, resolved to the locale when displayed
+        if self.backlog is not None:
+            self.backlog.line(speaker, text)
+        for listener in self.listeners:
+            listener.on_line(speaker, shown)
+        # read lines are tracked by key, so they stay read in any locale
+        if not self.skip_line(text):
+            self.scheduler.main.switch()
         self.current_text = ""
 
     def choice(self, *options):
         if self._abort:
             return ChoiceResult(0)
-        self.options = list(options)
+        self.beats += 1
+        if self.skip is not None:
+            self.skip.stop()
+        self.options = [self.localize(option) for option in options]
         self.choice_result = None
+        for listener in self.listeners:
+            listener.on_choice_start(self.options)
         self.scheduler.main.switch()
         result = self.choice_result
+        if self.backlog is not None:
+            self.backlog.choice(options, result)
+        for listener in self.listeners:
+            listener.on_choice(self.options, result)
         self.options = []
         return ChoiceResult(result)
 
     def narrate(self, text):
         if self._abort:
             return
+        self.beats += 1
         self.speaker = None
-        self.current_text = text
-        self.scheduler.main.switch()
+        shown = self.localize(text)
+        self.current_text = shown
+        if self.backlog is not None:
+            self.backlog.line(None, text)
+        for listener in self.listeners:
+            listener.on_line(None, shown)
+        if not self.skip_line(text):
+            self.scheduler.main.switch()
         self.current_text = ""
 
     def pause(
@@ -76,6 +200,12 @@ class DialogueManager:
             self.pause_for = float(seconds)
         if self._abort:
             return
+        self.beats += 1
+        if self.skip is not None and self.skip.active:
+            self.paused = False
+            self.pause_for = 0
+            self.blocking_pause = False
+            return
         self.speaker = None
         self.current_text = None
         self.scheduler.main.switch()
@@ -87,6 +217,7 @@ class DialogueManager:
         self._abort = True
 
     def transition(self, key: str) -> None:
+        self.beats += 1
         self.transition_key = key
         self.scheduler.main.switch()
         self.transition_key = None
@@ -23,7 +23,11 @@ class DrawableComponent(ABC):
 
     @abstractmethod
     def update(self, dt: float) -> None:
-        """Updates drawable component before drawing"""
+        """Updates drawable component once per frame before drawing.
+
+        dt is the simulated time of the frame's fixed steps, 0 when the
+        frame had none.
+        """
         pass
 
     @abstractmethod
@@ -0,0 +1,164 @@
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+from calliopy.logger.logger import LoggerFactory
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Iterator
+import atexit
+import json
+import sqlite3
+import threading
+
+# pending value of a deleted key
+_DELETED = object()
+
+DEFAULT_PATH = "files/flags.db"
+
+
+class FlagStore(MutableMapping):
+    """Persistent flags kept in an SQLite database in WAL mode.
+
+    For progress that outlives a save, like endings seen, unlocks and
+    settings. All flags are read into memory when the store is opened
+    and reads only use that copy. Writes update it and are queued; a
+    background thread, started by the first write, commits the queue in
+    one transaction every `interval` seconds, so only the last value of
+    a flag set many times is written. Values are stored as JSON.
+    """
+
+    def __init__(self, path: str | Path = ":memory:", interval: float = 0.5):
+        self.logger = LoggerFactory.get_logger()
+        self.path = str(path)
+        self.interval = interval
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+                "CREATE TABLE IF NOT EXISTS flags "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self.db.commit()
+        self.cache: dict[str, Any] = {
+            key: json.loads(value)
+            for key, value in self.db.execute("SELECT key, value FROM flags")
+        }
+        self.pending: dict[str, Any] = {}
+        # guards pending
+        self.lock = threading.Lock()
+        # serializes use of the connection
+        self.db_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.writer: threading.Thread | None = None
+        self.closed = False
+
+    def __getitem__(self, key: str) -> Any:
+        return self.cache[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.cache.get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.cache
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.cache)
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.check_open()
+        # fail here rather than in the writer thread
+        json.dumps(value)
+        self.cache[key] = value
+        self.queue(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.check_open()
+        del self.cache[key]
+        self.queue(key, _DELETED)
+
+    def check_open(self) -> None:
+        # checked before the cache changes, rejected writes leave no trace
+        if self.closed:
+            raise RuntimeError("Flag store is closed")
+
+    def queue(self, key: str, value: Any) -> None:
+        with self.lock:
+            self.pending[key] = value
+        if self.writer is None:
+            self.writer = threading.Thread(
+                    target=self.run, name="calliopy-flags", daemon=True
+            )
+            self.writer.start()
+            atexit.register(self.close)
+
+    def run(self) -> None:
+        while not self.closed:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Commits queued writes"""
+        with self.db_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+            if not batch:
+                return
+            updates = [
+                (key, json.dumps(value)) for key, value in batch.items()
+                if value is not _DELETED
+            ]
+            deletes = [
+                (key,) for key, value in batch.items() if value is _DELETED
+            ]
+            try:
+                with self.db:
+                    self.db.executemany(
+                            "INSERT INTO flags (key, value) VALUES (?, ?) "
+                            "ON CONFLICT(key) DO UPDATE "
+                            "SET value = excluded.value",
+                            updates
+                    )
+                    self.db.executemany(
+                            "DELETE FROM flags WHERE key = ?", deletes
+                    )
+            except sqlite3.Error as e:
+                self.logger.error("Couldn't write flags", error=e)
+                with self.lock:
+                    # keep writes newer than the failed batch
+                    batch.update(self.pending)
+                    self.pending = batch
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.wake.set()
+        if self.writer is not None:
+            self.writer.join()
+            atexit.unregister(self.close)
+        self.flush()
+        with self.db_lock:
+            self.db.close()
+
+
+def open_flag_store(flags: dict[str, Any]) -> FlagStore:
+    """Store at the path of the `store` flag, `files/flags.db` without it.
+
+    `store` set to `:memory:` keeps flags only for the session.
+    """
+    return FlagStore(
+            flags.get("store", DEFAULT_PATH),
+            float(flags.get("store.interval", 0.5)),
+    )
+
+
+@Component(tags=["flag_store", "store"])
+def flag_store(container: CalliopyContainer) -> FlagStore:
+    if container.store is None:
+        container.store = open_flag_store(container.flags)
+    return container.store
@@ -1,21 +1,34 @@
 from calliopy.core.raylib import (
-        set_trace_log_callback, set_target_fps, window_should_close,
+        enable_trace_buffer, set_target_fps, window_should_close,
         clear_background, draw_texture_pro,
         close_window, unload_texture,
         init_window, load_texture, begin_drawing, end_drawing,
-        is_key_pressed, play_sound, get_frame_time,
-        TRACELOGCALLBACK
+        play_sound,
+        drain_trace_log, get_trace_dropped,
 )
-from calliopy.core.raylib import WHITE, RAYWHITE, KEY_ENTER
+from calliopy.core.raylib import WHITE, RAYWHITE, KEY_ENTER, KEY_1, KEY_TAB
+from calliopy.core.raylib import KEY_F5, KEY_F9, KEY_PAGE_UP
 from calliopy.core.raylib import Rectangle, Vector2
 from calliopy.core.annotations import Component, Inject
 from calliopy.core.script import ScriptManager
-from calliopy.logger.logger import LoggerFactory
+from calliopy.logger.logger import LoggerFactory, LogLevel
 from calliopy.core.audio import AudioManager
 from calliopy.core.dialogue import DialogueManager, SceneScheduler
 from calliopy.core.drawable import DrawableComponent
 from calliopy.core.timer import TimeManager
+from calliopy.core.collector import GCScheduler
+from calliopy.core.tasks import TaskQueue
+from calliopy.core.input import InputManager
+from calliopy.core.replay import ReplayManager
+from calliopy.core.clock import Clock
+from calliopy.core.skip import SkipManager
+from calliopy.core.save import SaveManager
+from calliopy.core.rollback import RollbackManager
+from calliopy.diagnostics.tracing import tracer
+from calliopy.diagnostics.metrics import metrics
+from calliopy.diagnostics.memory import memory_accountant
 from dataclasses import dataclass
+import time
 
 log_level = {
         1: "TRACE", 2: "DEBUG", 3: "INFO",
@@ -23,13 +36,34 @@ log_level = {
 }
 
 
-def get_raylib_logger():
-    logger = LoggerFactory.get_logger(for_cls="raylib")
+class RaylibTraceLog:
+    """Forwards raylib trace messages buffered on the C side to logger"""
 
-    def trace_callback(level, message):
-        lvl = log_level[level]
-        logger.debug(f"[raylib:{lvl}] {message.decode('utf-8')}")
-    return trace_callback
+    def __init__(self) -> None:
+        self.logger = LoggerFactory.get_logger(for_cls="raylib")
+        self.dropped = 0
+
+    def enable(self) -> None:
+        enable_trace_buffer()
+
+    def drain(self) -> None:
+        entries = drain_trace_log()
+        # reported at any log level, the buffer overflows either way
+        dropped = get_trace_dropped()
+        if dropped != self.dropped:
+            self.logger.warn(
+                    "Dropped {} raylib trace messages",
+                    dropped - self.dropped
+            )
+            self.dropped = dropped
+        if not entries or not self.logger.is_enabled_for(LogLevel.DEBUG):
+            return
+        for level, message in entries:
+            self.logger.debug(
+                    "[raylib:{}] {}",
+                    log_level.get(level, level),
+                    message.decode('utf-8', 'replace')
+            )
 
 
 @Component(tags="front_config")
@@ -39,6 +73,7 @@ class FrontendConfig:
     height: int = 600
     font_size = 24
     title: str = "Calliopy Visual Novel"
+    fps: int = 60
 
 
 @Component(tags="frontend")
@@ -54,7 +89,15 @@ class CalliopyFrontend:
             audio_manager: AudioManager,
             gui,
             time_manager: TimeManager,
-            anim_manager
+            anim_manager,
+            gc_scheduler: GCScheduler,
+            task_queue: TaskQueue,
+            input_manager: InputManager,
+            replay_manager: ReplayManager,
+            clock: Clock,
+            skip_manager: SkipManager,
+            save_manager: SaveManager,
+            rollback_manager: RollbackManager,
     ):
         if not issubclass(front_config.__class__, FrontendConfig):
             raise Exception("Frontend config must extend FrontendConfig class")
@@ -62,6 +105,7 @@ class CalliopyFrontend:
         self.screen_height = front_config.height
         self.window_title = front_config.title
         self.font_size = front_config.font_size
+        self.fps = front_config.fps
         self.scheduler = scene_scheduler
         self.dial = dial
         self.chars = char_manager
@@ -72,6 +116,26 @@ class CalliopyFrontend:
         self.timers = time_manager
         self.should_close = False
         self.anim = anim_manager
+        self.gc = gc_scheduler
+        self.tasks = task_queue
+        self.input = input_manager
+        self.replay = replay_manager
+        self.clock = clock
+        self.skip = skip_manager
+        self.saves = save_manager
+        self.rollback = rollback_manager
+        self.frame_deadline: float | None = None
+        self.trace_log = RaylibTraceLog()
+        self.bg = None
+        self.frame_time = metrics.histogram(
+                "calliopy_frame_seconds", "Frame time reported by raylib"
+        )
+        self.frame_work = metrics.histogram(
+                "calliopy_frame_work_seconds", "Time spent in frame logic"
+        )
+        self.frame_gc = metrics.histogram(
+                "calliopy_frame_gc_seconds", "Time spent in GC per frame"
+        )
 
     @Inject()
     def set_drawables(self, drawables: list[DrawableComponent]) -> None:
@@ -94,59 +158,137 @@ class CalliopyFrontend:
         )
 
     def run(self):
-        trace_callback = TRACELOGCALLBACK(get_raylib_logger())
-        set_trace_log_callback(trace_callback)
+        self.trace_log.enable()
         init_window(self.screen_width, self.screen_height, self.window_title)
-        set_target_fps(60)
+        self.replay.start(self.fps)
+        set_target_fps(0 if self.replay.max_speed else self.fps)
 
         self.audio.init_device()
         self.audio.preload("dialogue", "files/dialogue.mp3")
 
         bg = load_texture(self.chars.bg_texture)
+        self.bg = bg
 
         for drawable in self.drawables:
             drawable.init()
+        self.trace_log.drain()
+        self.skip.start()
+        self.gc.on_startup()
 
         while not window_should_close() and not self.should_close:
-            dt = get_frame_time()
-            for drawable in self.drawables:
-                if drawable.is_active():
-                    drawable.update(dt)
-            begin_drawing()
-            self.draw_background(bg)
-
-            self.anim.tick(dt)
-            for drawable in self.drawables:
-                if drawable.is_active():
-                    drawable.draw()
-
-            proceed_scene = self.tick(dt)
-            if proceed_scene:
-                for drawable in self.drawables:
-                    if drawable.on_progress_scene_ready():
-                        proceed_scene = False
-
-            if proceed_scene:
-                self.anim.on_script_control()
-                self.timers.reset_timers()
-                has_scene = self.resume_scene()
-                if not has_scene:
-                    break
-                for drawable in self.drawables:
-                    drawable.after_scene_give_control()
-                self.update_sounds()
-                self.timers.update(self.dial)
-
-            end_drawing()
+            self.trace_log.drain()
+            if self.replay.finished():
+                break
+            dt = self.replay.frame_time()
+            frame_start = time.perf_counter()
+            self.frame_deadline = frame_start + 1 / self.fps
+            if tracer.enabled:
+                tracer.begin("frame", "frontend")
+            try:
+                running = self.frame(dt, bg)
+            finally:
+                if tracer.enabled:
+                    tracer.end("frame", "frontend")
+            gc_pause = self.gc.end_frame()
+            if metrics.enabled:
+                self.frame_time.observe(dt)
+                self.frame_work.observe(time.perf_counter() - frame_start)
+                self.frame_gc.observe(gc_pause)
+            if not running:
+                break
 
         self.close()
+        self.replay.stop()
+        self.skip.save()
+        if memory_accountant.enabled:
+            memory_accountant.scene_boundary("<end>", self)
         unload_texture(bg)
+        self.bg = None
         for drawable in self.drawables:
             drawable.destroy()
 
         self.audio.destroy()
 
         close_window()
+        self.tasks.on_shutdown()
+        self.trace_log.drain()
+        self.gc.on_shutdown()
+
+    def frame(self, dt: float, bg) -> bool:
+        self.input.poll()
+        steps = self.clock.advance(dt)
+        step = self.clock.step
+        if tracer.enabled:
+            tracer.begin("update", "frontend", steps=steps)
+        # input is handled once per frame, however many steps it has
+        for drawable in self.drawables:
+            if drawable.is_active():
+                drawable.update(steps * step)
+        for _ in range(steps):
+            self.anim.tick(step)
+        if self.skip.active:
+            self.anim.clear()
+        # draw between the last two steps by the time left over
+        self.anim.interpolate(self.clock.alpha)
+        begin_drawing()
+        if tracer.enabled:
+            tracer.end("update", "frontend")
+            tracer.begin("draw", "frontend")
+        self.draw_background(bg)
+
+        for drawable in self.drawables:
+            if drawable.is_active():
+                drawable.draw()
+        if tracer.enabled:
+            tracer.end("draw", "frontend")
+            tracer.begin("tick", "frontend")
+
+        proceed_scene = self.tick(steps)
+        if proceed_scene:
+            for drawable in self.drawables:
+                if drawable.on_progress_scene_ready():
+                    proceed_scene = False
+        if tracer.enabled:
+            tracer.end("tick", "frontend")
+
+        if proceed_scene:
+            if tracer.enabled:
+                tracer.begin("resume_scene", "frontend")
+            try:
+                self.anim.on_script_control()
+                self.timers.reset_timers()
+                has_scene = self.resume_scene()
+                if has_scene:
+                    self.after_resume()
+                # in skip mode scenes made only of read lines finish
+                # without giving a frame back, start the next one now
+                while (has_scene and self.skip.active
+                       and self.scheduler.current.dead):
+                    has_scene = self.resume_scene()
+                    if has_scene:
+                        self.after_resume()
+            finally:
+                if tracer.enabled:
+                    tracer.end("resume_scene", "frontend")
+            if not has_scene:
+                return False
+        elif not self.anim.animations:
+            self.gc.on_idle_frame()
+
+        # background work only gets time left until the frame deadline
+        self.tasks.run(self.frame_deadline)
+        if tracer.enabled:
+            tracer.begin("end_drawing", "frontend")
+        end_drawing()
+        if tracer.enabled:
+            tracer.end("end_drawing", "frontend")
+        return True
+
+    def after_resume(self) -> None:
+        for drawable in self.drawables:
+            drawable.after_scene_give_control()
+        self.update_sounds()
+        self.timers.update(self.dial)
 
     def resume_scene(self) -> bool:
         if self.scheduler.current and not self.scheduler.current.dead:
@@ -158,32 +300,82 @@ class CalliopyFrontend:
                 return False
             for drawable in self.drawables:
                 drawable.on_new_scene()
+            self.gc.on_scene_boundary()
+            self.skip.save()
+            if memory_accountant.enabled:
+                memory_accountant.scene_boundary(new_scene.__name__, self)
+            self.saves.on_scene_start(new_scene.__name__)
             self.scheduler.run_scene(new_scene, **kwargs)
         return True
 
+    def load_game(self, path: str | None = None) -> bool:
+        data = self.saves.read(path)
+        if data is None:
+            return False
+        for drawable in self.drawables:
+            drawable.on_new_scene()
+        self.saves.load(data)
+        self.rollback.clear()
+        self.rollback.checkpoint()
+        self.after_rewind()
+        return True
+
+    def rollback_game(self, steps: int = 1) -> bool:
+        if not self.rollback.can_rollback():
+            return False
+        for drawable in self.drawables:
+            drawable.on_new_scene()
+        if not self.rollback.rollback(steps):
+            return False
+        self.after_rewind()
+        return True
+
+    def after_rewind(self) -> None:
+        self.anim.clear()
+        self.timers.reset_timers()
+        self.after_resume()
+
     def update_sounds(self) -> None:
         to_play = self.audio.get_sound()
         if to_play:
             play_sound(to_play)
 
-    def tick(self, dt: float) -> bool:
+    def tick(self, steps: int) -> bool:
+        inp = self.input.snapshot
+        if inp.is_key_pressed(KEY_F5):
+            self.saves.save()
+        if inp.is_key_pressed(KEY_F9):
+            self.load_game()
+            return False
+        if inp.is_key_pressed(KEY_PAGE_UP):
+            self.rollback_game()
+            return False
+        enter = inp.is_key_pressed(KEY_ENTER)
         proceed_scene = False
-        if self.dial.current_text and is_key_pressed(KEY_ENTER):
+        if self.dial.current_text and enter:
             proceed_scene = True
-        for i in range(len(self.dial.options)):
-            if is_key_pressed(49+i):
-                self.dial.choice_result = i
+        for key in inp.keys:
+            option = key - KEY_1
+            if 0 <= option < len(self.dial.options):
+                self.dial.choice_result = option
                 proceed_scene = True
         if not self.scheduler.current:
             proceed_scene = True
-        if self.dial.paused and is_key_pressed(KEY_ENTER):
+        if self.dial.paused and enter:
             proceed_scene = True
-        if is_key_pressed(KEY_ENTER):
+        if enter:
             self.anim.soft_blocking = False
+        if inp.is_key_pressed(KEY_TAB):
+            self.skip.toggle()
+        if self.skip.active and (self.dial.current_text or self.dial.paused):
+            proceed_scene = True
         if self.dial.transition_key:
             proceed_scene = True
 
-        pause_ended, blocking = self.timers.process_timers(dt)
+        if self.skip.active:
+            pause_ended, blocking = self.timers.fast_forward()
+        else:
+            pause_ended, blocking = self.process_timers(steps)
         if not proceed_scene:
             proceed_scene = pause_ended
         if blocking:
@@ -192,6 +384,16 @@ class CalliopyFrontend:
             proceed_scene = False
         return proceed_scene
 
+    def process_timers(self, steps: int) -> tuple[bool, bool]:
+        if not steps:
+            # no time passed, but blocking state is still needed
+            return self.timers.process_timers(0.0)
+        pause_ended = False
+        for _ in range(steps):
+            ended, blocking = self.timers.process_timers(self.clock.step)
+            pause_ended = pause_ended or ended
+        return pause_ended, blocking
+
     def close(self) -> None:
         self.dial.cancel()
         self.should_close = True
@@ -0,0 +1,130 @@
+from calliopy.core.raylib import (
+        get_key_pressed, get_char_pressed, get_mouse_position,
+        is_mouse_button_pressed, get_mouse_wheel_move,
+        MOUSE_BUTTON_LEFT, MOUSE_BUTTON_RIGHT,
+)
+from calliopy.core.annotations import Component
+from dataclasses import dataclass
+from typing import Any, Callable
+import struct
+
+POLLED_BUTTONS = (MOUSE_BUTTON_LEFT, MOUSE_BUTTON_RIGHT)
+
+# mouse x, mouse y, wheel, buttons bitmask, key count, char count
+_HEADER = struct.Struct("<fffBBB")
+
+
+@dataclass(frozen=True, slots=True)
+class InputSnapshot:
+    """Input state of a single frame.
+
+    `keys` and `chars` hold what was pressed since the previous poll,
+    in order. Mouse buttons are a bitmask indexed by raylib button ids.
+    """
+    keys: tuple[int, ...] = ()
+    chars: tuple[int, ...] = ()
+    mouse_x: float = 0.0
+    mouse_y: float = 0.0
+    buttons: int = 0
+    wheel: float = 0.0
+
+    def is_key_pressed(self, code: int) -> bool:
+        return code in self.keys
+
+    def is_mouse_button_pressed(self, button: int) -> bool:
+        return bool(self.buttons >> button & 1)
+
+    def mouse_in(self, rect: Any) -> bool:
+        return (rect.x <= self.mouse_x < rect.x + rect.width
+                and rect.y <= self.mouse_y < rect.y + rect.height)
+
+    def text(self) -> str:
+        return "".join(chr(c) for c in self.chars)
+
+    def empty(self) -> bool:
+        return not (self.keys or self.chars or self.buttons or self.wheel)
+
+    def pack(self) -> bytes:
+        keys = self.keys[:255]
+        chars = self.chars[:255]
+        return _HEADER.pack(
+                self.mouse_x, self.mouse_y, self.wheel,
+                self.buttons, len(keys), len(chars)
+        ) + struct.pack(f"<{len(keys)}H{len(chars)}I", *keys, *chars)
+
+    @classmethod
+    def unpack(cls, data: bytes, offset: int = 0) -> tuple["InputSnapshot", int]:
+        """Reads snapshot at offset, returns it and offset after it"""
+        x, y, wheel, buttons, nkeys, nchars = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+        values = struct.unpack_from(f"<{nkeys}H{nchars}I", data, offset)
+        offset += nkeys * 2 + nchars * 4
+        snapshot = cls(
+                keys=values[:nkeys],
+                chars=values[nkeys:],
+                mouse_x=x,
+                mouse_y=y,
+                buttons=buttons,
+                wheel=wheel,
+        )
+        return snapshot, offset
+
+
+def poll_input() -> InputSnapshot:
+    """Reads raylib input state once; drains key and char queues"""
+    keys = []
+    key = get_key_pressed()
+    while key:
+        keys.append(key)
+        key = get_key_pressed()
+    chars = []
+    char = get_char_pressed()
+    while char:
+        chars.append(char)
+        char = get_char_pressed()
+    buttons = 0
+    for button in POLLED_BUTTONS:
+        if is_mouse_button_pressed(button):
+            buttons |= 1 << button
+    mouse = get_mouse_position()
+    return InputSnapshot(
+            keys=tuple(keys),
+            chars=tuple(chars),
+            mouse_x=mouse.x,
+            mouse_y=mouse.y,
+            buttons=buttons,
+            wheel=get_mouse_wheel_move(),
+    )
+
+
+@Component(tags=["input", "input_manager"])
+class InputManager:
+    """Polls input once per frame and hands the snapshot to consumers.
+
+    Recorders are called with every polled snapshot, which is enough to
+    replay a session frame by frame. When `source` is set, snapshots come
+    from it instead of raylib.
+    """
+
+    def __init__(self) -> None:
+        self.snapshot = InputSnapshot()
+        self.frames = 0
+        self.recorders: list[Callable[[InputSnapshot], None]] = []
+        self.source: Callable[[], InputSnapshot] | None = None
+
+    def poll(self) -> InputSnapshot:
+        if self.source is not None:
+            self.snapshot = self.source()
+        else:
+            self.snapshot = poll_input()
+        self.frames += 1
+        for recorder in self.recorders:
+            recorder(self.snapshot)
+        return self.snapshot
+
+    def add_recorder(self, recorder: Callable[[InputSnapshot], None]) -> None:
+        self.recorders.append(recorder)
+
+    def remove_recorder(self, recorder: Callable[[InputSnapshot], None]) -> None:
+        if recorder in self.recorders:
+            self.recorders.remove(recorder)
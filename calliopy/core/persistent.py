@@ -0,0 +1,313 @@
+from collections.abc import ItemsView, Mapping, MutableMapping, ValuesView
+from typing import Any, Iterator
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_MASK = (1 << 64) - 1
+
+
+class _Leaf:
+    __slots__ = ("hash", "key", "value")
+
+    def __init__(self, h: int, key: Any, value: Any) -> None:
+        self.hash = h
+        self.key = key
+        self.value = value
+
+
+class _Collision:
+    __slots__ = ("hash", "pairs")
+
+    def __init__(self, h: int, pairs: tuple) -> None:
+        self.hash = h
+        self.pairs = pairs
+
+
+class _Branch:
+    __slots__ = ("bitmap", "children")
+
+    def __init__(self, bitmap: int, children: tuple) -> None:
+        self.bitmap = bitmap
+        self.children = children
+
+
+def _hash(key: Any) -> int:
+    return hash(key) & _HASH_MASK
+
+
+def _merge(a: Any, b: Any, shift: int) -> _Branch:
+    """Branch holding two leaves or collisions with different hashes"""
+    ia = (a.hash >> shift) & _MASK
+    ib = (b.hash >> shift) & _MASK
+    if ia == ib:
+        return _Branch(1 << ia, (_merge(a, b, shift + _BITS),))
+    if ia < ib:
+        return _Branch((1 << ia) | (1 << ib), (a, b))
+    return _Branch((1 << ia) | (1 << ib), (b, a))
+
+
+def _assoc(node: Any, shift: int, h: int, key: Any, value: Any):
+    """Returns (new node, whether a key was added)"""
+    if type(node) is _Branch:
+        bit = 1 << ((h >> shift) & _MASK)
+        idx = (node.bitmap & (bit - 1)).bit_count()
+        children = node.children
+        if not node.bitmap & bit:
+            return _Branch(
+                    node.bitmap | bit,
+                    children[:idx] + (_Leaf(h, key, value),) + children[idx:]
+            ), True
+        child = children[idx]
+        new_child, added = _assoc(child, shift + _BITS, h, key, value)
+        if new_child is child:
+            return node, False
+        return _Branch(
+                node.bitmap,
+                children[:idx] + (new_child,) + children[idx + 1:]
+        ), added
+    if node.hash != h:
+        return _merge(node, _Leaf(h, key, value), shift), True
+    if type(node) is _Leaf:
+        if node.key == key:
+            if node.value is value:
+                return node, False
+            return _Leaf(h, key, value), False
+        return _Collision(h, ((node.key, node.value), (key, value))), True
+    pairs = node.pairs
+    for i, (k, v) in enumerate(pairs):
+        if k == key:
+            if v is value:
+                return node, False
+            return _Collision(
+                    h, pairs[:i] + ((key, value),) + pairs[i + 1:]
+            ), False
+    return _Collision(h, pairs + ((key, value),)), True
+
+
+def _without(node: Any, shift: int, h: int, key: Any):
+    """Returns (new node or None when empty, whether key was removed)"""
+    if type(node) is _Branch:
+        bit = 1 << ((h >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return node, False
+        idx = (node.bitmap & (bit - 1)).bit_count()
+        children = node.children
+        child = children[idx]
+        new_child, removed = _without(child, shift + _BITS, h, key)
+        if not removed:
+            return node, False
+        if new_child is None:
+            if len(children) == 1:
+                return None, True
+            rest = children[:idx] + children[idx + 1:]
+            if len(rest) == 1 and type(rest[0]) is not _Branch:
+                return rest[0], True
+            return _Branch(node.bitmap & ~bit, rest), True
+        if len(children) == 1 and type(new_child) is not _Branch:
+            return new_child, True
+        return _Branch(
+                node.bitmap,
+                children[:idx] + (new_child,) + children[idx + 1:]
+        ), True
+    if node.hash != h:
+        return node, False
+    if type(node) is _Leaf:
+        if node.key == key:
+            return None, True
+        return node, False
+    pairs = tuple(p for p in node.pairs if p[0] != key)
+    if len(pairs) == len(node.pairs):
+        return node, False
+    if len(pairs) == 1:
+        return _Leaf(h, pairs[0][0], pairs[0][1]), True
+    return _Collision(h, pairs), True
+
+
+def _find(node: Any, h: int, key: Any, default: Any) -> Any:
+    shift = 0
+    while type(node) is _Branch:
+        bit = 1 << ((h >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return default
+        node = node.children[(node.bitmap & (bit - 1)).bit_count()]
+        shift += _BITS
+    if node is None or node.hash != h:
+        return default
+    if type(node) is _Leaf:
+        return node.value if node.key == key else default
+    for k, v in node.pairs:
+        if k == key:
+            return v
+    return default
+
+
+def _walk(node: Any) -> Iterator[tuple[Any, Any]]:
+    if node is None:
+        return
+    if type(node) is _Branch:
+        for child in node.children:
+            yield from _walk(child)
+    elif type(node) is _Leaf:
+        yield node.key, node.value
+    else:
+        yield from node.pairs
+
+
+_MISSING = object()
+
+
+class _PMapItems(ItemsView):
+    def __iter__(self) -> Iterator[tuple[Any, Any]]:
+        return _walk(self._mapping.root)
+
+
+class _PMapValues(ValuesView):
+    def __iter__(self) -> Iterator[Any]:
+        for _, value in _walk(self._mapping.root):
+            yield value
+
+
+class PMap(Mapping):
+    """Immutable hash map with structural sharing (hash array mapped trie).
+
+    `set` and `discard` return a new map that shares all untouched nodes
+    with the old one, so keeping old versions costs only the changed
+    path (at most 13 nodes of 32 slots).
+    """
+    __slots__ = ("root", "size")
+
+    def __init__(self, root: Any = None, size: int = 0) -> None:
+        self.root = root
+        self.size = size
+
+    @classmethod
+    def from_items(cls, items: Any) -> "PMap":
+        result = cls()
+        if isinstance(items, Mapping):
+            items = items.items()
+        for key, value in items:
+            result = result.set(key, value)
+        return result
+
+    def set(self, key: Any, value: Any) -> "PMap":
+        h = _hash(key)
+        if self.root is None:
+            return PMap(_Leaf(h, key, value), 1)
+        root, added = _assoc(self.root, 0, h, key, value)
+        if root is self.root:
+            return self
+        return PMap(root, self.size + added)
+
+    def discard(self, key: Any) -> "PMap":
+        if self.root is None:
+            return self
+        root, removed = _without(self.root, 0, _hash(key), key)
+        if not removed:
+            return self
+        return PMap(root, self.size - 1)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return _find(self.root, _hash(key), key, default)
+
+    def __getitem__(self, key: Any) -> Any:
+        value = _find(self.root, _hash(key), key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        return _find(self.root, _hash(key), key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[Any]:
+        for key, _ in _walk(self.root):
+            yield key
+
+    def items(self) -> ItemsView:
+        return _PMapItems(self)
+
+    def values(self) -> ValuesView:
+        return _PMapValues(self)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"PMap({dict(_walk(self.root))!r})"
+
+    def __getstate__(self) -> tuple:
+        return tuple(_walk(self.root))
+
+    def __setstate__(self, state: tuple) -> None:
+        restored = PMap.from_items(state)
+        self.root = restored.root
+        self.size = restored.size
+
+
+class PersistentDict(MutableMapping):
+    """Dict for story state that can be snapshotted in O(1).
+
+    Mutations replace the underlying `PMap`, so `snapshot()` just
+    returns the current version and `restore()` puts an old one back.
+    Iteration follows insertion order like a dict. Values are shared
+    between versions and should be treated as immutable.
+    """
+
+    def __init__(self, items: Any = None) -> None:
+        # key -> (insertion number, value)
+        self.map = PMap()
+        self.counter = 0
+        # keys in insertion order and the map they were sorted from
+        self.order: tuple = ()
+        self.order_map: PMap | None = self.map
+        if items:
+            self.update(items)
+
+    def snapshot(self) -> PMap:
+        return self.map
+
+    def restore(self, snapshot: PMap) -> None:
+        self.map = snapshot
+        top = max((seq for seq, _ in snapshot.values()), default=-1)
+        self.counter = max(self.counter, top + 1)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.map[key][1]
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        entry = self.map.get(key)
+        return default if entry is None else entry[1]
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.map
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        entry = self.map.get(key)
+        if entry is None:
+            entry = (self.counter, value)
+            self.counter += 1
+        else:
+            entry = (entry[0], value)
+        self.map = self.map.set(key, entry)
+
+    def __delitem__(self, key: Any) -> None:
+        if key not in self.map:
+            raise KeyError(key)
+        self.map = self.map.discard(key)
+
+    def clear(self) -> None:
+        self.map = PMap()
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.order_map is not self.map:
+            # sorted again only after the map changed, so iterating every
+            # frame is cheap
+            entries = sorted(self.map.items(), key=lambda item: item[1][0])
+            self.order = tuple(key for key, _ in entries)
+            self.order_map = self.map
+        return iter(self.order)
+
+    def __len__(self) -> int:
+        return len(self.map)
+
+    def __repr__(self) -> str:
+        return f"PersistentDict({dict(self.items())!r})"
@@ -1,4 +1,5 @@
 import ctypes
+from calliopy.diagnostics.tracing import tracer
 
 # TODO: not sure if RTLD_GLOBAL is a good idea here, might
 # reconsider just wrapping raylib in c later
@@ -33,6 +34,12 @@ raylib.SetTargetFPS.restype = None
 raylib.IsKeyPressed.argtypes = [ctypes.c_int]
 raylib.IsKeyPressed.restype = ctypes.c_bool
 
+raylib.GetKeyPressed.argtypes = []
+raylib.GetKeyPressed.restype = ctypes.c_int
+
+raylib.GetCharPressed.argtypes = []
+raylib.GetCharPressed.restype = ctypes.c_int
+
 raylib.DrawRectangle.argtypes = [
         ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_uint
 ]
@@ -102,6 +109,25 @@ TRACELOGCALLBACK = ctypes.CFUNCTYPE(None, ctypes.c_int, ctypes.c_char_p)
 forwarder.SetPythonTraceCallback.argtypes = [TRACELOGCALLBACK]
 forwarder.SetPythonTraceCallback.restype = None
 
+TRACE_MSG_LEN = 256
+
+
+class TraceEntry(ctypes.Structure):
+    _fields_ = [
+        ("level", ctypes.c_int),
+        ("text", ctypes.c_char * TRACE_MSG_LEN),
+    ]
+
+
+forwarder.EnableTraceBuffer.argtypes = []
+forwarder.EnableTraceBuffer.restype = None
+
+forwarder.DrainTraceLog.argtypes = [ctypes.POINTER(TraceEntry), ctypes.c_int]
+forwarder.DrainTraceLog.restype = ctypes.c_int
+
+forwarder.GetTraceDropped.argtypes = []
+forwarder.GetTraceDropped.restype = ctypes.c_ulonglong
+
 
 class Sound(ctypes.Structure):
     _fields_ = [
@@ -146,6 +172,17 @@ raylib.CheckCollisionPointRec.restype = ctypes.c_bool
 raylib.IsMouseButtonPressed.argtypes = [ctypes.c_int]
 raylib.IsMouseButtonPressed.restype = ctypes.c_bool
 
+raylib.GetMouseWheelMove.argtypes = []
+raylib.GetMouseWheelMove.restype = ctypes.c_float
+
+raylib.BeginScissorMode.argtypes = [
+        ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int
+]
+raylib.BeginScissorMode.restype = None
+
+raylib.EndScissorMode.argtypes = []
+raylib.EndScissorMode.restype = None
+
 # Constants
 RAYWHITE = 0xFFFFFFFF
 BLACK = 0xFF000000
@@ -154,6 +191,7 @@ WHITE = 0xFFFFFFFF
 KEY_ENTER = 257
 KEY_ESCAPE = 256
 KEY_SPACE = 32
+KEY_TAB = 258
 KEY_0 = 48
 KEY_1 = 49
 KEY_2 = 50
@@ -167,6 +205,12 @@ KEY_9 = 57
 
 KEY_A = 65
 
+KEY_F5 = 294
+KEY_F9 = 298
+
+KEY_PAGE_UP = 266
+KEY_PAGE_DOWN = 267
+
 KEY_UP = 265
 KEY_DOWN = 264
 KEY_LEFT = 263
@@ -180,6 +224,7 @@ MOUSE_BUTTON_MIDDLE = 2
 KEY_MAP = {
     "space": KEY_SPACE,
     "enter": KEY_ENTER,
+    "tab": KEY_TAB,
     "esc": KEY_ESCAPE,
     "escape": KEY_ESCAPE,
     "up": KEY_UP,
@@ -229,6 +274,16 @@ def is_key_pressed(code: int) -> bool:
     return raylib.IsKeyPressed(code)
 
 
+def get_key_pressed() -> int:
+    """Pops next key from raylib key queue, 0 when empty"""
+    return raylib.GetKeyPressed()
+
+
+def get_char_pressed() -> int:
+    """Pops next unicode codepoint from raylib char queue, 0 when empty"""
+    return raylib.GetCharPressed()
+
+
 def draw_rectangle(
         x: int, y: int, width: int, height: int, color: int
 ) -> None:
@@ -250,7 +305,13 @@ def draw_text(text: str, x: int, y: int, font_size: int, color: int) -> None:
 
 
 def load_texture(path: str) -> Texture2D:
-    return raylib.LoadTexture(bytes(path, "utf-8"))
+    if not tracer.enabled:
+        return raylib.LoadTexture(bytes(path, "utf-8"))
+    tracer.begin("load_texture", "assets", path=path)
+    try:
+        return raylib.LoadTexture(bytes(path, "utf-8"))
+    finally:
+        tracer.end("load_texture", "assets")
 
 
 def draw_texture(texture: Texture2D, x: int, y: int, color: int) -> None:
@@ -283,6 +344,28 @@ def set_trace_log_callback(func):
     forwarder.SetPythonTraceCallback(func)
 
 
+def enable_trace_buffer() -> None:
+    forwarder.EnableTraceBuffer()
+
+
+_TRACE_BATCH = 64
+_trace_entries = (TraceEntry * _TRACE_BATCH)()
+
+
+def drain_trace_log() -> list[tuple[int, bytes]]:
+    out = []
+    while True:
+        n = forwarder.DrainTraceLog(_trace_entries, _TRACE_BATCH)
+        for i in range(n):
+            out.append((_trace_entries[i].level, _trace_entries[i].text))
+        if n < _TRACE_BATCH:
+            return out
+
+
+def get_trace_dropped() -> int:
+    return forwarder.GetTraceDropped()
+
+
 def init_audio_device() -> None:
     raylib.InitAudioDevice()
 
@@ -296,7 +379,13 @@ def set_master_volume(vol: float) -> None:
 
 
 def load_sound(path: str) -> Sound:
-    return raylib.LoadSound(bytes(path, "utf-8"))
+    if not tracer.enabled:
+        return raylib.LoadSound(bytes(path, "utf-8"))
+    tracer.begin("load_sound", "assets", path=path)
+    try:
+        return raylib.LoadSound(bytes(path, "utf-8"))
+    finally:
+        tracer.end("load_sound", "assets")
 
 
 def play_sound(sound: Sound) -> None:
@@ -321,3 +410,15 @@ def check_collision_point_rec(pos: Vector2, rect: Rectangle) -> bool:
 
 def is_mouse_button_pressed(button: int) -> bool:
     return raylib.IsMouseButtonPressed(button)
+
+
+def get_mouse_wheel_move() -> float:
+    return raylib.GetMouseWheelMove()
+
+
+def begin_scissor_mode(x: int, y: int, width: int, height: int) -> None:
+    raylib.BeginScissorMode(x, y, width, height)
+
+
+def end_scissor_mode() -> None:
+    raylib.EndScissorMode()
@@ -0,0 +1,152 @@
+from calliopy.core.raylib import get_frame_time
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+from calliopy.core.input import InputManager, InputSnapshot
+from calliopy.logger.logger import LoggerFactory
+from pathlib import Path
+from typing import BinaryIO
+import struct
+import time
+
+MAGIC = b"CPYR"
+VERSION = 2
+
+# magic, version, recorded target fps
+_HEADER = struct.Struct("<4sBH")
+# frame time (as the float64 fed to the clock), 1 when input follows
+_FRAME = struct.Struct("<dB")
+
+
+class ReplayWriter:
+    """Writes frames as dt followed by input snapshot when there was any"""
+
+    def __init__(self, path: str | Path, fps: int = 60) -> None:
+        self.path = Path(path)
+        self.file: BinaryIO = open(self.path, "wb")
+        self.file.write(_HEADER.pack(MAGIC, VERSION, fps))
+        self.frames = 0
+
+    def write(self, dt: float, snapshot: InputSnapshot) -> None:
+        if snapshot.empty():
+            self.file.write(_FRAME.pack(dt, 0))
+        else:
+            self.file.write(_FRAME.pack(dt, 1) + snapshot.pack())
+        self.frames += 1
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.file.close()
+
+
+class ReplayReader:
+    """Reads whole replay log and yields (dt, snapshot) per frame"""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.data = self.path.read_bytes()
+        magic, version, fps = _HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise Exception(f"{self.path} is not a calliopy replay")
+        if version != VERSION:
+            raise Exception(f"Unsupported replay version {version}")
+        self.fps = fps
+        self.offset = _HEADER.size
+        self.frames = 0
+
+    def done(self) -> bool:
+        return self.offset >= len(self.data)
+
+    def next(self) -> tuple[float, InputSnapshot]:
+        dt, has_input = _FRAME.unpack_from(self.data, self.offset)
+        self.offset += _FRAME.size
+        snapshot = _EMPTY
+        if has_input:
+            snapshot, self.offset = InputSnapshot.unpack(self.data, self.offset)
+        self.frames += 1
+        return dt, snapshot
+
+
+_EMPTY = InputSnapshot()
+
+
+@Component(tags=["replay", "replay_manager"])
+class ReplayManager:
+    """Records or replays frame times and input of a playthrough.
+
+    With the `record` flag every frame's `dt` and input snapshot is
+    written to the given file. With the `replay` flag the frontend reads
+    both from the log instead of raylib, so the playthrough runs the
+    same way it was recorded. `replay.speed` is either `realtime` (the
+    default, frames are paced by the target fps) or `max`, which drops
+    the frame limit for regression benchmarks.
+    """
+
+    def __init__(
+            self,
+            container: CalliopyContainer,
+            input_manager: InputManager,
+    ) -> None:
+        self.logger = LoggerFactory.get_logger()
+        flags = container.flags if container else {}
+        self.record_path = flags.get("record")
+        self.replay_path = flags.get("replay")
+        self.max_speed = flags.get("replay.speed", "realtime") == "max"
+        self.input = input_manager
+        self.writer: ReplayWriter | None = None
+        self.reader: ReplayReader | None = None
+        self.dt = 0.0
+        self.pending = _EMPTY
+        self.started = 0.0
+
+    @property
+    def replaying(self) -> bool:
+        return self.reader is not None
+
+    def start(self, fps: int = 60) -> None:
+        if self.replay_path:
+            self.reader = ReplayReader(self.replay_path)
+            self.input.source = self.next_input
+            self.logger.info("Replaying {}", self.replay_path)
+        if self.record_path:
+            self.writer = ReplayWriter(self.record_path, fps)
+            self.input.add_recorder(self.record)
+            self.logger.info("Recording input to {}", self.record_path)
+        self.started = time.perf_counter()
+
+    def finished(self) -> bool:
+        return self.reader is not None and self.reader.done()
+
+    def frame_time(self) -> float:
+        """Returns dt of the frame, read from the log when replaying"""
+        if self.reader is None:
+            self.dt = get_frame_time()
+            return self.dt
+        self.dt, self.pending = self.reader.next()
+        return self.dt
+
+    def next_input(self) -> InputSnapshot:
+        snapshot = self.pending
+        self.pending = _EMPTY
+        return snapshot
+
+    def record(self, snapshot: InputSnapshot) -> None:
+        if self.writer is not None:
+            self.writer.write(self.dt, snapshot)
+
+    def stop(self) -> None:
+        elapsed = time.perf_counter() - self.started
+        if self.writer is not None:
+            self.input.remove_recorder(self.record)
+            self.writer.close()
+            self.logger.info(
+                    "Recorded {} frames to {}",
+                    self.writer.frames, self.writer.path
+            )
+            self.writer = None
+        if self.reader is not None:
+            self.input.source = None
+            self.logger.info(
+                    "Replayed {} frames in {:.3f} s",
+                    self.reader.frames, elapsed
+            )
+            self.reader = None
@@ -0,0 +1,19 @@
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+import random
+
+
+@Component(tags=["rng", "story_rng"])
+class StoryRandom(random.Random):
+    """Random generator for story decisions.
+
+    Scenes should take randomness from this component instead of the
+    `random` module, so that saves and replays can restore its state.
+    The seed comes from the `seed` flag or is picked at startup.
+    """
+
+    def __init__(self, container: CalliopyContainer) -> None:
+        flags = container.flags if container else {}
+        seed = flags.get("seed")
+        self.initial_seed = int(seed) if seed else random.getrandbits(63)
+        super().__init__(self.initial_seed)
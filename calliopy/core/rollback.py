@@ -0,0 +1,83 @@
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+from calliopy.core.dialogue import DialogueListener, DialogueManager
+from calliopy.core.save import SaveManager, SceneStart
+from calliopy.logger.logger import LoggerFactory
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    start: SceneStart
+    choices: tuple[int | None, ...]
+    beat: int
+    states: dict[str, Any]
+
+
+@Component(tags=["rollback", "rollback_manager"])
+class RollbackManager(DialogueListener):
+    """Keeps a checkpoint for every line and choice shown.
+
+    A checkpoint references the start of its scene (shared by all lines
+    of the scene), the choices made so far and the state of `Stateful`
+    components. With persistent state containers taking that state is
+    O(1), so the ring of the last `rollback.size` checkpoints is cheap.
+    Rolling back replays the scene from its start to the checkpoint's
+    beat and then restores the component state saved with the line.
+    """
+
+    def __init__(
+            self,
+            container: CalliopyContainer,
+            dial: DialogueManager,
+            save_manager: SaveManager,
+    ) -> None:
+        self.logger = LoggerFactory.get_logger()
+        flags = container.flags if container else {}
+        self.size = int(flags.get("rollback.size", 64))
+        self.dial = dial
+        self.saves = save_manager
+        self.ring: deque[Checkpoint] = deque(maxlen=self.size)
+
+    def checkpoint(self) -> None:
+        if self.dial.replaying:
+            return
+        saves = self.saves
+        self.ring.append(Checkpoint(
+                start=saves.start,
+                choices=tuple(saves.scene_choices),
+                beat=saves.beat,
+                states=saves.capture_states(),
+        ))
+
+    def on_line(self, speaker: str | None, text: str) -> None:
+        self.checkpoint()
+
+    def on_choice_start(self, options: list[str]) -> None:
+        self.checkpoint()
+
+    def can_rollback(self) -> bool:
+        return len(self.ring) > 1
+
+    def rollback(self, steps: int = 1) -> bool:
+        """Goes back `steps` lines; must be called from the frontend"""
+        if len(self.ring) <= steps:
+            return False
+        # the last checkpoint is the line shown right now
+        for _ in range(steps):
+            self.ring.pop()
+        target = self.ring.pop()
+        choices = list(target.choices)
+        if not self.saves.rewind(target.start, choices, target.beat):
+            return False
+        self.saves.restore_states(target.states)
+        self.ring.append(target)
+        self.logger.debug(
+                "Rolled back to {} beat {}", target.start.scene, target.beat
+        )
+        return True
+
+    def clear(self) -> None:
+        self.ring.clear()
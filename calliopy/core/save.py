@@ -0,0 +1,319 @@
+from calliopy.core.annotations import Component, Inject
+from calliopy.core.container import CalliopyContainer, get_type_name
+from calliopy.core.dialogue import (
+        DialogueListener, DialogueManager, SceneScheduler
+)
+from calliopy.core.persistent import PMap
+from calliopy.core.script import ScriptManager
+from calliopy.core.rng import StoryRandom
+from calliopy.core.state import Stateful
+from calliopy.logger.logger import LoggerFactory
+from calliopy.diagnostics.tracing import tracer
+from dataclasses import dataclass, field, is_dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any
+import marshal
+import sys
+import time
+
+SAVE_VERSION = 2
+
+_SCALARS = (type(None), bool, int, float, complex, str, bytes)
+
+
+@dataclass(frozen=True)
+class SceneStart:
+    """Everything needed to run a scene again from its start"""
+    scene: str | None = None
+    script_position: int = 0
+    rng_state: Any = None
+    states: dict[str, Any] = field(default_factory=dict)
+    # scenes and choices in the story before this scene
+    scene_count: int = 0
+    choice_count: int = 0
+
+
+@dataclass
+class SaveData:
+    version: int
+    seed: int
+    # every scene started and every choice made since the story began
+    scenes: list[str] = field(default_factory=list)
+    choices: list[int | None] = field(default_factory=list)
+    start: SceneStart = field(default_factory=SceneStart)
+    # choices made in the current scene and beats into it
+    scene_choices: list[int | None] = field(default_factory=list)
+    beat: int = 0
+
+
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _find_class(path: str) -> type:
+    """Class named in a save, looked up in already imported modules"""
+    module_name, _, qualname = path.partition(":")
+    obj = sys.modules.get(module_name)
+    if obj is None:
+        raise ValueError(f"Unknown class {path}")
+    for part in qualname.split("."):
+        obj = getattr(obj, part, None)
+    if not isinstance(obj, type):
+        raise ValueError(f"Unknown class {path}")
+    return obj
+
+
+def _encode(value: Any) -> Any:
+    """Converts save data to builtin types that `marshal` can store.
+
+    Containers, enums, `PMap` and dataclasses become tuples starting
+    with a tag; scalars are kept as they are.
+    """
+    if isinstance(value, Enum):
+        return ("enum", _class_path(type(value)), value.name)
+    kind = type(value)
+    if kind in _SCALARS:
+        return value
+    if kind in (list, tuple, set, frozenset):
+        return (kind.__name__, tuple(_encode(v) for v in value))
+    if kind is dict or kind is PMap:
+        return (kind.__name__.lower(), tuple(
+                (_encode(k), _encode(v)) for k, v in value.items()
+        ))
+    if is_dataclass(value) and not isinstance(value, type):
+        getstate = getattr(value, "__getstate__", None)
+        state = getstate() if getstate else None
+        if not isinstance(state, dict):
+            state = vars(value)
+        return ("obj", _class_path(kind), _encode(state))
+    raise TypeError(f"Can't save {kind.__name__} values")
+
+
+def _decode(value: Any) -> Any:
+    kind = type(value)
+    if kind in _SCALARS:
+        return value
+    if kind is not tuple:
+        raise ValueError(f"Unexpected {kind.__name__} in save")
+    tag = value[0]
+    if tag == "list":
+        return [_decode(v) for v in value[1]]
+    if tag == "tuple":
+        return tuple(_decode(v) for v in value[1])
+    if tag == "set":
+        return {_decode(v) for v in value[1]}
+    if tag == "frozenset":
+        return frozenset(_decode(v) for v in value[1])
+    if tag == "dict":
+        return {_decode(k): _decode(v) for k, v in value[1]}
+    if tag == "pmap":
+        return PMap.from_items((_decode(k), _decode(v)) for k, v in value[1])
+    if tag == "enum":
+        cls = _find_class(value[1])
+        if not issubclass(cls, Enum):
+            raise ValueError(f"{value[1]} is not an enum")
+        return cls[value[2]]
+    if tag == "obj":
+        cls = _find_class(value[1])
+        if not is_dataclass(cls):
+            raise ValueError(f"{value[1]} is not a dataclass")
+        # fields are set directly, no code of the class runs
+        obj = cls.__new__(cls)
+        obj.__dict__.update(_decode(value[2]))
+        return obj
+    raise ValueError(f"Unknown tag {tag!r} in save")
+
+
+@Component(tags=["save_manager"])
+class SaveManager(DialogueListener):
+    """Saves the game as choices made since the start of a scene.
+
+    Greenlets can't be saved, so instead of the scene stack a save
+    holds the state of `Stateful` components and the story RNG from when
+    the current scene started, the choices made in it and how many
+    dialogue beats into it the player is. Loading restores that state
+    and replays the scene without rendering until the same beat.
+    Save files only hold builtin types stored with `marshal`; enums and
+    dataclasses are restored by name from already imported modules, so
+    a save can't run code when it is loaded.
+    """
+
+    def __init__(
+            self,
+            container: CalliopyContainer,
+            scene_scheduler: SceneScheduler,
+            dial: DialogueManager,
+            script: ScriptManager,
+            rng: StoryRandom,
+    ) -> None:
+        self.logger = LoggerFactory.get_logger()
+        self.container = container
+        flags = container.flags if container else {}
+        self.path = flags.get("save.path", "calliopy_save.dat")
+        self.scheduler = scene_scheduler
+        self.dial = dial
+        self.script = script
+        self.rng = rng
+        self.stateful: list[Stateful] = []
+        self.seed = rng.initial_seed
+        self.scenes: list[str] = []
+        self.choices: list[int | None] = []
+        self.start = SceneStart()
+        self.scene_choices: list[int | None] = []
+        self.scene_beat = 0
+
+    @Inject()
+    def set_stateful(self, stateful: list[Stateful]) -> None:
+        self.stateful = stateful
+
+    @property
+    def beat(self) -> int:
+        """Dialogue beats since start of current scene"""
+        return self.dial.beats - self.scene_beat
+
+    def capture_states(self) -> dict[str, Any]:
+        return {
+            get_type_name(type(comp)): comp.save_state()
+            for comp in self.stateful
+        }
+
+    def restore_states(self, states: dict[str, Any]) -> None:
+        for comp in self.stateful:
+            state = states.get(get_type_name(type(comp)))
+            if state is not None:
+                comp.load_state(state)
+
+    def on_scene_start(self, scene: str) -> None:
+        self.start = SceneStart(
+                scene=scene,
+                script_position=self.script.current,
+                rng_state=self.rng.getstate(),
+                states=self.capture_states(),
+                scene_count=len(self.scenes),
+                choice_count=len(self.choices),
+        )
+        self.scenes.append(scene)
+        self.scene_choices = []
+        self.scene_beat = self.dial.beats
+
+    def on_choice(self, options: list[str], index: int | None) -> None:
+        if self.dial.replaying:
+            return
+        self.choices.append(index)
+        self.scene_choices.append(index)
+
+    def snapshot(self) -> SaveData:
+        return SaveData(
+                version=SAVE_VERSION,
+                seed=self.seed,
+                scenes=list(self.scenes),
+                choices=list(self.choices),
+                start=self.start,
+                scene_choices=list(self.scene_choices),
+                beat=self.beat,
+        )
+
+    def save(self, path: str | Path | None = None) -> Path:
+        path = Path(path or self.path)
+        data = marshal.dumps((SAVE_VERSION, _encode(self.snapshot())))
+        with open(path, "wb") as f:
+            f.write(data)
+        self.logger.info("Saved game to {}", path)
+        return path
+
+    def read(self, path: str | Path | None = None) -> SaveData | None:
+        try:
+            with open(path or self.path, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            self.logger.error("Couldn't read save", error=e)
+            return None
+        try:
+            version, payload = marshal.loads(raw)
+            if version != SAVE_VERSION:
+                raise ValueError(f"Save version {version}")
+            data = _decode(payload)
+        except Exception as e:
+            # old, damaged or edited saves, or ones naming removed classes
+            self.logger.error(
+                    "Unsupported save {}", path or self.path, error=e
+            )
+            return None
+        if not isinstance(data, SaveData) or data.version != SAVE_VERSION:
+            self.logger.error("Unsupported save {}", path or self.path)
+            return None
+        return data
+
+    def load(self, data: SaveData) -> None:
+        """Restores save and replays current scene to the saved beat.
+
+        Must be called from the frontend, outside of scenes.
+        """
+        start = time.perf_counter()
+        if tracer.enabled:
+            tracer.begin(
+                    "load", "save", scene=data.start.scene, beat=data.beat
+            )
+        try:
+            self.seed = data.seed
+            self.scenes = list(data.scenes)
+            self.choices = list(data.choices)
+            self.rewind(data.start, data.scene_choices, data.beat)
+        finally:
+            if tracer.enabled:
+                tracer.end("load", "save")
+        self.logger.info(
+                "Loaded {} at beat {} in {:.1f} ms",
+                data.start.scene, data.beat,
+                (time.perf_counter() - start) * 1000
+        )
+
+    def rewind(
+            self,
+            start: SceneStart,
+            scene_choices: list[int | None],
+            beat: int
+    ) -> bool:
+        """Restarts scene from its start state and replays it to beat"""
+        current = self.scheduler.current
+        if current is not None and not current.dead:
+            current.throw()
+        self.scheduler.current = None
+        self.dial.current_text = ""
+        self.dial.options = []
+        self.dial.paused = False
+        self.dial.transition_key = None
+        if self.dial.skip is not None:
+            self.dial.skip.stop()
+
+        node = self.script.graph.find(start.scene)
+        if node is None:
+            self.logger.error("Scene {} doesn't exist", start.scene)
+            return False
+        scene = node.func
+        self.rng.setstate(start.rng_state)
+        self.restore_states(start.states)
+        self.script.current = start.script_position
+        self.scenes = self.scenes[:start.scene_count] + [start.scene]
+        self.choices = self.choices[:start.choice_count] + list(scene_choices)
+        self.start = start
+        self.scene_choices = list(scene_choices)
+        self.scene_beat = self.dial.beats
+
+        choices = iter(scene_choices)
+        self.dial.replaying = True
+        try:
+            func, kwargs = self.container.get_function(
+                    self.script.resolve(scene)
+            )
+            self.scheduler.run_scene(func, **kwargs)
+            while self.beat < beat:
+                if self.scheduler.current.dead:
+                    break
+                if self.dial.options:
+                    self.dial.choice_result = next(choices, None)
+                self.scheduler.resume()
+        finally:
+            self.dial.replaying = False
+        return True
@@ -1,42 +1,283 @@
 from calliopy.logger.logger import LoggerFactory
 from calliopy.core.container import CalliopyContainer
-from calliopy.core.annotations import Component
+from calliopy.core.annotations import Component, Inject
+from calliopy.core.chapters import ChapterManager
+from calliopy.core.rng import StoryRandom
+from calliopy.core.state import Stateful
+from calliopy.diagnostics.tracing import tracer
+from dataclasses import dataclass
+from typing import Any, Callable
+import heapq
+import random
+
+
+@dataclass(eq=False)
+class SceneNode:
+    index: int
+    func: Callable
+    name: str
+    after: str | None
+    default: bool
+    # callable or flag name, checked when the scene is considered
+    condition: Callable[[], bool] | str | None
+    branch: str | None
+    repeatable: bool
+    priority: int
+    probability: float
+
+    @property
+    def entry(self) -> tuple[int, int]:
+        """Priority queue entry; higher priority first, then in order"""
+        return (-self.priority, self.index)
+
+
+class SceneGraph:
+    """Scenes indexed for selection.
+
+    Scenes without `after` and `branch` form the main line, which is
+    played in declaration order. Scenes with `after` are queued behind
+    the scene they follow, scenes with `branch` in the queue of that
+    branch and `default` scenes in the queue of scenes to start with.
+    Queues are heaps ordered by priority.
+    """
+
+    def __init__(self, scenes: list[Callable]) -> None:
+        self.logger = LoggerFactory.get_logger()
+        self.nodes: list[SceneNode] = []
+        self.index: dict[str, int] = {}
+        for i, func in enumerate(scenes):
+            dec = func.__calliopy_decorators__["Scene"]
+            node = SceneNode(
+                    index=i,
+                    func=func,
+                    name=func.__name__,
+                    after=dec.get("after"),
+                    default=dec.get("default", False),
+                    condition=dec.get("if_true"),
+                    branch=dec.get("branch"),
+                    repeatable=dec.get("repeatable", True),
+                    priority=dec.get("priority", 0),
+                    probability=dec.get("probability", 1.0),
+            )
+            self.nodes.append(node)
+            if node.name in self.index:
+                self.logger.warn("Duplicate scene name {}", node.name)
+            self.index.setdefault(node.name, i)
+        self.mainline = [
+            node.index for node in self.nodes
+            if node.after is None and node.branch is None
+        ]
+        self.mainline_pos = {idx: pos for pos, idx in enumerate(self.mainline)}
+        self.build_queues()
+
+    def build_queues(self) -> None:
+        self.defaults: list[tuple[int, int]] = []
+        self.successors: dict[int, list[tuple[int, int]]] = {}
+        self.branches: dict[str, list[tuple[int, int]]] = {}
+        for node in self.nodes:
+            if node.default:
+                self.defaults.append(node.entry)
+            if node.after is not None:
+                prev = self.index.get(node.after)
+                if prev is None:
+                    self.logger.warn(
+                            "Scene {} follows unknown scene {}",
+                            node.name, node.after
+                    )
+                else:
+                    self.successors.setdefault(prev, []).append(node.entry)
+            if node.branch is not None:
+                self.branches.setdefault(node.branch, []).append(node.entry)
+        heapq.heapify(self.defaults)
+        for queue in self.successors.values():
+            heapq.heapify(queue)
+        for queue in self.branches.values():
+            heapq.heapify(queue)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def find(self, name: str) -> SceneNode | None:
+        index = self.index.get(name)
+        return self.nodes[index] if index is not None else None
 
 
 @Component(tags=["script_manager"])
-class ScriptManager:
+class ScriptManager(Stateful):
+    """Picks the scene to run next.
+
+    A scene can return the name of a scene or of a branch to continue
+    with. Otherwise the highest priority scene queued `after` it runs
+    next, and when there is none the main line continues. Scenes whose
+    condition is false, which were played and aren't repeatable, or
+    which lose their `probability` roll on the story RNG are passed
+    over. Conditions are only evaluated for scenes that are considered
+    and at most once per selection.
+    """
+
     def __init__(self, container: CalliopyContainer, dial):
         self.container = container
         self.dial = dial
+        # position in the main line
         self.current = 0
+        self.last: int | None = None
+        self.played: frozenset[int] = frozenset()
+        # non-repeatable scenes removed from queues after being played
+        self.dropped: set[int] = set()
+        self.memo: dict[Any, bool] = {}
+        self.rng: random.Random = StoryRandom(None)
+        self.chapters: ChapterManager | None = None
         self.logger = LoggerFactory.get_logger()
         self.init_scenes()
 
+    @Inject()
+    def set_rng(self, rng: StoryRandom) -> None:
+        if rng is not None:
+            self.rng = rng
+
+    @Inject()
+    def set_chapters(self, chapter_manager: ChapterManager) -> None:
+        self.chapters = chapter_manager
+
     def init_scenes(self):
         self.set_scenes()
-        self.logger.debug(self.scenes)
-        self.logger.debug(self.container.components_by_class)
-        self.logger.debug(self.container.components_by_tag)
+        self.logger.debug("Scenes: {}", self.scenes)
+        self.logger.debug("Components: {}", self.container.components_by_class)
+        self.logger.debug("Tags: {}", self.container.components_by_tag)
         self.scenes.sort(key=lambda s: s.__calliopy_decorators__["Scene"]["num"])
+        self.graph = SceneGraph(self.scenes)
         self.tag = None
 
     def set_scenes(self):
         self.scenes = self.container.get_functions_with_decorator("Scene")
 
+    def check_flag(self, condition: str) -> bool:
+        return self.container.evaluate_conditional_creation(
+                {"if_true": condition}
+        )
+
     def get_next_scene(self, tag):
         if self.dial._abort:
             return None, None
-        if self.current >= len(self.scenes):
-            return None, None
-        scene = self.next_scene(tag)
-        return self.container.get_function(scene)
+        if tracer.enabled:
+            tracer.begin("get_next_scene", "script", tag=tag)
+        scene = None
+        try:
+            scene = self.next_scene(tag)
+            if scene is None:
+                return None, None
+            return self.container.get_function(self.resolve(scene))
+        finally:
+            if tracer.enabled:
+                tracer.end(
+                        "get_next_scene", "script",
+                        scene=scene.__name__ if scene is not None else None
+                )
+
+    def resolve(self, scene: Callable) -> Callable:
+        """Scene function to run, loading the chapter of a chapter stub"""
+        chapter = getattr(scene, "__calliopy_chapter__", None)
+        if self.chapters is None:
+            return scene
+        self.chapters.enter(chapter)
+        if chapter is None:
+            return scene
+        return self.chapters.scene(chapter, scene.__name__)
 
     def next_scene(self, tag: str | None):
-        if tag is not None:
-            for i, scene in enumerate(self.scenes):
-                if scene.__name__ == tag:
-                    self.current = i + 1
-                    return scene
-        scene = self.scenes[self.current]
-        self.current += 1
-        return scene
+        self.memo = {}
+        node = None
+        if isinstance(tag, str):
+            node = self.jump(tag)
+        if node is None and self.last is not None:
+            node = self.pick(self.graph.successors.get(self.last))
+        if node is None and self.last is None:
+            node = self.pick(self.graph.defaults)
+        if node is None:
+            node = self.next_in_line()
+        if node is None:
+            return None
+        self.enter(node)
+        return node.func
+
+    def jump(self, tag: str) -> SceneNode | None:
+        node = self.graph.find(tag)
+        if node is not None:
+            # explicit jumps don't roll for probability
+            if self.eligible(node, roll=False):
+                return node
+            return None
+        queue = self.graph.branches.get(tag)
+        if queue is None:
+            self.logger.warn("No scene or branch {}", tag)
+            return None
+        return self.pick(queue)
+
+    def pick(self, queue: list[tuple[int, int]] | None) -> SceneNode | None:
+        """Highest priority eligible scene in queue"""
+        if not queue:
+            return None
+        nodes = self.graph.nodes
+        passed = []
+        found = None
+        while queue:
+            node = nodes[queue[0][1]]
+            if not node.repeatable and node.index in self.played:
+                # can't be played again until a load brings it back
+                heapq.heappop(queue)
+                self.dropped.add(node.index)
+                continue
+            if self.eligible(node):
+                found = node
+                break
+            passed.append(heapq.heappop(queue))
+        for entry in passed:
+            heapq.heappush(queue, entry)
+        return found
+
+    def next_in_line(self) -> SceneNode | None:
+        mainline = self.graph.mainline
+        nodes = self.graph.nodes
+        while self.current < len(mainline):
+            node = nodes[mainline[self.current]]
+            self.current += 1
+            if self.eligible(node):
+                return node
+        return None
+
+    def eligible(self, node: SceneNode, roll: bool = True) -> bool:
+        if not node.repeatable and node.index in self.played:
+            return False
+        condition = node.condition
+        if condition is not None:
+            result = self.memo.get(condition)
+            if result is None:
+                if isinstance(condition, str):
+                    # flags can change while playing, e.g. in FlagStore
+                    result = self.check_flag(condition)
+                else:
+                    result = bool(condition())
+                self.memo[condition] = result
+            if not result:
+                return False
+        if roll and node.probability < 1.0:
+            return self.rng.random() < node.probability
+        return True
+
+    def enter(self, node: SceneNode) -> None:
+        self.last = node.index
+        pos = self.graph.mainline_pos.get(node.index)
+        if pos is not None:
+            self.current = pos + 1
+        if not node.repeatable:
+            self.played = self.played | {node.index}
+
+    def save_state(self) -> tuple[int, int | None, frozenset[int]]:
+        return (self.current, self.last, self.played)
+
+    def load_state(self, state: tuple) -> None:
+        self.current, self.last, self.played = state
+        if not self.dropped <= self.played:
+            # scenes dropped from queues can be played again
+            self.graph.build_queues()
+            self.dropped = set()
@@ -0,0 +1,108 @@
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+from calliopy.logger.logger import LoggerFactory
+from array import array
+from pathlib import Path
+from typing import Any
+import hashlib
+
+
+def line_key(scene: str | None, site: Any, text: str) -> int:
+    """Stable 64-bit key of a dialogue line.
+
+    site is the line number in the scene, or another stable position of
+    the line such as the instruction of a story script.
+    """
+    data = f"{scene or ''}\0{site}\0{text}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class ReadLog:
+    """Set of read line keys stored as an append-only array of uint64.
+
+    Keys read since the last save are kept apart, so saving only appends
+    them to the file.
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path else None
+        self.keys: set[int] = set()
+        self.pending = array("Q")
+
+    def load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        data = array("Q")
+        raw = self.path.read_bytes()
+        # ignore partially written key at the end
+        data.frombytes(raw[:len(raw) - len(raw) % data.itemsize])
+        self.keys.update(data)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: int) -> bool:
+        """Marks key as read, returns False if it was read before"""
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        self.pending.append(key)
+        return True
+
+    def save(self) -> None:
+        if self.path is None or not self.pending:
+            return
+        with open(self.path, "ab") as f:
+            self.pending.tofile(f)
+        self.pending = array("Q")
+
+
+@Component(tags=["skip", "skip_manager"])
+class SkipManager:
+    """Tracks read lines and skip mode.
+
+    While skip mode is active, `DialogueManager` doesn't give control
+    back to the frontend for lines that were read before, so a scene
+    runs through them without rendering. Skip mode ends at the first
+    unread line or choice. The read log is stored in the file given by
+    the `read_log` flag (`0` keeps it in memory only).
+    """
+
+    def __init__(self, container: CalliopyContainer) -> None:
+        self.logger = LoggerFactory.get_logger()
+        flags = container.flags if container else {}
+        path = flags.get("read_log", "calliopy_read.bin")
+        if path in ["0", "false", False]:
+            path = None
+        self.read = ReadLog(path)
+        self.active = False
+        self.skipped = 0
+
+    def start(self) -> None:
+        self.read.load()
+        self.logger.debug("Loaded {} read lines", len(self.read))
+
+    def save(self) -> None:
+        try:
+            self.read.save()
+        except OSError as e:
+            self.logger.error("Couldn't save read lines", error=e)
+
+    def toggle(self) -> None:
+        self.active = not self.active
+
+    def stop(self) -> None:
+        self.active = False
+
+    def line(self, scene: str | None, site: Any, text: str) -> bool:
+        """Marks line as read, returns True if it should be skipped"""
+        if self.read.add(line_key(scene, site, text)):
+            self.active = False
+            return False
+        if self.active:
+            self.skipped += 1
+            return True
+        return False
@@ -0,0 +1,57 @@
+from calliopy.core.persistent import PMap
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class Stateful(ABC):
+    """Component whose story state is saved with the game.
+
+    State is captured when a scene starts and restored before the scene
+    is replayed on load, so it only needs to cover what scenes change.
+    """
+
+    @abstractmethod
+    def save_state(self) -> Any:
+        """Returns copy of the state.
+
+        It is written to save files, so it may only hold builtin types,
+        enums, dataclasses and `PMap`.
+        """
+        pass
+
+    @abstractmethod
+    def load_state(self, state: Any) -> None:
+        pass
+
+
+class StoryState(Stateful):
+    """Stateful component keeping its public attributes in a `PMap`.
+
+    Saving the state only takes a reference to the current map, so it
+    can be done on every line. Attribute values are shared between
+    snapshots and must not be mutated in place; use tuples, frozensets
+    and `PMap` and assign a new value instead.
+    """
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+            return
+        state = self.__dict__.get("_state", _EMPTY_STATE)
+        object.__setattr__(self, "_state", state.set(name, value))
+
+    def __getattr__(self, name: str) -> Any:
+        state = self.__dict__.get("_state", _EMPTY_STATE)
+        try:
+            return state[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def save_state(self) -> PMap:
+        return self.__dict__.get("_state", _EMPTY_STATE)
+
+    def load_state(self, state: PMap) -> None:
+        object.__setattr__(self, "_state", state)
+
+
+_EMPTY_STATE = PMap()
@@ -0,0 +1,300 @@
+from calliopy.core.annotations import Component, Scene
+from calliopy.logger.logger import LoggerFactory
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+import ast
+import hashlib
+import marshal
+import os
+import re
+
+# bump when the instruction format changes, invalidates cached programs
+STORY_VERSION = 1
+
+(
+    OP_SAY, OP_NARRATE, OP_CHOICE, OP_JUMP, OP_SHOW, OP_HIDE,
+    OP_EMOTE, OP_PLAY, OP_PAUSE, OP_TRANSITION, OP_END,
+) = range(11)
+
+_NAME = re.compile(r"[A-Za-z_]\w*$")
+_SAY = re.compile(r"([A-Za-z_][\w ]*?)\s*:\s*(.+)$")
+_OPTION = re.compile(r'("(?:[^"\\]|\\.)*")\s*(?:->\s*([A-Za-z_]\w*))?$')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"$')
+
+
+class StoryScriptError(Exception):
+    def __init__(self, name: str, lineno: int, message: str) -> None:
+        super().__init__(f"{name}:{lineno}: {message}")
+        self.lineno = lineno
+
+
+@dataclass(frozen=True)
+class Program:
+    """Compiled story script.
+
+    `code` is a flat list of instruction tuples starting with an opcode;
+    `labels` maps label names to the index of their first instruction.
+    Both only hold builtin types, so they can be stored with `marshal`.
+    """
+    name: str
+    labels: dict[str, int]
+    code: tuple[tuple, ...]
+
+    def dump(self) -> bytes:
+        return marshal.dumps((
+                STORY_VERSION, self.name, tuple(self.labels.items()),
+                self.code,
+        ))
+
+    @classmethod
+    def load(cls, data: bytes) -> "Program":
+        version, name, labels, code = marshal.loads(data)
+        if version != STORY_VERSION:
+            raise ValueError(f"Unsupported story version {version}")
+        return cls(name, dict(labels), code)
+
+
+def _string(text: str, name: str, lineno: int) -> str:
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        raise StoryScriptError(name, lineno, f"Bad string {text}") from None
+    return value
+
+
+def _position(text: str, name: str, lineno: int) -> Any:
+    if text in ("left", "right", "center"):
+        return text
+    try:
+        x, y = text.split(",")
+        return (int(x), int(y))
+    except ValueError:
+        raise StoryScriptError(
+                name, lineno, f"Bad position {text}"
+        ) from None
+
+
+def _show(args: list[str], name: str, lineno: int) -> tuple:
+    """show NAME [MOOD] [at POS] [with ANIMATION]"""
+    if not args:
+        raise StoryScriptError(name, lineno, "show needs an image")
+    image, args = args[0], args[1:]
+    mood = pos = animation = None
+    if args and args[0] not in ("at", "with"):
+        mood, args = args[0], args[1:]
+    while args:
+        if len(args) < 2 or args[0] not in ("at", "with"):
+            raise StoryScriptError(
+                    name, lineno, f"Unexpected {' '.join(args)}"
+            )
+        if args[0] == "at":
+            pos = _position(args[1], name, lineno)
+        else:
+            animation = args[1]
+        args = args[2:]
+    return (OP_SHOW, image, mood, pos, animation)
+
+
+def compile_story(text: str, name: str = "<story>") -> Program:
+    """Compiles script text to a program.
+
+    Every `label NAME` starts a scene that runs until the next label or
+    `end`; like a Python scene, it then continues on the main line.
+    Lines are commands (`jump`, `choice`, `show`, `hide`, `emote`,
+    `play`, `pause`, `transition`, `end`), quoted narration or
+    `Speaker: text`. Options of a `choice` are indented quoted strings,
+    optionally followed by `-> label`; options without a target continue
+    after the choice. Lines starting with `#` are comments.
+    """
+    code: list[tuple] = []
+    labels: dict[str, int] = {}
+    options: list[str] | None = None
+    targets: list[str | None] = []
+
+    def end_choice(lineno: int) -> None:
+        nonlocal options
+        if options is None:
+            return
+        if not options:
+            raise StoryScriptError(name, lineno, "choice without options")
+        code.append((OP_CHOICE, tuple(options), tuple(targets)))
+        options = None
+
+    lineno = 0
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if options is not None and raw[0].isspace():
+            match = _OPTION.match(line)
+            if match is None:
+                raise StoryScriptError(name, lineno, "Bad choice option")
+            options.append(_string(match.group(1), name, lineno))
+            targets.append(match.group(2))
+            continue
+        end_choice(lineno)
+
+        command, _, rest = line.partition(" ")
+        args = rest.split()
+        if command == "label":
+            if len(args) != 1 or not _NAME.match(args[0]):
+                raise StoryScriptError(name, lineno, "Bad label name")
+            if args[0] in labels:
+                raise StoryScriptError(
+                        name, lineno, f"Duplicate label {args[0]}"
+                )
+            if labels:
+                code.append((OP_END,))
+            labels[args[0]] = len(code)
+            continue
+        if not labels:
+            raise StoryScriptError(name, lineno, "Line outside of a label")
+
+        if command == "choice" and not args:
+            options, targets = [], []
+        elif command == "jump" and len(args) == 1:
+            code.append((OP_JUMP, args[0]))
+        elif command == "end" and not args:
+            code.append((OP_END,))
+        elif command == "show":
+            code.append(_show(args, name, lineno))
+        elif command == "hide" and len(args) == 1:
+            code.append((OP_HIDE, args[0]))
+        elif command == "emote" and len(args) == 2:
+            code.append((OP_EMOTE, args[0], args[1]))
+        elif command == "play" and len(args) == 1:
+            code.append((OP_PLAY, args[0]))
+        elif command == "pause" and len(args) <= 1:
+            try:
+                seconds = float(args[0]) if args else None
+            except ValueError:
+                raise StoryScriptError(
+                        name, lineno, f"Bad pause {args[0]}"
+                ) from None
+            code.append((OP_PAUSE, seconds))
+        elif command == "transition" and len(args) == 1:
+            code.append((OP_TRANSITION, args[0]))
+        elif _STRING.match(line):
+            code.append((OP_NARRATE, _string(line, name, lineno)))
+        elif match := _SAY.match(line):
+            text = match.group(2)
+            if _STRING.match(text):
+                text = _string(text, name, lineno)
+            code.append((OP_SAY, match.group(1), text))
+        else:
+            raise StoryScriptError(name, lineno, f"Unknown line {line}")
+    end_choice(lineno)
+    if labels:
+        code.append((OP_END,))
+    return Program(name, labels, tuple(code))
+
+
+def load_program(
+        path: str | Path,
+        cache_dir: str | Path | None = "__storycache__",
+) -> Program:
+    """Loads script, compiling it only if it isn't in the cache.
+
+    Compiled programs are stored in `cache_dir` under the hash of the
+    script text, so edited scripts are compiled again and unchanged ones
+    are read back with `marshal`.
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    cached = None
+    if cache_dir is not None:
+        digest = hashlib.blake2b(
+                STORY_VERSION.to_bytes(2, "little") + data, digest_size=16
+        ).hexdigest()
+        cached = Path(cache_dir) / f"{path.stem}-{digest}.bin"
+        try:
+            return Program.load(cached.read_bytes())
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+    program = compile_story(data.decode("utf-8"), path.stem)
+    if cached is not None:
+        try:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(program.dump())
+            os.replace(tmp, cached)
+        except OSError as e:
+            LoggerFactory.get_logger(for_cls="story").warn(
+                    "Couldn't cache story {}", path, error=e
+            )
+    return program
+
+
+@Component(tags=["story", "story_runner"])
+class StoryRunner:
+    """Interprets compiled story scripts inside scenes.
+
+    A label runs as a scene; jumps and choice targets end it and return
+    the target as the tag of the next scene, so script labels and Python
+    `@Scene` functions can jump to each other.
+    """
+
+    def __init__(self, dial, chars, audio) -> None:
+        self.logger = LoggerFactory.get_logger()
+        self.dial = dial
+        self.chars = chars
+        self.audio = audio
+
+    def run(self, program: Program, pc: int) -> str | None:
+        code = program.code
+        dial = self.dial
+        while True:
+            op = code[pc]
+            pc += 1
+            kind = op[0]
+            if kind == OP_SAY:
+                # read lines are keyed by instruction, not by this line
+                dial.site = (program.name, pc - 1)
+                dial.say(op[1], op[2])
+            elif kind == OP_NARRATE:
+                dial.site = (program.name, pc - 1)
+                dial.narrate(op[1])
+            elif kind == OP_CHOICE:
+                index = dial.choice(*op[1]).index
+                if index is not None and 0 <= index < len(op[2]):
+                    if op[2][index] is not None:
+                        return op[2][index]
+            elif kind == OP_JUMP:
+                return op[1]
+            elif kind == OP_END:
+                return None
+            elif kind == OP_SHOW:
+                self.chars.show(op[1], mood=op[2], pos=op[3], animation=op[4])
+            elif kind == OP_HIDE:
+                self.chars.hide(op[1])
+            elif kind == OP_EMOTE:
+                char = self.chars.characters.get(op[1].capitalize())
+                if char is not None:
+                    char.emote(op[2])
+                else:
+                    self.chars.show(op[1], mood=op[2])
+            elif kind == OP_PLAY:
+                self.audio.play(op[1])
+            elif kind == OP_PAUSE:
+                dial.pause(op[1])
+            elif kind == OP_TRANSITION:
+                dial.transition(op[1])
+
+
+def story_scenes(program: Program) -> list[Callable]:
+    """Scene function for every label, in script order"""
+    scenes = []
+    for label, start in program.labels.items():
+        scenes.append(_make_scene(program, label, start))
+    return scenes
+
+
+def _make_scene(program: Program, label: str, start: int) -> Callable:
+    def scene(story: StoryRunner):
+        return story.run(program, start)
+
+    scene.__name__ = label
+    scene.__qualname__ = label
+    scene.__module__ = f"calliopy.story.{program.name}"
+    return Scene()(scene)
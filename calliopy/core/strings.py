@@ -0,0 +1,259 @@
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+from calliopy.core.story import OP_CHOICE, OP_NARRATE, OP_SAY, load_program
+from calliopy.logger.logger import LoggerFactory
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+import argparse
+import ast
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"CSTB"
+TABLE_VERSION = 1
+
+# magic, version, number of strings
+_HEADER = struct.Struct("<4sIQ")
+
+
+def key_hash(key: str) -> int:
+    return int.from_bytes(
+            hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(),
+            "little"
+    )
+
+
+def _little(arr: array) -> bytes:
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def write_table(strings: Mapping[str, str], path: str | Path) -> Path:
+    """Writes key -> text pairs to a string table file.
+
+    The file holds a header, the sorted 64-bit hashes of the keys, the
+    offsets of the texts (one more than there are texts) and the UTF-8
+    encoded texts, all little endian.
+    """
+    entries = {}
+    for key, text in strings.items():
+        h = key_hash(key)
+        if h in entries and entries[h][0] != key:
+            raise ValueError(f"Keys {entries[h][0]!r} and {key!r} collide")
+        entries[h] = (key, text.encode("utf-8"))
+    hashes = array("Q", sorted(entries))
+    offsets = array("I", [0])
+    blob = bytearray()
+    for h in hashes:
+        blob += entries[h][1]
+        offsets.append(len(blob))
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, TABLE_VERSION, len(hashes)))
+        f.write(_little(hashes))
+        f.write(_little(offsets))
+        f.write(blob)
+    os.replace(tmp, path)
+    return path
+
+
+class StringTable:
+    """Read-only string table mapped into memory.
+
+    Lookups binary search the hash column and decode only the text they
+    return, so the texts stay in the page cache instead of the heap.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.file = open(self.path, "rb")
+        try:
+            self.map = mmap.mmap(
+                    self.file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"Empty string table {self.path}") from None
+        magic, version, count = _HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != TABLE_VERSION:
+            self.map.close()
+            self.file.close()
+            raise ValueError(f"Unsupported string table {self.path}")
+        self.count = count
+        start = _HEADER.size
+        self.hashes = self.column("Q", start, count)
+        start += count * 8
+        self.offsets = self.column("I", start, count + 1)
+        self.blob = start + (count + 1) * 4
+
+    def column(self, code: str, start: int, count: int):
+        size = array(code).itemsize
+        view = memoryview(self.map)[start:start + count * size].cast(code)
+        if sys.byteorder == "big":
+            view = array(code, view)
+            view.byteswap()
+        return view
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, key: str) -> str | None:
+        h = key_hash(key)
+        i = bisect_left(self.hashes, h)
+        if i == self.count or self.hashes[i] != h:
+            return None
+        start = self.blob + self.offsets[i]
+        end = self.blob + self.offsets[i + 1]
+        return self.map[start:end].decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self.hashes, memoryview):
+            self.hashes.release()
+            self.offsets.release()
+        self.map.close()
+        self.file.close()
+
+
+@Component(tags=["strings", "string_manager"])
+class StringManager:
+    """Resolves dialogue keys to text of the current locale.
+
+    Tables are read from `<strings.path>/<locale>.stb` (by default
+    `files/strings`). A key that isn't in the table, or any text when no
+    locale is set, is shown as is, so scenes can use either short keys
+    or the text of the source language as keys. Resolved texts are kept
+    in an LRU cache of `strings.cache` entries.
+    """
+
+    def __init__(self, container: CalliopyContainer) -> None:
+        self.logger = LoggerFactory.get_logger()
+        flags = container.flags if container else {}
+        self.path = Path(flags.get("strings.path", "files/strings"))
+        self.cache_size = int(flags.get("strings.cache", 256))
+        self.table: StringTable | None = None
+        self.locale: str | None = None
+        self.lookup = lru_cache(self.cache_size)(self.get)
+        locale = flags.get("locale")
+        if locale:
+            self.set_locale(locale)
+
+    def set_locale(self, locale: str | None) -> bool:
+        """Switches tables; lines shown from now on use the new locale"""
+        table = None
+        if locale is not None:
+            path = self.path / f"{locale}.stb"
+            try:
+                table = StringTable(path)
+            except (OSError, ValueError) as e:
+                self.logger.error("Couldn't load strings {}", path, error=e)
+                return False
+        if self.table is not None:
+            self.table.close()
+        self.table = table
+        self.locale = locale
+        self.lookup.cache_clear()
+        self.logger.info("Locale set to {}", locale)
+        return True
+
+    def get(self, key: str) -> str:
+        if self.table is None:
+            return key
+        text = self.table.get(key)
+        return key if text is None else text
+
+    def resolve(self, key: str) -> str:
+        if self.table is None:
+            return key
+        return self.lookup(key)
+
+    def close(self) -> None:
+        self.set_locale(None)
+
+
+def _literals(nodes: list[ast.expr]) -> list[str]:
+    return [
+        node.value for node in nodes
+        if isinstance(node, ast.Constant) and isinstance(node.value, str)
+    ]
+
+
+def extract_strings(paths: list[str | Path]) -> dict[str, str]:
+    """Dialogue strings of scene modules and story scripts.
+
+    Collects the string literals passed to `say`, `narrate` and `choice`
+    calls in `.py` files and the lines and options of `.story` scripts,
+    mapped to themselves, as a template for the tables of a locale.
+    """
+    strings = {}
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.py")))
+            files.extend(sorted(path.rglob("*.story")))
+        else:
+            files.append(path)
+    for file in files:
+        if file.suffix == ".story":
+            for op in load_program(file, None).code:
+                if op[0] == OP_SAY:
+                    strings.setdefault(op[2], op[2])
+                elif op[0] == OP_NARRATE:
+                    strings.setdefault(op[1], op[1])
+                elif op[0] == OP_CHOICE:
+                    for option in op[1]:
+                        strings.setdefault(option, option)
+            continue
+        tree = ast.parse(file.read_bytes(), str(file))
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            name = getattr(node.func, "attr", None)
+            if name in ("say", "narrate"):
+                texts = _literals(node.args[-1:])
+            elif name == "choice":
+                texts = _literals(node.args)
+            else:
+                continue
+            for text in texts:
+                strings.setdefault(text, text)
+    return strings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description="Extracts and builds dialogue string tables"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    extract = commands.add_parser(
+            "extract", help="write dialogue strings of sources to JSON"
+    )
+    extract.add_argument("sources", nargs="+")
+    extract.add_argument("-o", "--output", required=True)
+    build = commands.add_parser(
+            "build", help="build a string table from JSON"
+    )
+    build.add_argument("input", help="JSON object of key -> text")
+    build.add_argument("output", help="table, e.g. files/strings/fr.stb")
+    args = parser.parse_args()
+
+    if args.command == "extract":
+        strings = extract_strings(args.sources)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(strings, f, ensure_ascii=False, indent=2)
+        print(f"{len(strings)} strings written to {args.output}")
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            strings = json.load(f)
+        write_table(strings, args.output)
+        print(f"{len(strings)} strings written to {args.output}")
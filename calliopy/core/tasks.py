@@ -0,0 +1,133 @@
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+from calliopy.logger.logger import LoggerFactory
+from calliopy.diagnostics.tracing import tracer
+from calliopy.diagnostics.metrics import metrics
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Generator
+import time
+
+
+@dataclass
+class Task:
+    name: str
+    job: Generator[Any, None, Any]
+    on_done: Callable[[Any], None] | None = None
+    steps: int = 0
+    time_spent: float = 0.0
+
+
+@Component(tags=["tasks", "task_queue"])
+class TaskQueue:
+    """Runs small resumable jobs in the spare time of frames.
+
+    A job is a generator; each `next()` should do a small piece of work.
+    The frontend calls `run()` before ending a frame with the deadline
+    of that frame, and jobs are stepped round-robin until either the
+    deadline or the per-frame budget is reached.
+    """
+
+    def __init__(self, container: CalliopyContainer) -> None:
+        self.logger = LoggerFactory.get_logger()
+        flags = container.flags if container else {}
+        # in milliseconds
+        self.budget = float(flags.get("tasks.budget", 2.0)) / 1000
+        self.tasks: deque[Task] = deque()
+        self.steps = 0
+        self.completed = 0
+        self.deferred_frames = 0
+        self.time_spent = 0.0
+        metrics.gauge(
+                "calliopy_tasks_pending", "Background tasks waiting to run",
+                lambda: len(self.tasks)
+        )
+        self.deferred_counter = metrics.counter(
+                "calliopy_tasks_deferred_frames_total",
+                "Frames that ended with pending background work"
+        )
+
+    def submit(
+            self,
+            job: Generator[Any, None, Any],
+            name: str | None = None,
+            on_done: Callable[[Any], None] | None = None
+    ) -> Task:
+        task = Task(
+                name=name or getattr(job, "__name__", "task"),
+                job=job,
+                on_done=on_done,
+        )
+        self.tasks.append(task)
+        return task
+
+    def cancel(self, task: Task) -> None:
+        if task in self.tasks:
+            self.tasks.remove(task)
+            task.job.close()
+
+    def pending(self) -> int:
+        return len(self.tasks)
+
+    def run(self, deadline: float | None = None) -> int:
+        """Steps jobs until deadline or budget; returns number of steps"""
+        if not self.tasks:
+            return 0
+        start = time.perf_counter()
+        end = start + self.budget
+        if deadline is not None:
+            end = min(end, deadline)
+        if tracer.enabled:
+            tracer.begin("tasks", "tasks", pending=len(self.tasks))
+        steps = 0
+        now = start
+        while self.tasks and now < end:
+            task = self.tasks.popleft()
+            done = self.step(task)
+            steps += 1
+            after = time.perf_counter()
+            task.time_spent += after - now
+            now = after
+            if not done:
+                self.tasks.append(task)
+        self.steps += steps
+        self.time_spent += now - start
+        if self.tasks:
+            self.deferred_frames += 1
+            if metrics.enabled:
+                self.deferred_counter.inc()
+        if tracer.enabled:
+            tracer.end("tasks", "tasks", steps=steps, left=len(self.tasks))
+        return steps
+
+    def step(self, task: Task) -> bool:
+        task.steps += 1
+        try:
+            next(task.job)
+        except StopIteration as stop:
+            self.completed += 1
+            if task.on_done:
+                task.on_done(stop.value)
+            return True
+        except Exception as e:
+            self.logger.error("Task {} failed", task.name, error=e)
+            return True
+        return False
+
+    def on_shutdown(self) -> None:
+        self.logger.debug(
+                "Tasks: {} steps in {:.3f} s, {} completed, "
+                "{} frames deferred work, {} left unfinished",
+                self.steps, self.time_spent, self.completed,
+                self.deferred_frames, len(self.tasks)
+        )
+        for task in self.tasks:
+            task.job.close()
+        self.tasks.clear()
+
+    def run_all(self) -> None:
+        """Finishes all jobs, ignoring budget"""
+        while self.tasks:
+            task = self.tasks.popleft()
+            while not self.step(task):
+                pass
@@ -1,6 +1,8 @@
 from calliopy.core.annotations import Component
+from calliopy.diagnostics.metrics import metrics
 from typing import Callable
 from dataclasses import dataclass
+import math
 
 
 @dataclass
@@ -18,6 +20,9 @@ class Timer:
 class TimeManager:
     def __init__(self) -> None:
         self.timers: list[Timer] = []
+        self.fired = metrics.counter(
+                "calliopy_timers_fired_total", "Timers that ran out"
+        )
 
     def reset_timers(self) -> None:
         self.timers = []
@@ -39,6 +44,8 @@ class TimeManager:
             if timer.timer <= 0 and not timer.permanent:
                 timers[i] = timers[-1]
                 timers.pop()
+                if metrics.enabled:
+                    self.fired.inc()
                 if timer.name == "pause":
                     pause_end = True
                 if timer.after:
@@ -51,6 +58,10 @@ class TimeManager:
                     timer.ontick(timer.name, dt)
         return pause_end, blocking
 
+    def fast_forward(self) -> tuple[bool, bool]:
+        """Runs all non-permanent timers out"""
+        return self.process_timers(math.inf)
+
     def register_timer(self, timer: Timer) -> None:
         self.timers.append(timer)
 
@@ -0,0 +1,421 @@
+from calliopy.core.annotations import Inject
+from calliopy.core.app import CalliopyApp
+from calliopy.core.backlog import Backlog
+from calliopy.core.container import get_type_name
+from calliopy.core.dialogue import ChoiceResult, DialogueManager
+from calliopy.core.state import Stateful
+from calliopy.logger.logger import LoggerFactory, LogLevel
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import time
+import traceback
+
+
+class _Fork(BaseException):
+    """Raised at a choice past the end of the scripted path"""
+
+    def __init__(self, lineno: int, options: tuple) -> None:
+        self.lineno = lineno
+        self.options = options
+
+
+class _LimitReached(BaseException):
+    pass
+
+
+class ExplorerDialogueManager(DialogueManager):
+    """Headless dialogue that takes choices from a path.
+
+    Lines, pauses and transitions return immediately. Choices are taken
+    from `path` in order; the first choice past its end stops the story
+    with `_Fork`, so the explorer can continue with every option.
+    """
+
+    def __init__(self, path: tuple[int, ...], max_beats: int) -> None:
+        super().__init__(None)
+        self.path = path
+        self.max_beats = max_beats
+        self.taken: list[tuple[str, int, int]] = []
+        self.scene_name: str | None = None
+        # number of choices taken before the current scene started
+        self.scene_start = 0
+        self.stateful: list[Stateful] = []
+
+    @Inject()
+    def set_stateful(self, stateful: list[Stateful]) -> None:
+        self.stateful = stateful
+
+    def beat(self) -> None:
+        self.beats += 1
+        if self.beats > self.max_beats:
+            raise _LimitReached()
+
+    def say(self, speaker, text):
+        self.beat()
+        self.speaker = speaker
+        self.current_text = text
+
+    def narrate(self, text):
+        self.beat()
+        self.speaker = None
+        self.current_text = text
+
+    def pause(self, seconds=None, blocking=False):
+        self.beat()
+
+    def transition(self, key):
+        self.beat()
+
+    def choice(self, *options):
+        self.beat()
+        lineno = sys._getframe(1).f_lineno
+        taken = len(self.taken)
+        if taken >= len(self.path):
+            raise _Fork(lineno, options)
+        index = self.path[taken]
+        self.taken.append((self.scene_name, lineno, index))
+        return ChoiceResult(index)
+
+    def state_hash(self, lineno: int, options: tuple) -> str:
+        """Hash of the choice site and the state of the story there.
+
+        Besides `Stateful` components, the choices already taken in the
+        current scene are part of the state, since the scene's local
+        variables can depend on them.
+        """
+        states = {}
+        for comp in self.stateful:
+            if isinstance(comp, Backlog):
+                # history of shown lines, not story state
+                continue
+            states[get_type_name(type(comp))] = comp.save_state()
+        in_scene = tuple(i for _, _, i in self.taken[self.scene_start:])
+        key = (
+            self.scene_name, lineno, tuple(map(str, options)), in_scene,
+            states,
+        )
+        try:
+            data = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            data = repr(key).encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass
+class PathResult:
+    path: tuple[int, ...]
+    # "end", "fork", "error" or "limit"
+    status: str
+    scenes: list[str] = field(default_factory=list)
+    # (scene, line, option index) of every choice made
+    choices: list[tuple[str, int, int]] = field(default_factory=list)
+    beats: int = 0
+    elapsed: float = 0.0
+    # set when status is "fork"
+    site: tuple[str, int] | None = None
+    options: int = 0
+    state: str | None = None
+    error: str | None = None
+    all_scenes: list[str] = field(default_factory=list)
+
+
+def run_path(
+        module_name: str,
+        path: tuple[int, ...],
+        max_beats: int = 10000,
+        flags: dict[str, Any] | None = None,
+        modules: tuple[str, ...] = (),
+) -> PathResult:
+    """Plays the story in a fresh container following path"""
+    start = time.perf_counter()
+    # runs never share flags with the game or each other
+    app = CalliopyApp(
+            module_name, flags={**(flags or {}), "store": ":memory:"}
+    )
+    try:
+        return _play_path(app, path, max_beats, modules, start)
+    finally:
+        app.container.store.close()
+
+
+def _play_path(
+        app: CalliopyApp,
+        path: tuple[int, ...],
+        max_beats: int,
+        modules: tuple[str, ...],
+        start: float,
+) -> PathResult:
+    for name in modules:
+        app.load_module(name)
+    container = app.container
+    dial = ExplorerDialogueManager(path, max_beats)
+    # stands in for the registered DialogueManager
+    comp_data = container.components_by_tag["dial"]
+    comp_data.component = dial
+    comp_data.setters = container.get_setters(ExplorerDialogueManager)
+    container.context.reset()
+    container.run_setters(comp_data, dial)
+    container.post_construction()
+
+    script = container.get_component(None, "script_manager")
+    result = PathResult(
+            path=path, status="end",
+            all_scenes=[s.__name__ for s in script.scenes],
+    )
+    tag = None
+    try:
+        while True:
+            scene, kwargs = script.get_next_scene(tag)
+            if scene is None:
+                break
+            dial.scene_name = scene.__name__
+            dial.scene_start = len(dial.taken)
+            result.scenes.append(scene.__name__)
+            tag = scene(**kwargs)
+    except _Fork as fork:
+        result.status = "fork"
+        result.site = (dial.scene_name, fork.lineno)
+        result.options = len(fork.options)
+        result.state = dial.state_hash(fork.lineno, fork.options)
+        if not fork.options:
+            result.status = "error"
+            result.error = "choice() without options"
+    except _LimitReached:
+        result.status = "limit"
+        result.error = f"no end after {max_beats} beats"
+    except Exception:
+        result.status = "error"
+        result.error = traceback.format_exc()
+    result.choices = dial.taken
+    result.beats = dial.beats
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _init_worker(level: int) -> None:
+    LoggerFactory.get_factory().set_global_level(level)
+
+
+@dataclass
+class ExplorationReport:
+    paths: list[PathResult] = field(default_factory=list)
+    # paths not expanded because an explored path reached the same state
+    merged: int = 0
+    truncated: bool = False
+    all_scenes: list[str] = field(default_factory=list)
+    played: set[str] = field(default_factory=set)
+    # (scene, line) -> (number of options, options taken)
+    sites: dict[tuple[str, int], tuple[int, set[int]]] = field(
+            default_factory=dict
+    )
+    elapsed: float = 0.0
+
+    def add(self, result: PathResult) -> None:
+        self.paths.append(result)
+        if not self.all_scenes:
+            self.all_scenes = result.all_scenes
+        self.played.update(result.scenes)
+        for scene, lineno, index in result.choices:
+            count, taken = self.sites.get((scene, lineno), (0, set()))
+            taken.add(index)
+            self.sites[(scene, lineno)] = (count, taken)
+        if result.site is not None:
+            count, taken = self.sites.get(result.site, (0, set()))
+            self.sites[result.site] = (max(count, result.options), taken)
+
+    @property
+    def ended(self) -> list[PathResult]:
+        return [p for p in self.paths if p.status == "end"]
+
+    @property
+    def dead_ends(self) -> list[PathResult]:
+        return [p for p in self.paths if p.status in ("error", "limit")]
+
+    @property
+    def unplayed(self) -> list[str]:
+        return [s for s in self.all_scenes if s not in self.played]
+
+    def report(self, top: int = 10) -> str:
+        finished = [p for p in self.paths if p.status != "fork"]
+        options = sum(count for count, _ in self.sites.values())
+        taken = sum(len(t) for _, t in self.sites.values())
+        out = [
+            f"Explored {len(self.paths)} runs in {self.elapsed:.3f} s: "
+            f"{len(self.ended)} endings, {len(self.dead_ends)} dead ends, "
+            f"{self.merged} merged states"
+            + (", stopped at path limit" if self.truncated else ""),
+            f"Scenes played: {len(self.played)}/{len(self.all_scenes)}",
+            f"Choice options taken: {taken}/{options} "
+            f"at {len(self.sites)} choices",
+        ]
+        if self.unplayed:
+            out.append("Never played: " + ", ".join(self.unplayed))
+        for result in self.dead_ends:
+            out.append(
+                f"Dead end ({result.status}) on path {list(result.path)} "
+                f"after {' > '.join(result.scenes) or 'start'}:"
+            )
+            out.extend(
+                "  " + line for line in (result.error or "").splitlines()
+            )
+        slowest = sorted(finished, key=lambda p: p.elapsed, reverse=True)
+        if slowest:
+            out.append("Slowest paths:")
+        for result in slowest[:top]:
+            out.append(
+                f"  {result.elapsed * 1000:9.3f} ms {result.beats:6} beats "
+                f"{result.status:5} {list(result.path)}"
+            )
+        return "\n".join(out) + "\n"
+
+    def save(self, path: str = "calliopy_explore.txt") -> Path:
+        path = Path(path)
+        path.write_text(self.report(), encoding="utf-8")
+        return path
+
+
+class StoryExplorer:
+    """Plays every path through a story.
+
+    Each run starts the story in a fresh container and follows a list of
+    choice indices. A run that reaches a choice past its path reports
+    the options and a hash of the story state there (`Stateful`
+    components and choices taken earlier in the scene); if no other run
+    reached the same state, the explorer queues the path extended with
+    every option. Runs are spread over a process pool with `processes`
+    workers (1 runs them in this process). Module level state of the
+    story isn't reset between runs in the same process, and scenes that
+    need the window (textures, GUI) can't run headlessly.
+    """
+
+    def __init__(
+            self,
+            module_name: str,
+            processes: int | None = None,
+            max_beats: int = 10000,
+            max_paths: int = 100000,
+            flags: dict[str, Any] | None = None,
+            modules: tuple[str, ...] = (),
+            log_level: int = LogLevel.ERROR,
+    ) -> None:
+        self.module_name = module_name
+        # modules loaded besides the story, e.g. calliopy.gui
+        self.modules = tuple(modules)
+        self.processes = processes or os.cpu_count() or 1
+        self.max_beats = max_beats
+        self.max_paths = max_paths
+        self.flags = flags or {}
+        self.log_level = log_level
+
+    def explore(self) -> ExplorationReport:
+        report = ExplorationReport()
+        start = time.perf_counter()
+        seen: set[str] = set()
+        pending: list[tuple[int, ...]] = [()]
+        while pending:
+            budget = self.max_paths - len(report.paths)
+            if len(pending) > budget:
+                pending = pending[:budget]
+                report.truncated = True
+            results = self.run_batch(pending)
+            pending = []
+            for result in results:
+                report.add(result)
+                if result.status != "fork":
+                    continue
+                if result.state in seen:
+                    report.merged += 1
+                    continue
+                seen.add(result.state)
+                pending.extend(
+                    result.path + (i,) for i in range(result.options)
+                )
+            if report.truncated:
+                break
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def args(self, path: tuple[int, ...]) -> tuple:
+        return (
+            self.module_name, path, self.max_beats, self.flags, self.modules
+        )
+
+    def run_batch(self, paths: list[tuple[int, ...]]) -> list[PathResult]:
+        if self.processes <= 1:
+            return [run_path(*self.args(path)) for path in paths]
+        results = []
+        crashed = []
+        with self.executor(self.processes) as pool:
+            futures = {
+                pool.submit(run_path, *self.args(path)): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except BrokenProcessPool:
+                    crashed.append(futures[future])
+        # a worker died (e.g. native crash), so all of its pool's runs
+        # failed; rerun them one by one to find the path that crashes
+        for path in crashed:
+            try:
+                with self.executor(1) as pool:
+                    results.append(pool.submit(
+                            run_path, *self.args(path)
+                    ).result())
+            except BrokenProcessPool:
+                results.append(PathResult(
+                        path=path, status="error",
+                        error="worker process crashed",
+                ))
+        # same order as paths, so merged states don't depend on timing
+        order = {path: i for i, path in enumerate(paths)}
+        results.sort(key=lambda result: order[result.path])
+        return results
+
+    def executor(self, processes: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+                processes,
+                initializer=_init_worker,
+                initargs=(self.log_level,),
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description="Plays every path through a story"
+    )
+    parser.add_argument("module", help="story module, e.g. my_game.story")
+    parser.add_argument(
+            "-j", "--processes", type=int, default=None,
+            help="worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+            "-m", "--load", action="append", default=[],
+            help="additional module to load, e.g. calliopy.gui"
+    )
+    parser.add_argument("--max-beats", type=int, default=10000)
+    parser.add_argument("--max-paths", type=int, default=100000)
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    explorer = StoryExplorer(
+            args.module,
+            processes=args.processes,
+            max_beats=args.max_beats,
+            max_paths=args.max_paths,
+            modules=tuple(args.load),
+    )
+    report = explorer.explore()
+    print(report.report(), end="")
+    if args.output:
+        report.save(args.output)
+    sys.exit(1 if report.dead_ends else 0)
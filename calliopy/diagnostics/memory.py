@@ -0,0 +1,186 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+import tracemalloc
+
+
+@dataclass
+class AssetUsage:
+    count: int = 0
+    bytes: int = 0
+
+    def add(self, size: int) -> None:
+        self.count += 1
+        self.bytes += size
+
+
+@dataclass
+class SceneMemory:
+    scene: str
+    heap_bytes: int
+    heap_peak: int
+    assets: dict[str, AssetUsage]
+    # (location, size diff, count diff) against previous snapshot
+    top_diff: list[tuple[str, int, int]] = field(default_factory=list)
+
+
+class MemoryAccountant:
+    """Takes memory snapshots at scene boundaries.
+
+    Each snapshot records the Python heap traced by tracemalloc and an
+    estimate of GPU and audio memory held by loaded textures and sounds.
+    The report shows differences between consecutive scenes, so assets
+    that are loaded and never unloaded stand out.
+    """
+
+    def __init__(self, nframes: int = 1, top: int = 10) -> None:
+        self.enabled = False
+        self.nframes = nframes
+        self.top = top
+        self.records: list[SceneMemory] = []
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.started_tracemalloc = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self.started_tracemalloc = True
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def scene_boundary(self, scene: str, frontend: Any = None) -> SceneMemory:
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ])
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        record = SceneMemory(
+                scene=scene,
+                heap_bytes=current,
+                heap_peak=peak,
+                assets=collect_assets(frontend) if frontend else {},
+        )
+        if self.snapshot is not None:
+            stats = snapshot.compare_to(self.snapshot, "lineno")
+            for stat in stats[:self.top]:
+                if stat.size_diff == 0:
+                    continue
+                frame = stat.traceback[0]
+                record.top_diff.append((
+                    f"{frame.filename}:{frame.lineno}",
+                    stat.size_diff, stat.count_diff
+                ))
+        self.snapshot = snapshot
+        self.records.append(record)
+        return record
+
+    def report(self) -> str:
+        out = []
+        previous: Optional[SceneMemory] = None
+        for record in self.records:
+            line = f"Before {record.scene}: heap {_size(record.heap_bytes)}"
+            line += f" (peak {_size(record.heap_peak)})"
+            if previous:
+                diff = record.heap_bytes - previous.heap_bytes
+                line += f", {_signed_size(diff)} since {previous.scene}"
+            out.append(line)
+            for kind, usage in record.assets.items():
+                asset_line = f"  {kind}: {usage.count} loaded, {_size(usage.bytes)}"
+                old = previous.assets.get(kind) if previous else None
+                if old and (old.bytes != usage.bytes or old.count != usage.count):
+                    asset_line += (
+                        f" ({usage.count - old.count:+d},"
+                        f" {_signed_size(usage.bytes - old.bytes)})"
+                    )
+                out.append(asset_line)
+            for location, size, count in record.top_diff:
+                out.append(f"    {_signed_size(size):>10} {count:+6d} {location}")
+            previous = record
+        return "\n".join(out) + "\n"
+
+    def save(self, path: str = "calliopy_memory.txt") -> Path:
+        path = Path(path)
+        path.write_text(self.report(), encoding="utf-8")
+        return path
+
+
+def texture_bytes(texture: Any) -> int:
+    if not texture or not texture.width:
+        return 0
+    # uncompressed RGBA, mipmaps add about a third
+    size = texture.width * texture.height * 4
+    if texture.mipmaps > 1:
+        size = size * 4 // 3
+    return size
+
+
+def sound_bytes(sound: Any) -> int:
+    if not sound:
+        return 0
+    # raylib keeps sounds as 32-bit float stereo frames
+    return sound.frameCount * 2 * 4
+
+
+def collect_assets(frontend: Any) -> dict[str, AssetUsage]:
+    textures = AssetUsage()
+    chars = getattr(frontend, "chars", None)
+    if chars is not None:
+        for info in list(chars.textures.values()):
+            texture = info.get("texture")
+            if texture:
+                textures.add(texture_bytes(texture))
+
+    background = AssetUsage()
+    bg = getattr(frontend, "bg", None)
+    if bg:
+        background.add(texture_bytes(bg))
+
+    ui_images = AssetUsage()
+    gui = getattr(frontend, "gui", None)
+    for layout in getattr(gui, "layouts", {}).values():
+        if layout.root:
+            _collect_ui_images(layout.root, ui_images)
+
+    sounds = AssetUsage()
+    audio = getattr(frontend, "audio", None)
+    if audio is not None:
+        for sound in list(audio.sound_lib.values()):
+            sounds.add(sound_bytes(sound))
+
+    return {
+        "textures": textures,
+        "background": background,
+        "ui images": ui_images,
+        "sounds": sounds,
+    }
+
+
+def _collect_ui_images(elem: Any, usage: AssetUsage) -> None:
+    texture = getattr(elem, "texture", None)
+    if texture:
+        usage.add(texture_bytes(texture))
+    for child in getattr(elem, "children", []):
+        _collect_ui_images(child, usage)
+
+
+def _size(size: int) -> str:
+    for unit in ["B", "KiB", "MiB"]:
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _signed_size(size: int) -> str:
+    sign = "+" if size >= 0 else "-"
+    return sign + _size(abs(size))
+
+
+memory_accountant = MemoryAccountant()
@@ -0,0 +1,288 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Callable, Iterable, Optional
+from calliopy.diagnostics.memory import texture_bytes
+from abc import ABC, abstractmethod
+import bisect
+import threading
+
+
+LabeledValues = Iterable[tuple[dict[str, str], float]]
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str = "") -> None:
+        self.name = name
+        self.help = help
+
+    @abstractmethod
+    def samples(self) -> list[tuple[str, dict[str, str], float]]:
+        """Returns (sample name, labels, value) of every sample"""
+        pass
+
+    def render(self) -> str:
+        lines = []
+        if self.help:
+            lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = "") -> None:
+        super().__init__(name, help)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def samples(self):
+        return [(self.name, {}, self.value)]
+
+
+class Gauge(Metric):
+    """Gauge that is either set directly or read from a callback.
+
+    Callback may return a single number or (labels, value) pairs.
+    Callbacks are evaluated on the scraping thread, so they should only
+    read state.
+    """
+    kind = "gauge"
+
+    def __init__(
+            self,
+            name: str,
+            help: str = "",
+            fn: Optional[Callable[[], float | LabeledValues]] = None
+    ) -> None:
+        super().__init__(name, help)
+        self.value = 0.0
+        self.fn = fn
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self):
+        if self.fn is None:
+            return [(self.name, {}, self.value)]
+        value = self.fn()
+        if isinstance(value, (int, float)):
+            return [(self.name, {}, value)]
+        return [(self.name, labels, v) for labels, v in value]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    DEFAULT_BUCKETS = (
+        0.001, 0.0025, 0.005, 0.01, 0.0167, 0.025, 0.0333,
+        0.05, 0.1, 0.25, 0.5, 1.0,
+    )
+
+    def __init__(
+            self,
+            name: str,
+            help: str = "",
+            buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help)
+        self.buckets = sorted(buckets)
+        # last slot counts observations above the highest bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        counts = list(self.counts)
+        out = []
+        total = 0
+        for bound, count in zip(self.buckets, counts):
+            total += count
+            out.append((f"{self.name}_bucket", {"le": repr(bound)}, total))
+        total += counts[-1]
+        out.append((f"{self.name}_bucket", {"le": "+Inf"}, total))
+        out.append((f"{self.name}_sum", {}, self.sum))
+        out.append((f"{self.name}_count", {}, total))
+        return out
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in Prometheus text format.
+
+    Frame code should check `metrics.enabled` before updating metrics.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.metrics: dict[str, Metric] = {}
+
+    def _get_or_create(self, cls: type, name: str, *args: Any) -> Any:
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = cls(name, *args)
+            self.metrics[name] = metric
+        if not isinstance(metric, cls):
+            raise Exception(f"Metric {name} already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(
+            self,
+            name: str,
+            help: str = "",
+            fn: Optional[Callable[[], float | LabeledValues]] = None
+    ) -> Gauge:
+        gauge = self._get_or_create(Gauge, name, help)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(
+            self,
+            name: str,
+            help: str = "",
+            buckets: Iterable[float] = Histogram.DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets)
+
+    def render(self) -> str:
+        parts = []
+        for metric in list(self.metrics.values()):
+            try:
+                parts.append(metric.render())
+            except Exception as e:
+                parts.append(f"# {metric.name} failed: {e!r}")
+        return "\n".join(parts) + "\n"
+
+
+class MetricsServer:
+    """Serves registry over HTTP from a daemon thread"""
+
+    def __init__(
+            self,
+            registry: MetricsRegistry,
+            port: int = 9464,
+            host: str = "127.0.0.1"
+    ) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path not in ["/", "/metrics"]:
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header(
+                        "Content-Type", "text/plain; version=0.0.4"
+                )
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(
+                target=self.server.serve_forever,
+                name="calliopy-metrics",
+                daemon=True,
+        )
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+
+
+def register_engine_metrics(registry: MetricsRegistry, container) -> None:
+    """Registers gauges reading state of core components"""
+    anim = container.get_component(None, "anim_manager")
+    timers = container.get_component(None, "time_manager")
+    chars = container.get_component(None, "char_manager")
+    audio = container.get_component(None, "audio_manager")
+    scheduler = container.get_component(None, "scene_scheduler")
+
+    if anim is not None:
+        registry.gauge(
+                "calliopy_animations_active", "Running animations",
+                lambda: len(anim.animations)
+        )
+    if timers is not None:
+        registry.gauge(
+                "calliopy_timers_active", "Registered timers",
+                lambda: len(timers.timers)
+        )
+    if chars is not None:
+        registry.gauge(
+                "calliopy_textures_loaded", "Loaded character textures",
+                lambda: sum(1 for t in list(chars.textures.values())
+                            if t.get("texture"))
+        )
+        registry.gauge(
+                "calliopy_texture_bytes", "Estimated character texture memory",
+                lambda: sum(texture_bytes(t.get("texture"))
+                            for t in list(chars.textures.values()))
+        )
+        registry.gauge(
+                "calliopy_images_visible", "Visible character images",
+                lambda: len(chars.visible)
+        )
+    if audio is not None:
+        registry.gauge(
+                "calliopy_sounds_cached", "Sounds in audio cache",
+                lambda: len(audio.sound_lib)
+        )
+    if scheduler is not None:
+        registry.gauge(
+                "calliopy_current_scene", "Currently running scene",
+                lambda: [({"scene": scheduler.scene_name or ""}, 1)]
+        )
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(
+            f'{k}="{_escape(str(v))}"' for k, v in labels.items()
+    )
+    return "{" + inner + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import CodeType
+from typing import Any, Callable, Optional
+import linecache
+import sys
+import time
+import weakref
+import greenlet
+
+mon = sys.monitoring
+
+
+@dataclass
+class SceneStats:
+    name: str
+    runs: int = 0
+    switches: int = 0
+    cpu_ns: int = 0
+    wall_ns: int = 0
+    wait_ns: int = 0
+    lines: dict[tuple[str, int], int] = field(
+            default_factory=lambda: defaultdict(int)
+    )
+    hits: dict[tuple[str, int], int] = field(
+            default_factory=lambda: defaultdict(int)
+    )
+    last_line: tuple[str, int] | None = None
+
+
+class SceneProfiler:
+    """Attributes CPU time to @Scene functions and their source lines.
+
+    Greenlet switches mark when a scene runs and when it waits for the
+    frontend (input, timers, animations). Lines are timed only inside
+    scene function bodies with sys.monitoring local events, so the frame
+    loop and engine code are not profiled. Time spent in functions
+    called from a scene is attributed to the calling line.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.scenes: dict[str, SceneStats] = {}
+        self.greenlets: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.codes: set[CodeType] = set()
+        self.active: Optional[SceneStats] = None
+        self.enter_wall = 0
+        self.enter_cpu = 0
+        self.last_ts = 0
+        self.suspended: dict[str, int] = {}
+        self.tool_id: Optional[int] = None
+        self._old_trace: Optional[Callable] = None
+
+    def start(self) -> None:
+        if self.enabled:
+            return
+        self.tool_id = self._claim_tool_id()
+        mon.register_callback(self.tool_id, mon.events.LINE, self._on_line)
+        mon.register_callback(
+                self.tool_id, mon.events.PY_RETURN, self._on_return
+        )
+        self._old_trace = greenlet.settrace(self._on_switch)
+        self.enabled = True
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        greenlet.settrace(self._old_trace)
+        self._old_trace = None
+        for code in self.codes:
+            mon.set_local_events(self.tool_id, code, 0)
+        mon.register_callback(self.tool_id, mon.events.LINE, None)
+        mon.register_callback(self.tool_id, mon.events.PY_RETURN, None)
+        mon.free_tool_id(self.tool_id)
+        self.tool_id = None
+        self.codes.clear()
+
+    def _claim_tool_id(self) -> int:
+        for tool_id in [mon.PROFILER_ID, 3, 4, 5]:
+            if mon.get_tool(tool_id) is None:
+                mon.use_tool_id(tool_id, "calliopy-scene-profiler")
+                return tool_id
+        raise Exception("No free sys.monitoring tool id for scene profiler")
+
+    def register_scene(self, g: greenlet.greenlet, scene_func: Any) -> None:
+        name = getattr(scene_func, "__name__", repr(scene_func))
+        stats = self.scenes.get(name)
+        if stats is None:
+            stats = SceneStats(name)
+            self.scenes[name] = stats
+        stats.runs += 1
+        stats.last_line = None
+        self.greenlets[g] = stats
+        code = getattr(scene_func, "__code__", None)
+        if code is not None and code not in self.codes:
+            self.codes.add(code)
+            mon.set_local_events(
+                    self.tool_id, code,
+                    mon.events.LINE | mon.events.PY_RETURN
+            )
+
+    def _on_switch(self, event: str, args: tuple) -> None:
+        origin, target = args
+        now = time.perf_counter_ns()
+        cpu = time.thread_time_ns()
+        stats = self.greenlets.get(origin)
+        if stats is not None:
+            self._leave(stats, now, cpu, origin.dead)
+        stats = self.greenlets.get(target)
+        if stats is not None:
+            self._enter(stats, now, cpu)
+        if self._old_trace is not None:
+            self._old_trace(event, args)
+
+    def _enter(self, stats: SceneStats, now: int, cpu: int) -> None:
+        suspended = self.suspended.pop(stats.name, None)
+        if suspended is not None:
+            stats.wait_ns += now - suspended
+        stats.switches += 1
+        self.active = stats
+        self.enter_wall = now
+        self.enter_cpu = cpu
+        self.last_ts = now
+
+    def _leave(
+            self, stats: SceneStats, now: int, cpu: int, finished: bool
+    ) -> None:
+        stats.cpu_ns += cpu - self.enter_cpu
+        stats.wall_ns += now - self.enter_wall
+        if stats.last_line is not None:
+            stats.lines[stats.last_line] += now - self.last_ts
+        if not finished:
+            self.suspended[stats.name] = now
+        self.active = None
+
+    def _on_line(self, code: CodeType, line: int) -> None:
+        stats = self.active
+        if stats is None:
+            return
+        now = time.perf_counter_ns()
+        if stats.last_line is not None:
+            stats.lines[stats.last_line] += now - self.last_ts
+        stats.last_line = (code.co_filename, line)
+        stats.hits[stats.last_line] += 1
+        self.last_ts = now
+
+    def _on_return(self, code: CodeType, offset: int, retval: Any) -> None:
+        stats = self.active
+        if stats is None:
+            return
+        now = time.perf_counter_ns()
+        if stats.last_line is not None:
+            stats.lines[stats.last_line] += now - self.last_ts
+        stats.last_line = None
+        self.last_ts = now
+
+    def report(self, top: int = 10) -> str:
+        out = []
+        scenes = sorted(
+                self.scenes.values(), key=lambda s: s.cpu_ns, reverse=True
+        )
+        for stats in scenes:
+            out.append(
+                f"Scene {stats.name}: {stats.runs} runs, "
+                f"{stats.switches} resumes, "
+                f"cpu {stats.cpu_ns / 1e6:.3f} ms, "
+                f"in scene {stats.wall_ns / 1e6:.3f} ms, "
+                f"waiting {stats.wait_ns / 1e9:.3f} s"
+            )
+            lines = sorted(
+                    stats.lines.items(), key=lambda i: i[1], reverse=True
+            )
+            total = sum(stats.lines.values()) or 1
+            for (filename, lineno), ns in lines[:top]:
+                source = linecache.getline(filename, lineno).strip()
+                out.append(
+                    f"  {ns / 1e6:9.3f} ms {100 * ns / total:5.1f}% "
+                    f"{stats.hits[(filename, lineno)]:6}x "
+                    f"{Path(filename).name}:{lineno}  {source}"
+                )
+        return "\n".join(out) + "\n"
+
+    def save(self, path: str = "calliopy_profile.txt") -> Path:
+        path = Path(path)
+        path.write_text(self.report(), encoding="utf-8")
+        return path
+
+
+scene_profiler = SceneProfiler()
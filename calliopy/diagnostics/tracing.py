@@ -0,0 +1,94 @@
+from typing import Any, Optional
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+
+class Tracer:
+    """Collects begin/end spans and instant events in memory.
+
+    Events are written as Chrome trace-event JSON, which can be opened
+    in chrome://tracing or Perfetto. Call sites are expected to check
+    `tracer.enabled` before calling any method, so disabled tracing
+    costs a single attribute check; events added while disabled are
+    ignored. Spans around code that can raise should end in `finally`,
+    so the export stays balanced.
+    """
+
+    def __init__(self, max_events: int = 1_000_000) -> None:
+        self.enabled = False
+        self.max_events = max_events
+        self.events: list[tuple] = []
+        self.dropped = 0
+        self.path: Optional[str] = None
+        self.pid = os.getpid()
+        self.start_ns = time.perf_counter_ns()
+
+    def start(self, path: Optional[str] = None) -> None:
+        self.events = []
+        self.dropped = 0
+        self.path = path
+        self.start_ns = time.perf_counter_ns()
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    def _add(self, phase: str, name: str, cat: str, args: Any) -> None:
+        if not self.enabled:
+            return
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        self.events.append((
+            phase, name, cat,
+            time.perf_counter_ns(), threading.get_ident(), args
+        ))
+
+    def begin(self, name: str, cat: str = "calliopy", **args: Any) -> None:
+        self._add("B", name, cat, args)
+
+    def end(self, name: str = "", cat: str = "calliopy", **args: Any) -> None:
+        self._add("E", name, cat, args)
+
+    def instant(self, name: str, cat: str = "calliopy", **args: Any) -> None:
+        self._add("i", name, cat, args)
+
+    def to_json(self) -> dict:
+        events = []
+        for phase, name, cat, ts, tid, args in self.events:
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": phase,
+                "ts": (ts - self.start_ns) / 1000,
+                "pid": self.pid,
+                "tid": tid,
+            }
+            if phase == "i":
+                event["s"] = "t"
+            if args:
+                event["args"] = {k: _jsonable(v) for k, v in args.items()}
+            events.append(event)
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped": self.dropped},
+        }
+
+    def save(self, path: Optional[str] = None) -> Path:
+        path = Path(path or self.path or "calliopy_trace.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f)
+        return path
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+tracer = Tracer()
@@ -1,9 +1,11 @@
 from calliopy.core.annotations import Scene, Component
 from calliopy.core.app import CalliopyApp
+from calliopy.core.state import Stateful, StoryState
+from calliopy.core.persistent import PersistentDict
 
 
 @Component()
-class TimeOfDay:
+class TimeOfDay(StoryState):
     def __init__(self):
         self.is_day = True
 
@@ -15,21 +17,27 @@ class TimeOfDay:
 
 
 @Component()
-class Inventory:
+class Inventory(StoryState):
     def __init__(self):
-        self.items = []
+        self.items = ()
 
     def add(self, item: str):
-        self.items.append(item)
+        self.items += (item,)
 
     def has(self, item: str):
         return item in self.items
 
 
 @Component()
-class Characters:
+class Characters(Stateful):
     def __init__(self):
-        self.mood = {"Alice": "cheerful", "Bob": "grumpy"}
+        self.mood = PersistentDict({"Alice": "cheerful", "Bob": "grumpy"})
+
+    def save_state(self):
+        return self.mood.snapshot()
+
+    def load_state(self, state):
+        self.mood.restore(state)
 
 
 @Component(tags="charsd")
@@ -0,0 +1,65 @@
+from calliopy.core.annotations import Scene, Component
+from calliopy.core.app import CalliopyApp
+from calliopy.gui.annotations import UIAction
+from calliopy.gui.ui import ListProvider
+from calliopy.gui.ui_drawable import UIComponent
+from calliopy.logger.logger import LoggerFactory
+from dataclasses import dataclass
+
+logger = LoggerFactory.get_logger(for_cls="example7")
+
+
+@Component(tags="saves")
+class SaveSlots(ListProvider):
+    name = "saves"
+
+    def __init__(self):
+        self.slots = [f"Save #{i}" for i in range(10000)]
+        self.selected: int | None = None
+
+    def count(self) -> int:
+        return len(self.slots)
+
+    def bind(self, row, index: int) -> None:
+        row.text = self.slots[index]
+
+    def select(self, index: int) -> None:
+        self.selected = index
+
+
+@UIAction(name="load_save")
+def load_save_action(saves, gui):
+    if saves.selected is None:
+        # nothing selected yet, keep the menu open
+        return
+    logger.info("Loading {}", saves.slots[saves.selected])
+    gui.kill_lock()
+    gui.hide()
+
+
+@UIAction(name="exit")
+def exit_action(frontend):
+    frontend.close()
+
+
+@Component()
+@dataclass
+class Menu(UIComponent):
+    name = "menu"
+    x = 250
+    y = 100
+    width = 300
+    height = 400
+    layout_file = "files/list.ui"
+    style_file = "files/style.css"
+
+
+@Scene()
+def test_scene(dial):
+    dial.narrate("Save loaded")
+
+
+if __name__ == "__main__":
+    app = CalliopyApp()
+    app.load_module("calliopy.gui")
+    app.run()
@@ -0,0 +1,39 @@
+from calliopy.core.annotations import Component, Inject
+from calliopy.core.backlog import Backlog, EntryKind
+from calliopy.core.strings import StringManager
+from calliopy.gui.ui import ListProvider
+
+
+@Component(tags=["backlog_provider"])
+class BacklogProvider(ListProvider):
+    """Shows the backlog in `<list provider="backlog">`.
+
+    The list view only binds visible rows, and each of them reads a
+    single entry, so scrolling through a long backlog stays cheap.
+    Texts are resolved to the current locale when a row is bound.
+    """
+    name = "backlog"
+
+    def __init__(self, backlog: Backlog) -> None:
+        self.backlog = backlog
+        self.strings: StringManager | None = None
+
+    @Inject()
+    def set_strings(self, string_manager: StringManager) -> None:
+        self.strings = string_manager
+
+    def count(self) -> int:
+        # dropped entries are not shown
+        return len(self.backlog) - self.backlog.first
+
+    def bind(self, row, index: int) -> None:
+        entry = self.backlog[self.backlog.first + index]
+        text = entry.text
+        if self.strings is not None:
+            text = self.strings.resolve(text)
+        if entry.kind == EntryKind.LINE:
+            row.text = f"{entry.speaker}: {text}"
+        elif entry.kind == EntryKind.CHOICE:
+            row.text = f"> {text}"
+        else:
+            row.text = text
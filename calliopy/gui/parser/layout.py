@@ -82,8 +82,10 @@ class UIParser:
                         classes = classes.split()
                     src = attrs.get('src')
                     action = attrs.get('onclick')
+                    provider = attrs.get('provider')
                     elem = _create_element(
-                            tag, style, classes, src, dispatcher, action
+                            tag, style, classes, src, dispatcher, action,
+                            provider
                     )
                     stack.append(elem)
             else:
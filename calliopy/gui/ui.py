@@ -2,12 +2,14 @@ from calliopy.core.raylib import (
         Rectangle, Vector2,
         draw_rectangle_rec,
         draw_text,
-        get_mouse_position, check_collision_point_rec,
-        is_mouse_button_pressed,
+        begin_scissor_mode, end_scissor_mode,
         MOUSE_BUTTON_LEFT, RAYWHITE,
         load_texture, unload_texture, draw_texture_ex,
 )
+from calliopy.core.input import InputSnapshot
 from calliopy.gui.parser.css import CSSParser
+from abc import ABC, abstractmethod
+import math
 
 
 class Style:
@@ -88,10 +90,9 @@ class Element:
         self.fg = _parse_color(fg) if fg else None
         self.padding = int(props.get("padding", "4"))
 
-    def update(self):
-        mouse = get_mouse_position()
+    def update(self, inp: InputSnapshot):
         old_hover = self.hover
-        self.hover = check_collision_point_rec(mouse, self.rect)
+        self.hover = inp.mouse_in(self.rect)
         if self.hover != old_hover:
             self.update_style()
 
@@ -125,10 +126,10 @@ class VBox(Element):
         for child in self.children:
             child.draw()
 
-    def update(self):
+    def update(self, inp: InputSnapshot):
         for child in self.children:
             if hasattr(child, "update"):
-                child.update()
+                child.update(inp)
 
 
 class HBox(Element):
@@ -149,13 +150,198 @@ class HBox(Element):
         for child in self.children:
             child.draw()
 
-    def update(self):
+    def update(self, inp: InputSnapshot):
         for child in self.children:
             if hasattr(child, "update"):
-                child.update()
+                child.update(inp)
+
+
+class ListView(Element):
+    """Scrollable list that only keeps rows for the visible window.
+
+    Rows are created once by the provider and rebound to new indices
+    while scrolling, so the number of elements doesn't depend on the
+    size of the underlying data.
+    """
+
+    def __init__(
+            self, style, classes=None, dispatcher=None,
+            provider=None, action=None
+    ):
+        super().__init__("list", style, classes)
+        self.dispatcher = dispatcher
+        self.provider_name = provider
+        self.provider: ListProvider | None = None
+        self.callback = action
+        self.default_bg = None
+        self.row_height = 30
+        self.spacing = 0
+        self.overscan = 2
+        self.scroll = 0.0
+        self.count = 0
+        self.first = 0
+        # index bound to each row from the pool, -1 for unused rows
+        self.bound: list[int] = []
+
+    @property
+    def stride(self) -> int:
+        return self.row_height + self.spacing
+
+    def resolve_provider(self) -> None:
+        if self.provider is not None or not self.provider_name:
+            return
+        if self.dispatcher and hasattr(self.dispatcher, "get_provider"):
+            self.provider = self.dispatcher.get_provider(self.provider_name)
+
+    def compute_layout(self, x, y, available_w, available_h):
+        props = self.style.resolve(self)
+        w = int(props.get("width", str(int(available_w))))
+        h = int(props.get("height", str(int(available_h))))
+        self.rect = Rectangle(x, y, w, h)
+        self.row_height = max(1, int(props.get("row-height", "30")))
+        self.spacing = int(props.get("spacing", "0"))
+        self.overscan = int(props.get("overscan", "2"))
+        self.update_style()
+
+        self.resolve_provider()
+        pool_size = math.ceil(h / self.stride) + 1 + 2 * self.overscan
+        if len(self.children) != pool_size:
+            self.children = [self.create_row() for _ in range(pool_size)]
+            self.bound = [-1] * pool_size
+        self.layout_rows(force=True)
+
+    def create_row(self) -> Element:
+        if not self.provider:
+            return ListRow(self.style, dispatcher=self.dispatcher)
+        row = self.provider.create_row(
+                self.style, self.dispatcher, self.callback
+        )
+        row.provider = self.provider
+        return row
+
+    def max_scroll(self) -> float:
+        return max(0.0, self.count * self.stride - self.rect.height)
+
+    def scroll_to(self, index: int) -> None:
+        self.scroll = float(index * self.stride)
+        self.layout_rows()
+
+    def refresh(self) -> None:
+        self.bound = [-1] * len(self.children)
+        self.layout_rows(force=True)
+
+    def layout_rows(self, force: bool = False) -> None:
+        if not self.children:
+            return
+        self.count = self.provider.count() if self.provider else 0
+        self.scroll = min(max(self.scroll, 0.0), self.max_scroll())
+        first = max(0, int(self.scroll // self.stride) - self.overscan)
+        if first != self.first or force:
+            self.first = first
+            self.bind_rows()
+        self.position_rows()
+
+    def bind_rows(self) -> None:
+        pool_size = len(self.children)
+        last = min(self.count, self.first + pool_size)
+        for index in range(self.first, last):
+            slot = index % pool_size
+            if self.bound[slot] == index:
+                continue
+            row = self.children[slot]
+            self.bound[slot] = index
+            row.index = index
+            self.provider.bind(row, index)
+        for index in range(last, self.first + pool_size):
+            self.bound[index % pool_size] = -1
+
+    def position_rows(self) -> None:
+        for row, index in self.visible_rows():
+            row_y = self.rect.y + index * self.stride - self.scroll
+            row.compute_layout(
+                    self.rect.x, row_y,
+                    self.rect.width, self.row_height
+            )
+
+    def visible_rows(self):
+        for row, index in zip(self.children, self.bound):
+            if index >= 0:
+                yield row, index
+
+    def draw(self):
+        super().draw()
+        begin_scissor_mode(
+                int(self.rect.x), int(self.rect.y),
+                int(self.rect.width), int(self.rect.height)
+        )
+        for row, _ in self.visible_rows():
+            row.draw()
+        end_scissor_mode()
+
+    def update(self, inp: InputSnapshot):
+        super().update(inp)
+        old_scroll = self.scroll
+        if self.hover:
+            if inp.wheel:
+                self.scroll -= inp.wheel * self.stride
+        count = self.provider.count() if self.provider else 0
+        if count != self.count:
+            self.layout_rows(force=True)
+        elif self.scroll != old_scroll:
+            self.layout_rows()
+        if not self.hover:
+            return
+        for row, _ in self.visible_rows():
+            row.update(inp)
+
+
+class ListProvider(ABC):
+    """Data source for `<list provider="name">` elements"""
+    name: str = "list"
+
+    @abstractmethod
+    def count(self) -> int:
+        """Returns number of rows"""
+        pass
+
+    @abstractmethod
+    def bind(self, row: Element, index: int) -> None:
+        """Fills recycled row with data for given index"""
+        pass
+
+    def create_row(self, style, dispatcher=None, action=None) -> Element:
+        return ListRow(style, dispatcher=dispatcher, callback=action)
+
+    def select(self, index: int) -> None:
+        """Called when row with given index is clicked"""
+        pass
 
 
 # -------- ELEMS -------- #
+class ListRow(Element):
+    def __init__(self, style, classes=None, dispatcher=None, callback=None):
+        super().__init__("row", style, classes)
+        self.dispatcher = dispatcher
+        self.callback = callback
+        self.provider: ListProvider | None = None
+        self.index = -1
+
+    def compute_layout(self, x, y, available_w, available_h):
+        self.rect = Rectangle(x, y, available_w, available_h)
+        self.update_style()
+
+    def update(self, inp: InputSnapshot):
+        super().update(inp)
+        if not self.hover:
+            return
+        if not inp.is_mouse_button_pressed(MOUSE_BUTTON_LEFT):
+            return
+        if self.provider:
+            self.provider.select(self.index)
+        if self.callback and self.dispatcher:
+            self.dispatcher.dispatch_event(self.callback, self, self.index)
+
+
 class Button(Element):
     def __init__(
             self, text, style, classes=None, dispatcher=None, callback=None
@@ -166,9 +352,9 @@ class Button(Element):
         self.dispatcher = dispatcher
         self.default_bg = "#555"
 
-    def update(self):
-        super().update()
-        if self.hover and is_mouse_button_pressed(MOUSE_BUTTON_LEFT):
+    def update(self, inp: InputSnapshot):
+        super().update(inp)
+        if self.hover and inp.is_mouse_button_pressed(MOUSE_BUTTON_LEFT):
             if self.dispatcher:
                 self.dispatcher.dispatch_event(
                         self.callback, self
@@ -236,7 +422,8 @@ def _parse_color(hexstr: str) -> int:
 
 
 def _create_element(
-        tag, style, classes, src=None, dispatcher=None, action=None
+        tag, style, classes, src=None, dispatcher=None, action=None,
+        provider=None
 ):
     if tag == "vbox":
         return VBox(style)
@@ -246,6 +433,8 @@ def _create_element(
         return Button("", style, classes, dispatcher, action)
     elif tag == "image":
         return Image(style, classes, src)
+    elif tag == "list":
+        return ListView(style, classes, dispatcher, provider, action)
     return Element(tag, style, classes)
 
 
@@ -255,6 +444,7 @@ if __name__ == "__main__":
         clear_background, set_target_fps, window_should_close,
         BLACK
     )
+    from calliopy.core.input import poll_input
     from calliopy.gui.parser.layout import UIParser
 
     def load_file(path):
@@ -285,7 +475,7 @@ if __name__ == "__main__":
     root.compute_layout(300, 150, 200, 400)
 
     while not window_should_close() and not dispatcher.exit:
-        root.update()
+        root.update(poll_input())
         begin_drawing()
         clear_background(BLACK)
         root.draw()
@@ -2,8 +2,10 @@ from calliopy.logger.logger import LoggerFactory
 from calliopy.core.annotations import Component, Inject
 from calliopy.core.frontend import DrawableComponent
 from calliopy.core.timer import TimeManager, Timer
+from calliopy.core.input import InputManager
 from calliopy.gui.ui import Element, Style, Image
 from calliopy.gui.parser.layout import UIParser
+from calliopy.diagnostics.tracing import tracer
 from dataclasses import is_dataclass, fields
 
 
@@ -105,6 +107,7 @@ class UIDrawable(DrawableComponent):
             self,
             gui_manager,
             time_manager: TimeManager,
+            input_manager: InputManager,
     ):
         self.logger = LoggerFactory.get_logger()
         self.layouts: dict[str, UIComponent] = {}
@@ -112,6 +115,7 @@ class UIDrawable(DrawableComponent):
         self._show = False
         self.dispatcher = gui_manager
         self.timers = time_manager
+        self.input = input_manager
         self.lock: Timer | None = None
 
     @Inject()
@@ -135,7 +139,7 @@ class UIDrawable(DrawableComponent):
 
     def update(self, dt: float) -> None:
         if self.component:
-            self.component.root.update()
+            self.component.root.update(self.input.snapshot)
 
     def is_active(self) -> bool:
         return self.component is not None and self._show
@@ -174,6 +178,15 @@ class UIDrawable(DrawableComponent):
         self.layouts[view] = layout
 
     def init_layout(self, layout: UIComponent) -> None:
+        if tracer.enabled:
+            tracer.begin("init_layout", "gui", layout=layout.name)
+        try:
+            self.do_init_layout(layout)
+        finally:
+            if tracer.enabled:
+                tracer.end("init_layout", "gui")
+
+    def do_init_layout(self, layout: UIComponent) -> None:
         css = self.load_file(layout.style_file)
         if css is None:
             return
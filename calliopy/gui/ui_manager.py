@@ -1,6 +1,7 @@
 from calliopy.logger.logger import LoggerFactory
 from calliopy.core.container import CalliopyContainer
-from calliopy.core.annotations import Component
+from calliopy.core.annotations import Component, Inject
+from calliopy.gui.ui import ListProvider
 
 
 @Component(tags=["ui_manager", "gui_manager"])
@@ -9,6 +10,7 @@ class UIManager:
         self.container = container
         self.logger = LoggerFactory.get_logger()
         self.actions = {}
+        self.providers: dict[str, ListProvider] = {}
         self.init_actions()
         self.logger.debug("Registered actions", actions=self.actions)
 
@@ -19,8 +21,21 @@ class UIManager:
             dec = self.container.get_decorators(action)['UIAction']
             self.actions[dec['name']] = action
 
+    @Inject()
+    def set_providers(self, providers: list[ListProvider]) -> None:
+        for provider in providers:
+            if provider.name in self.providers:
+                self.logger.warn(f"Overwriting list provider {provider.name}")
+            self.providers[provider.name] = provider
+
+    def get_provider(self, name: str) -> ListProvider | None:
+        provider = self.providers.get(name)
+        if not provider:
+            self.logger.warn(f"Tried to use nonexisting {name} list provider")
+        return provider
+
     def dispatch_event(self, name: str, caller=None, event=None):
-        self.logger.debug(f"Dispatching event {name}")
+        self.logger.debug("Dispatching event {}", name)
         action = self.actions.get(name)
         if not action:
             self.logger.warn(
@@ -30,7 +45,7 @@ class UIManager:
             return
         func, kwargs = self.container.get_function(action)
         self.logger.debug(
-                f"Got function for event {name}",
+                "Got function for event {}", name,
                 function=func, arguments=kwargs
         )
         func(**kwargs)
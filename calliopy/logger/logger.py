@@ -5,7 +5,30 @@ from typing import Callable, Dict, TextIO
 import functools
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
+from enum import IntEnum
+from fnmatch import fnmatchcase
+import atexit
+import queue
 import sys
+import threading
+
+
+class LogLevel(IntEnum):
+    DEBUG = 10
+    LOG = 15
+    INFO = 20
+    WARN = 30
+    ERROR = 40
+    OFF = 100
+
+
+# plain ints for the hot path, comparing against enum members is slower
+_LOG = int(LogLevel.LOG)
+_DEBUG = int(LogLevel.DEBUG)
+_INFO = int(LogLevel.INFO)
+_WARN = int(LogLevel.WARN)
+_ERROR = int(LogLevel.ERROR)
+_OFF = int(LogLevel.OFF)
 
 
 @dataclass
@@ -15,10 +38,34 @@ class LogObject:
     class_source: Optional[str] = None
     method_source: Optional[str] = None
     line_source: Optional[int] = None
-    text: str = ""
-    text_args: Dict = field(default_factory=dict)
+    text: Any = ""
+    text_args: tuple = ()
     context: Dict = field(default_factory=dict)
 
+    @property
+    def message(self) -> str:
+        return format_message(self.text, self.text_args)
+
+
+def format_message(text: Any, args: tuple) -> str:
+    """Renders log text with its arguments.
+
+    Text can be a `%`-style or `{}`-style template. Arguments that don't
+    fit the template are appended, separated by spaces.
+    """
+    if not isinstance(text, str):
+        text = str(text)
+    if not args:
+        return text
+    try:
+        if "%" in text:
+            return text % args
+        if "{" in text:
+            return text.format(*args)
+    except (TypeError, ValueError, IndexError, KeyError):
+        pass
+    return " ".join([text, *(str(arg) for arg in args)])
+
 
 class LogPrinter(ABC):
     @abstractmethod
@@ -26,31 +73,14 @@ class LogPrinter(ABC):
         """Prints log"""
         pass
 
+    def print_batch(self, objs: list[LogObject]) -> None:
+        """Prints several logs at once"""
+        for obj in objs:
+            self.print(obj)
 
-def with_frame(fn: Callable) -> Callable:
-    @functools.wraps(fn)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
-        self_param = args[0]
-        if self_param.disabled:
-            return
-        frame = inspect.currentframe()
-        if not frame:
-            return
-        frame = frame.f_back
-        if not frame:
-            return
-        try:
-            for_method = frame.f_code.co_name
-            for_line = frame.f_lineno
-            return fn(
-                    *args,
-                    for_method=for_method,
-                    for_line=for_line,
-                    **kwargs
-            )
-        finally:
-            del frame
-    return wrapper
+    def close(self) -> None:
+        """Flushes pending logs and releases resources"""
+        pass
 
 
 def with_caller(fn: Callable) -> Callable:
@@ -92,6 +122,7 @@ class Logger:
         self_name: str = "self",
         for_cls: Optional[Union[Type, str]] = None,
         disabled: bool = False,
+        level: int = LogLevel.DEBUG,
     ) -> None:
         if for_cls is not None:
             if isinstance(for_cls, str):
@@ -100,84 +131,82 @@ class Logger:
                 self.caller = f"{for_cls.__module__}.{for_cls.__name__}"
         else:
             self.caller = "<unknown>"
-        self.disabled = disabled
+        self._disabled = disabled
+        self._level = int(level)
+        # minimal level that passes; every log method checks only this
+        self.threshold = _OFF if disabled else self._level
         self.printer = printer
 
+    @property
+    def disabled(self) -> bool:
+        return self._disabled
+
+    @disabled.setter
+    def disabled(self, value: bool) -> None:
+        self._disabled = value
+        self._update_threshold()
+
+    @property
+    def level(self) -> int:
+        return self._level
+
+    @level.setter
+    def level(self, value: int) -> None:
+        self._level = int(value)
+        self._update_threshold()
+
+    def _update_threshold(self) -> None:
+        self.threshold = _OFF if self._disabled else self._level
+
+    def is_enabled_for(self, level: int) -> bool:
+        return level >= self.threshold
+
     def _log(
         self,
-        level: str,
+        level: LogLevel,
         text: str,
         args: Any,
-        for_method: Optional[str],
-        for_line: Optional[int],
-        **context: Any
+        context: Dict,
     ) -> None:
+        # caller of the public log method is two frames up
+        frame = sys._getframe(2)
         logObj = LogObject(
                 timestamp=datetime.datetime.now(),
-                log_level=level,
+                log_level=level.name,
                 class_source=self.caller,
-                method_source=for_method,
-                line_source=for_line,
+                method_source=frame.f_code.co_name,
+                line_source=frame.f_lineno,
                 text=text,
                 text_args=args,
                 context=context,
         )
+        del frame
         self.printer.print(logObj)
 
-    @with_frame
-    def log(
-            self,
-            text: str,
-            *args: Any,
-            for_method: Optional[str] = None,
-            for_line: Optional[int] = None,
-            **context: Any
-    ) -> None:
-        self._log("LOG", text, args, for_method, for_line, **context)
+    def log(self, text: str, *args: Any, **context: Any) -> None:
+        if self.threshold > _LOG:
+            return
+        self._log(LogLevel.LOG, text, args, context)
 
-    @with_frame
-    def debug(
-            self,
-            text: str,
-            *args: Any,
-            for_method: Optional[str] = None,
-            for_line: Optional[int] = None,
-            **context: Any
-    ) -> None:
-        self._log("DEBUG", text, args, for_method, for_line, **context)
+    def debug(self, text: str, *args: Any, **context: Any) -> None:
+        if self.threshold > _DEBUG:
+            return
+        self._log(LogLevel.DEBUG, text, args, context)
 
-    @with_frame
-    def info(
-            self,
-            text: str,
-            *args: Any,
-            for_method: Optional[str] = None,
-            for_line: Optional[int] = None,
-            **context: Any
-    ) -> None:
-        self._log("INFO", text, args, for_method, for_line, **context)
+    def info(self, text: str, *args: Any, **context: Any) -> None:
+        if self.threshold > _INFO:
+            return
+        self._log(LogLevel.INFO, text, args, context)
 
-    @with_frame
-    def warn(
-            self,
-            text: str,
-            *args: Any,
-            for_method: Optional[str] = None,
-            for_line: Optional[int] = None,
-            **context: Any
-    ) -> None:
-        self._log("WARN", text, args, for_method, for_line, **context)
+    def warn(self, text: str, *args: Any, **context: Any) -> None:
+        if self.threshold > _WARN:
+            return
+        self._log(LogLevel.WARN, text, args, context)
 
-    @with_frame
-    def error(
-            self,
-            text: str,
-            *args: Any,
-            for_method: Optional[str] = None,
-            for_line: Optional[int] = None,
-            **context: Any
-    ) -> None:
-        self._log("ERROR", text, args, for_method, for_line, **context)
+    def error(self, text: str, *args: Any, **context: Any) -> None:
+        if self.threshold > _ERROR:
+            return
+        self._log(LogLevel.ERROR, text, args, context)
 
 
 class LoggerFactory:
@@ -185,10 +214,10 @@ class LoggerFactory:
 
     def __init__(self) -> None:
         self.loggers: dict[str, Logger] = {}
-        self.disabled: bool = False
+        self.level: int = LogLevel.DEBUG
         self.printer: Optional[LogPrinter] = None
-        self.whitelist: set[str] = set()
-        self.blacklist: set[str] = set()
+        # (glob pattern, level) pairs, the last matching pattern wins
+        self.rules: list[tuple[str, int]] = []
 
     @classmethod
     @with_caller
@@ -202,23 +231,14 @@ class LoggerFactory:
         if caller_class is None:
             # TODO: unknown sources
             raise Exception("Couldn't determine caller class")
-        name = ""
-        if isinstance(caller_class, str):
-            name = caller_class
-        else:
-            name = f"{caller_class.__module__}.{caller_class.__name__}"
+        name = _logger_name(caller_class)
         factory = cls.get_factory()
-        disabled = factory.disabled
-        if name in factory.blacklist:
-            disabled = True
-        if name in factory.whitelist:
-            disabled = False
         if name not in factory.loggers:
             factory.loggers[name] = Logger(
                     factory._get_printer(),
                     self_name=self_name,
                     for_cls=caller_class,
-                    disabled=disabled
+                    level=factory.level_for(name),
             )
         return factory.loggers[name]
 
@@ -230,33 +250,52 @@ class LoggerFactory:
         cls._factory = factory
         return factory
 
+    def level_for(self, name: str) -> int:
+        for pattern, level in reversed(self.rules):
+            if fnmatchcase(name, pattern):
+                return level
+        return self.level
+
+    def set_global_level(self, level: int) -> None:
+        self.level = level
+        self._apply_levels()
+
+    def set_level(
+            self,
+            pattern: Union[str, Type[Any]],
+            level: int
+    ) -> None:
+        """Sets level for loggers whose name matches glob pattern"""
+        pattern = _logger_name(pattern)
+        self.rules = [r for r in self.rules if r[0] != pattern]
+        self.rules.append((pattern, level))
+        self._apply_levels()
+
+    def reset_levels(self) -> None:
+        self.rules = []
+        self._apply_levels()
+
+    def _apply_levels(self) -> None:
+        for name, logger in self.loggers.items():
+            logger.level = self.level_for(name)
+
+    @property
+    def disabled(self) -> bool:
+        return self.level >= LogLevel.OFF
+
     def disable_all(self) -> None:
-        self.disabled = True
-        for logger in self.loggers.values():
-            logger.disabled = True
+        self.rules = []
+        self.set_global_level(LogLevel.OFF)
 
     def enable_all(self) -> None:
-        self.disabled = False
-        for logger in self.loggers.values():
-            logger.disabled = False
-
-    def disable_for(self, class_type: Type[Any]) -> None:
-        name = f"{class_type.__module__}.{class_type.__name__}"
-        logger = self.loggers.get(name)
-        if logger:
-            logger.disabled = True
-        self.blacklist.add(name)
-        if name in self.whitelist:
-            self.whitelist.remove(name)
-
-    def enable_for(self, class_type: Type[Any]) -> None:
-        name = f"{class_type.__module__}.{class_type.__name__}"
-        logger = self.loggers.get(name)
-        if logger:
-            logger.disabled = False
-        self.whitelist.add(name)
-        if name in self.blacklist:
-            self.blacklist.remove(name)
+        self.rules = []
+        self.set_global_level(LogLevel.DEBUG)
+
+    def disable_for(self, pattern: Union[str, Type[Any]]) -> None:
+        self.set_level(pattern, LogLevel.OFF)
+
+    def enable_for(self, pattern: Union[str, Type[Any]]) -> None:
+        self.set_level(pattern, LogLevel.DEBUG)
 
     def _get_printer(self) -> LogPrinter:
         if self.printer is None:
@@ -268,9 +307,20 @@ class LoggerFactory:
 
     def set_printer(self, printer: LogPrinter) -> None:
         self.printer = printer
+        for logger in self.loggers.values():
+            logger.printer = printer
+
+    def shutdown(self) -> None:
+        if self.printer is not None:
+            self.printer.close()
+
+
+def _logger_name(source: Union[str, Type[Any]]) -> str:
+    if isinstance(source, str):
+        return source
+    return f"{source.__module__}.{source.__name__}"
 
 
-# TODO: more args for print methods
 class BasicConsolePrinter(LogPrinter):
     COLORS = {
         "LOG": "\033[94m",
@@ -319,6 +369,17 @@ class BasicConsolePrinter(LogPrinter):
         return f"{self.COLORS['LINE']}:{lineno}{self.COLORS['RESET']}"
 
     def print(self, obj: LogObject) -> None:
+        print(self.format(obj), file=self.stream)
+
+    def print_batch(self, objs: list[LogObject]) -> None:
+        if not objs:
+            return
+        lines = [self.format(obj) for obj in objs]
+        lines.append("")
+        self.stream.write("\n".join(lines))
+        self.stream.flush()
+
+    def format(self, obj: LogObject) -> str:
         timestamp = obj.timestamp.strftime("%H:%M:%S")
         ctx_str = ""
         if obj.context is not None and len(obj.context) > 0:
@@ -329,7 +390,87 @@ class BasicConsolePrinter(LogPrinter):
         method = self._format_method(obj.method_source)
         line = self._format_line(obj.line_source)
 
-        print(
-            f"{level} {timestamp} {cls}.{method}{line} - {obj.text}{ctx_str}",
-            file=self.stream
+        return f"{level} {timestamp} {cls}.{method}{line} - {obj.message}{ctx_str}"
+
+
+class QueuedPrinter(LogPrinter):
+    """Moves formatting and writing of logs to a background thread.
+
+    The calling thread only puts LogObjects into a bounded queue. When
+    the queue is full, logs are either dropped (and counted) or the
+    caller blocks until there is space, depending on `block`.
+    """
+
+    def __init__(
+            self,
+            printer: LogPrinter,
+            *,
+            max_size: int = 10000,
+            batch_size: int = 256,
+            block: bool = False,
+    ) -> None:
+        self.printer = printer
+        self.batch_size = batch_size
+        self.block = block
+        self.queue: queue.Queue[LogObject | None] = queue.Queue(max_size)
+        self.dropped = 0
+        self.written = 0
+        self.closed = False
+        self.thread = threading.Thread(
+                target=self._worker,
+                name="calliopy-log-printer",
+                daemon=True,
         )
+        self.thread.start()
+        atexit.register(self.close)
+
+    def print(self, obj: LogObject) -> None:
+        if self.closed:
+            self.printer.print(obj)
+            return
+        if self.block:
+            self.queue.put(obj)
+            return
+        try:
+            self.queue.put_nowait(obj)
+        except queue.Full:
+            self.dropped += 1
+
+    def _worker(self) -> None:
+        running = True
+        while running:
+            batch = []
+            item = self.queue.get()
+            try:
+                while True:
+                    if item is None:
+                        running = False
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                self.printer.print_batch(batch)
+                self.written += len(batch)
+            except Exception as e:
+                print(f"Log printer failed: {e!r}", file=sys.stderr)
+            finally:
+                for _ in range(len(batch) + (0 if running else 1)):
+                    self.queue.task_done()
+
+    def flush(self) -> None:
+        """Waits until all queued logs are written"""
+        if self.thread.is_alive():
+            self.queue.join()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        self.printer.close()
+        atexit.unregister(self.close)
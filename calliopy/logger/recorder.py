@@ -0,0 +1,160 @@
+from calliopy.logger.logger import LogPrinter, LogObject, format_message
+from array import array
+from pathlib import Path
+from typing import Any, Iterator, Optional
+import datetime
+import signal
+import sys
+import threading
+import time
+
+
+LEVELS = ["DEBUG", "LOG", "INFO", "WARN", "ERROR"]
+LEVEL_IDS = {name: i for i, name in enumerate(LEVELS)}
+
+
+class FlightRecorderPrinter(LogPrinter):
+    """Keeps the most recent logs in a preallocated in-memory ring buffer.
+
+    Nothing is formatted or written while the game runs. Each record is
+    a level id, interned class and method ids, a line number, a monotonic
+    timestamp and a reference to the message. The buffer is written to
+    a file by `dump()`, which `install()` hooks to uncaught exceptions
+    and to SIGUSR1.
+    """
+
+    def __init__(
+            self,
+            capacity: int = 65536,
+            dump_path: str = "calliopy_flight.log",
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        self.capacity = capacity
+        self.dump_path = dump_path
+        self.levels = array('B', bytes(capacity))
+        self.classes = array('I', [0]) * capacity
+        self.methods = array('I', [0]) * capacity
+        self.lines = array('i', [0]) * capacity
+        self.times = array('q', [0]) * capacity
+        self.messages: list[Any] = [None] * capacity
+        self.strings: list[str] = ["<unknown>"]
+        self.string_ids: dict[str, int] = {"<unknown>": 0}
+        self.count = 0
+        self.start_mono = time.monotonic_ns()
+        self.start_wall = datetime.datetime.now()
+        self._old_excepthook = None
+        self._old_thread_excepthook = None
+        self._old_signal = None
+
+    def _intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        string_id = self.string_ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self.string_ids[value] = string_id
+        return string_id
+
+    def print(self, obj: LogObject) -> None:
+        i = self.count % self.capacity
+        self.levels[i] = LEVEL_IDS.get(obj.log_level, 0)
+        self.classes[i] = self._intern(obj.class_source)
+        self.methods[i] = self._intern(obj.method_source)
+        self.lines[i] = obj.line_source or 0
+        self.times[i] = time.monotonic_ns()
+        self.messages[i] = (obj.text, obj.text_args, obj.context)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    @property
+    def overwritten(self) -> int:
+        return max(0, self.count - self.capacity)
+
+    def clear(self) -> None:
+        self.count = 0
+        self.messages = [None] * self.capacity
+
+    def records(self) -> Iterator[tuple[str, str, str, int, int, Any]]:
+        """Yields stored records from the oldest to the newest"""
+        first = self.overwritten
+        for n in range(first, self.count):
+            i = n % self.capacity
+            yield (
+                LEVELS[self.levels[i]],
+                self.strings[self.classes[i]],
+                self.strings[self.methods[i]],
+                self.lines[i],
+                self.times[i],
+                self.messages[i],
+            )
+
+    def format_record(self, record: tuple) -> str:
+        level, cls, method, line, mono, message = record
+        text, args, context = message
+        wall = self.start_wall + datetime.timedelta(
+                microseconds=(mono - self.start_mono) // 1000
+        )
+        out = f"{wall.strftime('%H:%M:%S.%f')[:-3]} [{level}] "
+        out += f"{cls}.{method}:{line} - {format_message(text, args)}"
+        if context:
+            out += " (" + ", ".join(
+                    f"{k}={v!r}" for k, v in context.items()
+            ) + ")"
+        return out
+
+    def dump(self, path: Optional[str] = None, reason: str = "request") -> Path:
+        """Writes buffered records to file and returns its path"""
+        path = Path(path or self.dump_path)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# calliopy flight recorder dump ({reason})\n")
+            f.write(f"# {len(self)} records, {self.overwritten} overwritten\n")
+            for record in self.records():
+                try:
+                    f.write(self.format_record(record))
+                except Exception as e:
+                    f.write(f"<unprintable record: {e!r}>")
+                f.write("\n")
+        return path
+
+    def install(self, sig: Optional[int] = None) -> None:
+        """Dumps buffer on uncaught exceptions and on given signal"""
+        self._old_excepthook = sys.excepthook
+        self._old_thread_excepthook = threading.excepthook
+        sys.excepthook = self._excepthook
+        threading.excepthook = self._thread_excepthook
+        if sig is None:
+            sig = getattr(signal, "SIGUSR1", None)
+        if sig is not None and threading.current_thread() is threading.main_thread():
+            self._old_signal = (sig, signal.signal(sig, self._on_signal))
+
+    def uninstall(self) -> None:
+        if self._old_excepthook is not None:
+            sys.excepthook = self._old_excepthook
+            self._old_excepthook = None
+        if self._old_thread_excepthook is not None:
+            threading.excepthook = self._old_thread_excepthook
+            self._old_thread_excepthook = None
+        if self._old_signal is not None:
+            sig, handler = self._old_signal
+            signal.signal(sig, handler)
+            self._old_signal = None
+
+    def _excepthook(self, exc_type, exc, tb) -> None:
+        self.dump(reason=f"uncaught {exc_type.__name__}: {exc}")
+        if self._old_excepthook:
+            self._old_excepthook(exc_type, exc, tb)
+
+    def _thread_excepthook(self, args) -> None:
+        self.dump(reason=f"uncaught {args.exc_type.__name__} in thread")
+        if self._old_thread_excepthook:
+            self._old_thread_excepthook(args)
+
+    def _on_signal(self, signum, frame) -> None:
+        self.dump(reason=f"signal {signum}")
+
+    def close(self) -> None:
+        self.uninstall()
@@ -1,10 +1,11 @@
 #include <stdio.h>
 #include <stdarg.h>
 #include <string.h>
+#include <pthread.h>
 
 
 typedef void (*TraceLogCallback)(int, const char *, va_list);
-void SetTraceLogCallback(TraceLogCallback callback); 
+void SetTraceLogCallback(TraceLogCallback callback);
 
 typedef void (*PyTraceCallback)(int level, const char *msg);
 
@@ -24,3 +25,66 @@ void SetPythonTraceCallback(PyTraceCallback cb)
     g_py_callback = cb;
     SetTraceLogCallback(ForwardTrace);
 }
+
+// Buffered forwarding: messages are formatted into a ring buffer
+// and drained from Python once per frame, so raylib never has to
+// call into Python (and take the GIL) while logging.
+
+#define TRACE_MSG_LEN 256
+#define TRACE_CAPACITY 512
+
+typedef struct TraceEntry {
+    int level;
+    char text[TRACE_MSG_LEN];
+} TraceEntry;
+
+static TraceEntry g_entries[TRACE_CAPACITY];
+static unsigned int g_head = 0;    // next entry to drain
+static unsigned int g_count = 0;
+static unsigned long long g_dropped = 0;
+static pthread_mutex_t g_lock = PTHREAD_MUTEX_INITIALIZER;
+
+static void BufferTrace(int level, const char *text, va_list args)
+{
+    char buffer[TRACE_MSG_LEN];
+    vsnprintf(buffer, sizeof(buffer), text, args);
+
+    pthread_mutex_lock(&g_lock);
+    if (g_count == TRACE_CAPACITY) {
+        g_dropped++;
+    } else {
+        TraceEntry *entry = &g_entries[(g_head + g_count) % TRACE_CAPACITY];
+        entry->level = level;
+        memcpy(entry->text, buffer, sizeof(buffer));
+        g_count++;
+    }
+    pthread_mutex_unlock(&g_lock);
+}
+
+void EnableTraceBuffer(void)
+{
+    g_py_callback = NULL;
+    SetTraceLogCallback(BufferTrace);
+}
+
+int DrainTraceLog(TraceEntry *out, int max)
+{
+    int n = 0;
+    pthread_mutex_lock(&g_lock);
+    while (g_count > 0 && n < max) {
+        out[n] = g_entries[g_head];
+        g_head = (g_head + 1) % TRACE_CAPACITY;
+        g_count--;
+        n++;
+    }
+    pthread_mutex_unlock(&g_lock);
+    return n;
+}
+
+unsigned long long GetTraceDropped(void)
+{
+    pthread_mutex_lock(&g_lock);
+    unsigned long long dropped = g_dropped;
+    pthread_mutex_unlock(&g_lock);
+    return dropped;
+}
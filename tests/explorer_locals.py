@@ -0,0 +1,10 @@
+from calliopy.core.annotations import Scene
+
+
+@Scene()
+def gate(dial):
+    first = dial.choice("Take the key", "Leave it")
+    dial.choice("Knock", "Wait")
+    if first.index == 1:
+        raise RuntimeError("No key for the door")
+    dial.narrate("The door opens.")
@@ -0,0 +1,33 @@
+from calliopy.core.annotations import Component, Scene
+from calliopy.core.state import StoryState
+
+
+@Component(tags="purse")
+class Purse(StoryState):
+    def __init__(self):
+        self.coins = 3
+
+
+@Scene()
+def market(dial, purse: Purse):
+    dial.narrate("The market is busy.")
+    dial.choice("Look around", "Wait")
+    c = dial.choice("Buy an apple", "Leave")
+    if c.index == 0:
+        purse.coins -= 1
+        return "cellar"
+    return "end"
+
+
+@Scene(after="market")
+def cellar(dial):
+    c = dial.choice("Open the chest", "Go home", "Wait forever")
+    if c.index == 0:
+        raise RuntimeError("The chest is a mimic")
+    while c.index == 2:
+        dial.narrate("Time passes.")
+
+
+@Scene()
+def end(dial):
+    dial.narrate("THE END")
@@ -0,0 +1,18 @@
+from calliopy.core.annotations import Component, Scene
+from lazy_main import log
+
+
+@Component(tags="lantern")
+class Lantern:
+    def __init__(self):
+        self.lit = True
+
+
+@Scene()
+def cave(lantern: Lantern):
+    log.append(("cave", lantern.lit))
+
+
+@Scene(if_true="not tunnel.closed", repeatable=False)
+def tunnel():
+    log.append("tunnel")
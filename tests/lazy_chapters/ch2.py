@@ -0,0 +1,7 @@
+from calliopy.core.annotations import Scene
+from lazy_main import log
+
+
+@Scene()
+def village():
+    log.append("village")
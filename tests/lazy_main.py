@@ -0,0 +1,9 @@
+from calliopy.core.annotations import Scene
+
+# scenes played by the lazy chapter tests
+log = []
+
+
+@Scene()
+def prologue():
+    log.append("prologue")
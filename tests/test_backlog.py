@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+from calliopy.core.backlog import Backlog, EntryKind, CHUNK_SIZE
+from calliopy.core.dialogue import DialogueManager, SceneScheduler
+from calliopy.gui.backlog import BacklogProvider
+
+
+def make_backlog(**flags):
+    return Backlog(SimpleNamespace(flags=flags))
+
+
+def fill(backlog, n):
+    for i in range(n):
+        if i % 3 == 0:
+            backlog.line(None, f"Narration {i}")
+        elif i % 3 == 1:
+            backlog.line("Alice", f"Line number {i} " + "long " * 20)
+        else:
+            backlog.choice(["Left", "Right"], i % 2)
+
+
+def expected(i):
+    if i % 3 == 0:
+        return (EntryKind.NARRATION, None, f"Narration {i}")
+    if i % 3 == 1:
+        return (EntryKind.LINE, "Alice", f"Line number {i} " + "long " * 20)
+    return (EntryKind.CHOICE, None, ["Left", "Right"][i % 2])
+
+
+def test_entries_and_pages():
+    backlog = make_backlog()
+    fill(backlog, 1000)
+
+    assert len(backlog) == 1000
+    assert tuple(backlog[0]) == expected(0)
+    assert tuple(backlog[-1]) == expected(999)
+    page = backlog.page(510, 20)
+    assert [tuple(e) for e in page] == [expected(i) for i in range(510, 530)]
+    # speakers and choice options are stored once
+    assert backlog.strings.count("Alice") == 1
+    assert backlog.strings.count("Left") == 1
+
+
+def test_byte_cap_drops_oldest_chunks():
+    backlog = make_backlog(**{"backlog.max_bytes": "20000"})
+    fill(backlog, CHUNK_SIZE * 10)
+
+    assert backlog.resident_bytes <= 20000
+    assert backlog.first > 0
+    assert backlog.first % CHUNK_SIZE == 0
+    assert tuple(backlog[backlog.first]) == expected(backlog.first)
+    assert backlog.page(0, 5)[0] == backlog[backlog.first]
+
+
+def test_spill_keeps_all_entries(tmp_path):
+    backlog = make_backlog(**{
+        "backlog.max_bytes": "20000",
+        "backlog.spill": str(tmp_path / "backlog.bin"),
+    })
+    n = CHUNK_SIZE * 10 + 7
+    fill(backlog, n)
+
+    assert backlog.first == 0
+    assert backlog.spilled
+    assert all(tuple(backlog[i]) == expected(i) for i in range(n))
+
+    # truncating into a spilled chunk brings it back into memory
+    backlog.truncate(CHUNK_SIZE + 5)
+    assert len(backlog) == CHUNK_SIZE + 5
+    fill_from = len(backlog)
+    backlog.line("Bob", "After rollback")
+    assert backlog[fill_from].text == "After rollback"
+    assert tuple(backlog[fill_from - 1]) == expected(fill_from - 1)
+    backlog.close()
+
+
+def test_state_truncates_to_saved_count():
+    backlog = make_backlog()
+    fill(backlog, CHUNK_SIZE * 2)
+    state = backlog.save_state()
+    fill(backlog, 10)
+
+    backlog.load_state(state)
+    assert len(backlog) == CHUNK_SIZE * 2
+    backlog.line("Alice", "Next")
+    assert backlog[-1].text == "Next"
+
+
+def test_dialogue_appends_to_backlog():
+    dial = DialogueManager(SceneScheduler())
+    backlog = make_backlog()
+    dial.set_backlog(backlog)
+
+    def scene():
+        dial.say("Alice", "Hi")
+        dial.narrate("Wind blows")
+        dial.choice("Stay", "Go")
+
+    dial.scheduler.run_scene(scene)
+    while not dial.scheduler.current.dead:
+        if dial.options:
+            dial.choice_result = 1
+        dial.scheduler.resume()
+
+    assert [tuple(e) for e in backlog.page(0, 10)] == [
+        (EntryKind.LINE, "Alice", "Hi"),
+        (EntryKind.NARRATION, None, "Wind blows"),
+        (EntryKind.CHOICE, None, "Go"),
+    ]
+
+    provider = BacklogProvider(backlog)
+    row = SimpleNamespace(text="")
+    assert provider.count() == 3
+    provider.bind(row, 0)
+    assert row.text == "Alice: Hi"
@@ -0,0 +1,99 @@
+import sys
+import pytest
+
+from calliopy.core.app import CalliopyApp
+from calliopy.core.chapters import ChapterManager
+from calliopy.core.container import CalliopyContainer
+import lazy_main
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setenv("CALLIOPY_CHAPTERS", "lazy_chapters")
+    monkeypatch.setenv("CALLIOPY_STORE", ":memory:")
+    lazy_main.log.clear()
+    app = CalliopyApp("lazy_main")
+    yield app
+    app.container.store.close()
+    for name in list(sys.modules):
+        if name.startswith("lazy_chapters"):
+            del sys.modules[name]
+
+
+def test_chapters_load_when_entered(app):
+    container = app.container
+    script = container.get_component(None, "script_manager")
+    assert [s.__name__ for s in script.scenes] == [
+        "prologue", "cave", "tunnel", "village"
+    ]
+    assert "lazy_chapters.ch1.scenes" not in sys.modules
+    assert "lantern" not in container.components_by_tag
+
+    played = []
+    tag = None
+    while True:
+        scene, kwargs = script.get_next_scene(tag)
+        if scene is None:
+            break
+        if scene.__name__ == "tunnel":
+            assert "lazy_chapters.ch1.scenes" in sys.modules
+            assert "lantern" in container.components_by_tag
+        played.append(scene.__name__)
+        tag = scene(**kwargs)
+
+    assert played == ["prologue", "cave", "tunnel", "village"]
+    assert lazy_main.log == ["prologue", ("cave", True), "tunnel", "village"]
+    # the first chapter was released when the second one started
+    assert "lazy_chapters.ch1.scenes" not in sys.modules
+    assert "lantern" not in container.components_by_tag
+    assert "lazy_chapters.ch2" in sys.modules
+    chapters = container.get_component(None, "chapter_manager")
+    assert chapters.active == "lazy_chapters.ch2"
+    assert not chapters.chapters["lazy_chapters.ch1"].loaded
+
+
+def test_scene_outside_chapters_keeps_chapter_loaded(app):
+    container = app.container
+    script = container.get_component(None, "script_manager")
+    chapters = container.get_component(None, "chapter_manager")
+    ch1 = chapters.chapters["lazy_chapters.ch1"]
+    loaded = []
+    loader = chapters.loader
+    chapters.loader = lambda name: (loaded.append(name), loader(name))
+
+    script.resolve(ch1.stubs["cave"])
+    # a hub scene of the main module between two scenes of the chapter
+    assert script.resolve(lazy_main.prologue) is lazy_main.prologue
+    assert ch1.loaded
+    script.resolve(ch1.stubs["tunnel"])
+    assert loaded == ["lazy_chapters.ch1"]
+
+    village = chapters.chapters["lazy_chapters.ch2"].stubs["village"]
+    script.resolve(village)
+    assert not ch1.loaded
+    # releasing the chapter keeps its stubs in the scene graph
+    assert container.get_function(ch1.stubs["cave"]) is not None
+    assert loaded == ["lazy_chapters.ch1", "lazy_chapters.ch2"]
+
+
+def test_chapter_with_computed_arguments(tmp_path):
+    path = tmp_path / "ch9.py"
+    path.write_text(
+        "from calliopy.core.annotations import Scene\n"
+        "NEXT = 'end'\n"
+        "@Scene(after=NEXT)\n"
+        "def finale():\n"
+        "    pass\n"
+    )
+    chapters = ChapterManager(CalliopyContainer())
+    assert chapters.add("ch9", path) is None
+    assert chapters.chapters == {}
+
+    # checking a computed condition would import the chapter
+    path.write_text(
+        "from calliopy.core.annotations import Scene\n"
+        "@Scene(if_true=lambda: True)\n"
+        "def finale():\n"
+        "    pass\n"
+    )
+    assert chapters.add("ch9", path) is None
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+import pytest
+from calliopy.core.animation import (
+        Animation, AnimationManager, FieldForAnimation
+)
+from calliopy.core.clock import Clock
+
+
+def clock(flags=None):
+    return Clock(SimpleNamespace(flags=flags or {}))
+
+
+def test_fixed_steps():
+    c = clock()
+    assert c.advance(1 / 60) == 1
+    assert c.advance(1 / 120) == 0
+    assert c.accumulator == pytest.approx(1 / 120)
+    assert c.alpha == pytest.approx(0.5)
+    assert c.advance(1 / 120) == 1
+    assert c.time == pytest.approx(2 / 60)
+
+
+def test_long_frame_is_clamped():
+    c = clock({"clock.max_steps": "4"})
+    assert c.advance(2.0) == 4
+    assert c.dropped == pytest.approx(2.0 - 4 / 60, abs=1 / 60)
+    assert c.advance(1 / 60) == 1
+
+
+def test_time_scale():
+    c = clock()
+    c.set_scale(0.5)
+    assert [c.advance(1 / 60) for _ in range(4)] == [0, 1, 0, 1]
+    c.set_scale(4)
+    assert c.advance(1 / 60) == 4
+    # fast-forward raises the catch-up limit with the scale
+    assert c.advance(0.5) == 20
+    with pytest.raises(ValueError):
+        c.set_scale(-1)
+
+
+def test_animations_are_drawn_between_steps():
+    c = clock({"clock.rate": "10"})
+    sprite = SimpleNamespace(x=0.0)
+    anim = AnimationManager()
+    anim.animate(Animation(
+            "move", 1.0, 0.0, 100.0, field=FieldForAnimation(sprite, "x")
+    ))
+
+    def frame(dt):
+        for _ in range(c.advance(dt)):
+            anim.tick(c.step)
+        anim.interpolate(c.alpha)
+        return sprite.x
+
+    # one step and half of the next: halfway between 0 and 10
+    assert frame(0.15) == pytest.approx(5.0)
+    # no step, a quarter further
+    assert frame(0.025) == pytest.approx(7.5)
+    assert frame(0.1) == pytest.approx(17.5)
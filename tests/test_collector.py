@@ -0,0 +1,47 @@
+import gc
+from types import SimpleNamespace
+from calliopy.core.collector import GCScheduler
+
+
+def scheduler(flags):
+    return GCScheduler(SimpleNamespace(flags=flags))
+
+
+def test_disabled_policy_keeps_gc_untouched():
+    thresholds = gc.get_threshold()
+    policy = scheduler({})
+    policy.on_startup()
+    policy.on_scene_boundary()
+    assert gc.get_threshold() == thresholds
+    assert gc.get_freeze_count() == 0
+    policy.on_shutdown()
+
+
+def test_policy_freezes_and_restores():
+    thresholds = gc.get_threshold()
+    policy = scheduler({"gc.frame": "1"})
+    policy.on_startup()
+    try:
+        assert gc.get_freeze_count() > 0
+        assert gc.get_threshold()[0] == thresholds[0] * 10
+        assert gc.get_threshold()[2] == 1_000_000
+        policy.on_scene_boundary()
+        assert policy.collections >= 1
+        assert policy.end_frame() > 0
+        assert policy.end_frame() == 0
+    finally:
+        policy.on_shutdown()
+    assert gc.get_threshold() == thresholds
+    assert gc.get_freeze_count() == 0
+
+
+def test_idle_collections_are_rate_limited():
+    policy = scheduler({"gc.frame": "1", "gc.idle.interval": "60"})
+    policy.on_startup()
+    try:
+        policy.on_idle_frame()
+        count = policy.collections
+        policy.on_idle_frame()
+        assert policy.collections == count
+    finally:
+        policy.on_shutdown()
@@ -0,0 +1,56 @@
+import pytest
+from calliopy.core import app
+from calliopy.diagnostics.explorer import StoryExplorer, run_path
+
+
+def test_run_path_follows_choices():
+    result = run_path("explorer_story", (1, 0, 1))
+
+    assert result.status == "end"
+    assert result.scenes == ["market", "cellar", "end"]
+    assert [index for _, _, index in result.choices] == [1, 0, 1]
+
+
+def test_run_path_closes_memory_store(monkeypatch, tmp_path):
+    stores = []
+
+    def open_store(flags):
+        stores.append(open_flag_store(flags))
+        return stores[-1]
+
+    open_flag_store = app.open_flag_store
+    monkeypatch.setattr(app, "open_flag_store", open_store)
+    run_path("explorer_story", (0, 1), flags={"store": str(tmp_path / "s")})
+
+    assert [s.path for s in stores] == [":memory:"]
+    assert stores[0].closed
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_explore_covers_story(processes):
+    explorer = StoryExplorer(
+            "explorer_story", processes=processes, max_beats=50
+    )
+    report = explorer.explore()
+
+    # both ways of buying the apple reach the cellar with equal state
+    assert report.merged == 1
+    assert sorted(p.path for p in report.ended) == [
+        (0, 0, 1), (0, 1), (1, 1)
+    ]
+    dead_ends = {p.path: p for p in report.dead_ends}
+    assert set(dead_ends) == {(0, 0, 0), (0, 0, 2)}
+    assert "mimic" in dead_ends[(0, 0, 0)].error
+    assert dead_ends[(0, 0, 2)].status == "limit"
+    assert report.unplayed == []
+    assert "Scenes played: 3/3" in report.report()
+
+
+def test_choices_in_scene_are_part_of_state():
+    report = StoryExplorer("explorer_locals", processes=1).explore()
+
+    # the second choice looks the same, but the first one decides
+    assert report.merged == 0
+    assert sorted(p.path for p in report.ended) == [(0, 0), (0, 1)]
+    assert sorted(p.path for p in report.dead_ends) == [(1, 0), (1, 1)]
+    assert all("No key" in p.error for p in report.dead_ends)
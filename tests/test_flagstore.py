@@ -0,0 +1,105 @@
+import pytest
+import sqlite3
+import time
+
+from calliopy.core.annotations import Component
+from calliopy.core.container import CalliopyContainer
+from calliopy.core.flagstore import FlagStore, flag_store, open_flag_store
+
+
+def rows(path):
+    db = sqlite3.connect(path)
+    try:
+        return dict(db.execute("SELECT key, value FROM flags"))
+    finally:
+        db.close()
+
+
+def test_writes_are_batched(tmp_path):
+    path = tmp_path / "progress.db"
+    store = FlagStore(path, interval=60)
+    for i in range(100):
+        store["runs"] = i
+    store["ending.good"] = True
+    store["unlocks"] = ["gallery"]
+    # served from memory before anything is written
+    assert store["runs"] == 99
+    assert rows(path) == {}
+
+    store.flush()
+    assert rows(path) == {
+        "runs": "99", "ending.good": "true", "unlocks": '["gallery"]'
+    }
+    del store["runs"]
+    store.close()
+
+    reopened = FlagStore(path)
+    assert dict(reopened) == {"ending.good": True, "unlocks": ["gallery"]}
+    assert reopened.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    reopened.close()
+
+
+def test_closed_store_rejects_writes(tmp_path):
+    store = FlagStore(tmp_path / "progress.db")
+    store["runs"] = 1
+    store.close()
+
+    with pytest.raises(RuntimeError):
+        store["runs"] = 2
+    with pytest.raises(RuntimeError):
+        del store["runs"]
+    assert dict(store) == {"runs": 1}
+
+
+def test_writer_thread_flushes(tmp_path):
+    path = tmp_path / "progress.db"
+    store = FlagStore(path, interval=0.01)
+    store["seen"] = 1
+    assert store.writer.is_alive()
+    for _ in range(100):
+        if rows(path):
+            break
+        time.sleep(0.01)
+    assert rows(path) == {"seen": "1"}
+    store.close()
+    assert not store.writer.is_alive()
+
+
+@Component(tags="secret_room", if_true="ending.good")
+class SecretRoom:
+    pass
+
+
+@Component(tags="first_run", if_true="not ending.good")
+class FirstRun:
+    pass
+
+
+def test_default_store_is_a_file(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    store = open_flag_store({})
+    store["ending.good"] = True
+    store.close()
+
+    assert rows(tmp_path / "files" / "flags.db") == {"ending.good": "true"}
+
+
+def test_conditions_read_store():
+    container = CalliopyContainer()
+    container.flags = {"store": ":memory:"}
+    container.register(flag_store)
+    store = container.get_component(None, "flag_store")
+    assert container.store is store
+
+    container.register(SecretRoom)
+    container.register(FirstRun)
+    assert "secret_room" not in container.components_by_tag
+    assert "first_run" in container.components_by_tag
+
+    store["ending.good"] = True
+    container.register(SecretRoom)
+    assert "secret_room" in container.components_by_tag
+    assert not container.evaluate_conditional_creation(
+            {"if_true": "not ending.good"}
+    )
+    store.close()
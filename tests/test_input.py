@@ -0,0 +1,57 @@
+from calliopy.core.input import InputSnapshot, InputManager
+from calliopy.core.raylib import Rectangle, KEY_ENTER, MOUSE_BUTTON_LEFT
+from calliopy.gui.ui import ListRow, Style
+
+
+def test_snapshot_queries():
+    inp = InputSnapshot(
+            keys=(KEY_ENTER,), chars=(104, 105),
+            mouse_x=15, mouse_y=5, buttons=1 << MOUSE_BUTTON_LEFT
+    )
+    assert inp.is_key_pressed(KEY_ENTER)
+    assert not inp.is_key_pressed(49)
+    assert inp.is_mouse_button_pressed(MOUSE_BUTTON_LEFT)
+    assert not inp.is_mouse_button_pressed(1)
+    assert inp.text() == "hi"
+    assert inp.mouse_in(Rectangle(10, 0, 10, 10))
+    assert not inp.mouse_in(Rectangle(0, 0, 10, 10))
+    assert InputSnapshot().empty()
+
+
+def test_snapshots_pack_back_to_back():
+    first = InputSnapshot(keys=(KEY_ENTER, 50), chars=(0x1F600,),
+                          mouse_x=1.5, mouse_y=2.0, buttons=3, wheel=-1.0)
+    second = InputSnapshot()
+    data = first.pack() + second.pack()
+    restored, offset = InputSnapshot.unpack(data)
+    assert restored == first
+    restored, offset = InputSnapshot.unpack(data, offset)
+    assert restored == second
+    assert offset == len(data)
+
+
+def test_manager_feeds_recorders(monkeypatch):
+    snapshot = InputSnapshot(keys=(KEY_ENTER,))
+    monkeypatch.setattr("calliopy.core.input.poll_input", lambda: snapshot)
+    manager = InputManager()
+    recorded = []
+    manager.add_recorder(recorded.append)
+    assert manager.poll() is snapshot
+    assert manager.snapshot is snapshot
+    assert recorded == [snapshot]
+
+
+def test_row_click_comes_from_snapshot():
+    clicked = []
+
+    class Dispatcher:
+        def dispatch_event(self, name, caller=None, event=None):
+            clicked.append((name, event))
+
+    row = ListRow(Style(), dispatcher=Dispatcher(), callback="pick")
+    row.index = 3
+    row.compute_layout(0, 0, 100, 20)
+    row.update(InputSnapshot(mouse_x=50, mouse_y=10))
+    assert row.hover and clicked == []
+    row.update(InputSnapshot(mouse_x=50, mouse_y=10, buttons=1))
+    assert clicked == [("pick", 3)]
@@ -0,0 +1,171 @@
+import threading
+import pytest
+from calliopy.core import frontend
+from calliopy.logger.logger import (
+        LoggerFactory, LogPrinter, LogObject, LogLevel, QueuedPrinter,
+        format_message,
+)
+
+
+class ListPrinter(LogPrinter):
+    def __init__(self):
+        self.logs: list[LogObject] = []
+
+    def print(self, obj: LogObject) -> None:
+        self.logs.append(obj)
+
+
+@pytest.fixture
+def factory():
+    old = LoggerFactory._factory
+    factory = LoggerFactory()
+    factory.set_printer(ListPrinter())
+    LoggerFactory._factory = factory
+    yield factory
+    LoggerFactory._factory = old
+
+
+def test_global_level_filters_lower_levels(factory):
+    factory.set_global_level(LogLevel.WARN)
+    logger = LoggerFactory.get_logger(for_cls="game.scenes.Intro")
+    logger.debug("hidden")
+    logger.info("hidden")
+    logger.warn("shown")
+    logger.error("shown")
+    assert [log.log_level for log in factory.printer.logs] == ["WARN", "ERROR"]
+
+
+def test_glob_pattern_overrides_global_level(factory):
+    factory.set_global_level(LogLevel.ERROR)
+    factory.set_level("game.*", LogLevel.DEBUG)
+    scene_logger = LoggerFactory.get_logger(for_cls="game.scenes.Intro")
+    core_logger = LoggerFactory.get_logger(for_cls="calliopy.core.Container")
+    scene_logger.debug("shown")
+    core_logger.debug("hidden")
+    assert len(factory.printer.logs) == 1
+    assert factory.printer.logs[0].class_source == "game.scenes.Intro"
+
+
+def test_last_matching_pattern_wins(factory):
+    factory.set_level("game.*", LogLevel.DEBUG)
+    factory.set_level("game.noisy.*", LogLevel.OFF)
+    assert factory.level_for("game.scenes.Intro") == LogLevel.DEBUG
+    assert factory.level_for("game.noisy.Spam") == LogLevel.OFF
+
+
+def test_rules_apply_to_existing_loggers(factory):
+    logger = LoggerFactory.get_logger(for_cls="game.Inventory")
+    assert logger.is_enabled_for(LogLevel.DEBUG)
+    factory.disable_for("game.*")
+    assert not logger.is_enabled_for(LogLevel.ERROR)
+    factory.enable_for("game.Inventory")
+    assert logger.is_enabled_for(LogLevel.DEBUG)
+
+
+def test_disable_all_then_enable_for_class(factory):
+    class Verbose:
+        pass
+    logger = LoggerFactory.get_logger(for_cls=Verbose)
+    other = LoggerFactory.get_logger(for_cls="game.Other")
+    factory.disable_all()
+    factory.enable_for(Verbose)
+    other.error("hidden")
+    logger.debug("shown")
+    assert [log.text for log in factory.printer.logs] == ["shown"]
+
+
+def test_log_records_caller_method_and_line(factory):
+    logger = LoggerFactory.get_logger(for_cls="game.Source")
+
+    def caller():
+        logger.info("text", 1, 2, key="value")
+    caller()
+    log = factory.printer.logs[0]
+    assert log.method_source == "caller"
+    assert log.line_source is not None
+    assert log.text_args == (1, 2)
+    assert log.context == {"key": "value"}
+
+
+class BlockingPrinter(ListPrinter):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.batches = []
+
+    def print_batch(self, objs):
+        self.release.wait()
+        self.batches.append(len(objs))
+        super().print_batch(objs)
+
+
+def test_queued_printer_writes_everything_on_close():
+    target = ListPrinter()
+    printer = QueuedPrinter(target)
+    for i in range(100):
+        printer.print(LogObject(text=str(i)))
+    printer.close()
+    assert [log.text for log in target.logs] == [str(i) for i in range(100)]
+    assert printer.written == 100
+    assert printer.dropped == 0
+
+
+def test_queued_printer_drops_on_overflow():
+    target = BlockingPrinter()
+    printer = QueuedPrinter(target, max_size=10, batch_size=1)
+    for i in range(50):
+        printer.print(LogObject(text=str(i)))
+    assert printer.dropped >= 39
+    target.release.set()
+    printer.close()
+    assert printer.written + printer.dropped == 50
+
+
+def test_queued_printer_batches_writes():
+    target = BlockingPrinter()
+    printer = QueuedPrinter(target, batch_size=8)
+    printer.print(LogObject(text="first"))
+    for i in range(20):
+        printer.print(LogObject(text=str(i)))
+    target.release.set()
+    printer.flush()
+    assert max(target.batches) == 8
+    assert len(target.logs) == 21
+    printer.close()
+
+
+class Exploding:
+    def __repr__(self):
+        raise AssertionError("rendered")
+
+    __str__ = __repr__
+
+
+def test_format_message_templates():
+    assert format_message("a {} b {}", (1, 2)) == "a 1 b 2"
+    assert format_message("a %s b %d", ("x", 2)) == "a x b 2"
+    assert format_message("Returns", (int,)) == "Returns <class 'int'>"
+    assert format_message({"a": 1}, ()) == "{'a': 1}"
+    assert format_message("100% {}", ()) == "100% {}"
+
+
+def test_filtered_call_does_not_render_args(factory):
+    factory.set_global_level(LogLevel.INFO)
+    logger = LoggerFactory.get_logger(for_cls="game.Lazy")
+    logger.debug("value {}", Exploding())
+    logger.info("value {}", 1)
+    assert factory.printer.logs[0].message == "value 1"
+
+
+def test_dropped_raylib_messages_are_reported_at_warn(factory, monkeypatch):
+    monkeypatch.setattr(frontend, "drain_trace_log", lambda: [])
+    monkeypatch.setattr(frontend, "get_trace_dropped", lambda: 3)
+    factory.set_global_level(LogLevel.WARN)
+
+    trace_log = frontend.RaylibTraceLog()
+    trace_log.drain()
+    trace_log.drain()
+
+    assert [log.message for log in factory.printer.logs] == [
+        "Dropped 3 raylib trace messages"
+    ]
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+import pytest
+from calliopy.diagnostics.memory import MemoryAccountant
+
+
+def texture(width, height):
+    return SimpleNamespace(width=width, height=height, mipmaps=1)
+
+
+@pytest.fixture
+def accountant():
+    accountant = MemoryAccountant()
+    accountant.start()
+    yield accountant
+    accountant.stop()
+
+
+def test_assets_are_counted_per_scene(accountant):
+    chars = SimpleNamespace(textures={
+        "Alice": {"image": "alice.png", "texture": texture(10, 10)},
+        "Bob": {"image": "bob.png"},
+    })
+    audio = SimpleNamespace(sound_lib={"dialogue": SimpleNamespace(frameCount=100)})
+    frontend = SimpleNamespace(
+            chars=chars, audio=audio, gui=None, bg=texture(2, 2)
+    )
+
+    first = accountant.scene_boundary("intro", frontend)
+    assert first.assets["textures"].count == 1
+    assert first.assets["textures"].bytes == 400
+    assert first.assets["background"].bytes == 16
+    assert first.assets["sounds"].bytes == 800
+
+    chars.textures["Bob"]["texture"] = texture(20, 10)
+    accountant.scene_boundary("forest", frontend)
+    report = accountant.report()
+    assert "Before forest" in report
+    assert "textures: 2 loaded, 1.2 KiB (+1, +800 B)" in report
+
+
+def test_heap_growth_is_reported(accountant):
+    accountant.scene_boundary("intro")
+    leak = [bytearray(1000) for _ in range(100)]
+    record = accountant.scene_boundary("forest")
+    assert leak
+    assert record.top_diff
+    assert any(size >= 100_000 for _, size, _ in record.top_diff)
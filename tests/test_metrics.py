@@ -0,0 +1,44 @@
+import urllib.request
+from calliopy.diagnostics.metrics import MetricsRegistry, MetricsServer
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("frames_total", "Frames").inc(3)
+    registry.gauge("scene", fn=lambda: [({"scene": "intro"}, 1)])
+    text = registry.render()
+    assert "# HELP frames_total Frames" in text
+    assert "# TYPE frames_total counter" in text
+    assert "frames_total 3.0" in text
+    assert 'scene{scene="intro"} 1' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    hist = registry.histogram("frame_seconds", buckets=[0.01, 0.1])
+    for value in [0.005, 0.05, 0.05, 1.0]:
+        hist.observe(value)
+    text = registry.render()
+    assert 'frame_seconds_bucket{le="0.01"} 1' in text
+    assert 'frame_seconds_bucket{le="0.1"} 3' in text
+    assert 'frame_seconds_bucket{le="+Inf"} 4' in text
+    assert "frame_seconds_count 4" in text
+
+
+def test_same_name_returns_same_metric():
+    registry = MetricsRegistry()
+    assert registry.counter("a") is registry.counter("a")
+
+
+def test_server_serves_metrics():
+    registry = MetricsRegistry()
+    registry.gauge("sounds_cached").set(2)
+    server = MetricsServer(registry, port=0)
+    server.start()
+    try:
+        url = f"http://127.0.0.1:{server.port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode("utf-8")
+    finally:
+        server.stop()
+    assert "sounds_cached 2" in body
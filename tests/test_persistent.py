@@ -0,0 +1,87 @@
+import pickle
+import random
+from calliopy.core.persistent import PMap, PersistentDict
+from calliopy.core.state import StoryState
+
+
+class BadHash:
+    def __init__(self, value):
+        self.value = value
+
+    def __hash__(self):
+        return self.value % 3
+
+    def __eq__(self, other):
+        return isinstance(other, BadHash) and other.value == self.value
+
+
+def test_pmap_matches_dict_and_keeps_versions():
+    rng = random.Random(4)
+    m, d = PMap(), {}
+    versions = []
+    for _ in range(2000):
+        key = rng.choice([rng.randrange(300), BadHash(rng.randrange(20))])
+        if rng.random() < 0.3:
+            m, _ = m.discard(key), d.pop(key, None)
+        else:
+            value = rng.random()
+            m, d[key] = m.set(key, value), value
+        versions.append((m, dict(d)))
+    for version, expected in versions[::97]:
+        assert len(version) == len(expected)
+        assert dict(version.items()) == expected
+    assert dict(pickle.loads(pickle.dumps(m)).items()) == d
+
+
+def test_unchanged_set_returns_same_map():
+    value = object()
+    m = PMap().set("a", value)
+    assert m.set("a", value) is m
+    assert m.discard("missing") is m
+
+
+def test_persistent_dict_snapshot_and_order():
+    d = PersistentDict({"b": 1, "a": 2})
+    snapshot = d.snapshot()
+    d["b"] = 3
+    del d["a"]
+    d["c"] = 4
+    assert list(d.items()) == [("b", 3), ("c", 4)]
+    d.restore(snapshot)
+    assert list(d.items()) == [("b", 1), ("a", 2)]
+    d["d"] = 5
+    assert list(d) == ["b", "a", "d"]
+
+
+def test_story_state_attributes():
+    class Inventory(StoryState):
+        def __init__(self):
+            self.items = ()
+            self._cache = None
+
+    inv = Inventory()
+    state = inv.save_state()
+    inv.items += ("key",)
+    assert inv.items == ("key",)
+    inv.load_state(state)
+    assert inv.items == ()
+    assert "_cache" not in state
+
+
+def test_pmap_items_is_a_view():
+    m = PMap.from_items({"a": 1, "b": 2})
+    items = m.items()
+    assert len(items) == 2
+    assert ("a", 1) in items and ("a", 2) not in items
+    assert sorted(items) == sorted(items) == [("a", 1), ("b", 2)]
+    assert sorted(m.values()) == [1, 2]
+
+
+def test_persistent_dict_order_is_cached():
+    d = PersistentDict({"b": 1, "a": 2})
+    assert list(d) == ["b", "a"]
+    order = d.order
+    assert list(d) == ["b", "a"]
+    assert d.order is order
+    d["c"] = 3
+    assert list(d) == ["b", "a", "c"]
@@ -0,0 +1,52 @@
+import time
+import pytest
+from calliopy.core.dialogue import SceneScheduler, DialogueManager
+from calliopy.diagnostics.profiler import SceneProfiler
+import calliopy.core.dialogue as dialogue
+
+
+def slow_condition():
+    time.sleep(0.02)
+    return True
+
+
+def story(dial):
+    if slow_condition():
+        dial.say("Alice", "Hello")
+    dial.say("Bob", "Bye")
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    profiler = SceneProfiler()
+    monkeypatch.setattr(dialogue, "scene_profiler", profiler)
+    profiler.start()
+    yield profiler
+    profiler.stop()
+
+
+def test_time_is_attributed_to_scene_lines(profiler):
+    scheduler = SceneScheduler()
+    dial = DialogueManager(scheduler)
+    scheduler.run_scene(story, dial)
+    time.sleep(0.03)
+    scheduler.resume()
+    scheduler.resume()
+
+    stats = profiler.scenes["story"]
+    assert stats.runs == 1
+    assert stats.switches == 3
+    assert stats.wait_ns >= 30_000_000
+    slowest = max(stats.lines.items(), key=lambda i: i[1])
+    line = story.__code__.co_firstlineno + 1
+    assert slowest[0] == (__file__, line)
+    assert slowest[1] >= 20_000_000
+    assert "Scene story: 1 runs" in profiler.report()
+
+
+def test_stop_releases_monitoring_tool(profiler):
+    tool_id = profiler.tool_id
+    profiler.stop()
+    assert profiler.tool_id is None
+    profiler.start()
+    assert profiler.tool_id == tool_id
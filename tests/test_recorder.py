@@ -0,0 +1,53 @@
+import sys
+from calliopy.logger.logger import LogObject
+from calliopy.logger.recorder import FlightRecorderPrinter
+
+
+def log(text, level="DEBUG", cls="game.Scene", method="run", line=1):
+    return LogObject(
+            log_level=level, class_source=cls,
+            method_source=method, line_source=line,
+            text=text, text_args=(), context={},
+    )
+
+
+def test_ring_buffer_keeps_newest_records():
+    recorder = FlightRecorderPrinter(capacity=4)
+    for i in range(10):
+        recorder.print(log(str(i)))
+    assert len(recorder) == 4
+    assert recorder.overwritten == 6
+    texts = [record[5][0] for record in recorder.records()]
+    assert texts == ["6", "7", "8", "9"]
+
+
+def test_sources_are_interned():
+    recorder = FlightRecorderPrinter(capacity=16)
+    for i in range(10):
+        recorder.print(log(str(i), method=f"m{i % 2}"))
+    assert recorder.strings == ["<unknown>", "game.Scene", "m0", "m1"]
+
+
+def test_dump_writes_records(tmp_path):
+    recorder = FlightRecorderPrinter(capacity=8)
+    recorder.print(log("hello", level="WARN", line=42))
+    path = recorder.dump(tmp_path / "dump.log")
+    content = path.read_text().splitlines()
+    assert len(content) == 3
+    assert "[WARN] game.Scene.run:42 - hello" in content[2]
+
+
+def test_excepthook_dumps_buffer(tmp_path):
+    recorder = FlightRecorderPrinter(capacity=8, dump_path=tmp_path / "crash.log")
+    recorder.print(log("before crash"))
+    recorder.install()
+    try:
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            sys.excepthook(*sys.exc_info())
+    finally:
+        recorder.uninstall()
+    content = (tmp_path / "crash.log").read_text()
+    assert "uncaught RuntimeError: boom" in content
+    assert "before crash" in content
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+from calliopy.core.annotations import Scene
+from calliopy.core.dialogue import DialogueManager, SceneScheduler
+from calliopy.core.rng import StoryRandom
+from calliopy.core.rollback import RollbackManager
+from calliopy.core.save import SaveManager
+from calliopy.core.state import StoryState
+from calliopy.core.script import SceneGraph
+
+
+class Inventory(StoryState):
+    def __init__(self):
+        self.items = ()
+
+
+def make_game(size=64):
+    dial = DialogueManager(SceneScheduler())
+    inv = Inventory()
+
+    def cave():
+        dial.say("Alice", "Dark in here")
+        inv.items += ("torch",)
+        dial.say("Alice", "Better")
+        c = dial.choice("Left", "Right")
+        inv.items += (["gold", "bones"][c.index],)
+        dial.say("Alice", f"Found {inv.items[-1]}")
+
+    container = SimpleNamespace(
+            flags={"rollback.size": str(size)},
+            get_function=lambda scene: (scene, {}),
+    )
+    saves = SaveManager(
+            container, dial.scheduler, dial,
+            SimpleNamespace(
+                    current=1, graph=SceneGraph([Scene()(cave)]),
+                    resolve=lambda scene: scene
+            ),
+            StoryRandom(SimpleNamespace(flags={"seed": "1"}))
+    )
+    saves.set_stateful([inv])
+    rollback = RollbackManager(container, dial, saves)
+    dial.set_listeners([saves, rollback])
+    saves.on_scene_start("cave")
+    dial.scheduler.run_scene(cave)
+    return dial, inv, rollback
+
+
+def advance(dial, choice=None):
+    if dial.options:
+        dial.choice_result = choice
+    dial.scheduler.resume()
+
+
+def test_rollback_to_previous_line_and_change_choice():
+    dial, inv, rollback = make_game()
+    advance(dial)
+    advance(dial)
+    advance(dial, 0)
+    assert dial.current_text == "Found gold"
+    assert inv.items == ("torch", "gold")
+
+    assert rollback.rollback()
+    assert dial.options == ["Left", "Right"]
+    assert inv.items == ("torch",)
+    advance(dial, 1)
+    assert dial.current_text == "Found bones"
+    assert inv.items == ("torch", "bones")
+
+    assert rollback.rollback(2)
+    assert dial.current_text == "Better"
+    assert rollback.rollback()
+    assert dial.current_text == "Dark in here"
+    assert inv.items == ()
+    assert not rollback.can_rollback()
+
+
+def test_ring_is_bounded():
+    dial, _, rollback = make_game(size=2)
+    advance(dial)
+    advance(dial)
+    assert len(rollback.ring) == 2
+    assert rollback.rollback()
+    assert dial.current_text == "Better"
+    assert not rollback.rollback()
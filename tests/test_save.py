@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from enum import Enum
+from types import SimpleNamespace
+import pickle
+from calliopy.core.annotations import Scene
+from calliopy.core.dialogue import DialogueManager, SceneScheduler
+from calliopy.core.persistent import PMap
+from calliopy.core.rng import StoryRandom
+from calliopy.core.save import SaveManager, _decode, _encode
+from calliopy.core.state import Stateful
+from calliopy.core.script import SceneGraph
+
+
+class Inventory(Stateful):
+    def __init__(self):
+        self.items = []
+
+    def save_state(self):
+        return list(self.items)
+
+    def load_state(self, state):
+        self.items = list(state)
+
+
+def make_game(tmp_path):
+    dial = DialogueManager(SceneScheduler())
+    inv = Inventory()
+    rng = StoryRandom(SimpleNamespace(flags={"seed": "7"}))
+
+    def forest():
+        dial.say("Alice", "Let's go")
+        inv.items.append("map")
+        for i in range(50):
+            dial.narrate(f"Step {i}, found {rng.randint(0, 100)}")
+        c = dial.choice("Left", "Right")
+        inv.items.append(["sword", "shield"][c.index])
+        dial.say("Alice", f"We have {inv.items}")
+
+    script = SimpleNamespace(
+            current=1, graph=SceneGraph([Scene()(forest)]),
+            resolve=lambda scene: scene
+    )
+    container = SimpleNamespace(
+            flags={"save.path": str(tmp_path / "save.dat")},
+            get_function=lambda scene: (scene, {}),
+    )
+    saves = SaveManager(container, dial.scheduler, dial, script, rng)
+    saves.set_stateful([inv])
+    dial.set_listeners([saves])
+    return dial, inv, saves, forest
+
+
+def play_to_end(dial, choice):
+    while not dial.scheduler.current.dead:
+        if dial.options:
+            dial.choice_result = choice
+        dial.scheduler.resume()
+
+
+def test_load_replays_scene_to_saved_beat(tmp_path):
+    dial, inv, saves, forest = make_game(tmp_path)
+    saves.on_scene_start("forest")
+    dial.scheduler.run_scene(forest)
+    while not dial.current_text.startswith("Step 30,"):
+        dial.scheduler.resume()
+    saved_text = dial.current_text
+    saves.save()
+    play_to_end(dial, 1)
+    assert inv.items == ["map", "shield"]
+
+    data = saves.read()
+    saves.load(data)
+    # the random number in the line shows RNG state was restored too
+    assert dial.current_text == saved_text
+    assert inv.items == ["map"]
+    play_to_end(dial, 0)
+    assert inv.items == ["map", "sword"]
+
+
+def test_choices_are_replayed(tmp_path):
+    dial, inv, saves, forest = make_game(tmp_path)
+    saves.on_scene_start("forest")
+    dial.scheduler.run_scene(forest)
+    while not dial.options:
+        dial.scheduler.resume()
+    dial.choice_result = 1
+    dial.scheduler.resume()
+    expected = dial.current_text
+    saves.save()
+
+    dial2, inv2, saves2, _ = make_game(tmp_path)
+    data = saves2.read()
+    assert data.choices == [1] and data.scenes == ["forest"]
+    saves2.load(data)
+    assert dial2.current_text == expected
+    assert inv2.items == ["map", "shield"]
+
+
+def test_missing_save_is_reported(tmp_path):
+    _, _, saves, _ = make_game(tmp_path)
+    assert saves.read(tmp_path / "nope.dat") is None
+
+
+class Side(Enum):
+    LEFT = 1
+
+
+@dataclass
+class Portrait:
+    name: str
+    pos: tuple[int, int] = (0, 0)
+
+
+def test_state_round_trips_through_plain_data():
+    state = {
+        "visible": PMap.from_items({"alice": (3, Portrait("alice", (1, 2)))}),
+        "side": Side.LEFT,
+        "flags": frozenset({"met_bob"}),
+        "log": [("a", 1.5, None, b"x")],
+    }
+    restored = _decode(_encode(state))
+
+    assert restored == state
+    assert restored["visible"]["alice"][1] == Portrait("alice", (1, 2))
+
+
+def test_unsafe_or_broken_saves_are_rejected(tmp_path):
+    dial, inv, saves, forest = make_game(tmp_path)
+    saves.on_scene_start("forest")
+    dial.scheduler.run_scene(forest)
+    saves.save()
+    data = (tmp_path / "save.dat").read_bytes()
+    # a class renamed or removed since the game was saved
+    (tmp_path / "renamed.dat").write_bytes(
+            data.replace(b"SceneStart", b"SceneBegin")
+    )
+    assert saves.read(tmp_path / "renamed.dat") is None
+
+    # pickles can run code when loaded and are never read
+    with open(tmp_path / "pickled.dat", "wb") as f:
+        pickle.dump(saves.snapshot(), f)
+    assert saves.read(tmp_path / "pickled.dat") is None
+    assert saves.read() is not None
@@ -202,3 +202,119 @@ def test_dependency_default_used(script):
     script.register(B)
     b = script.get_component(get_type_name(B))
     assert b.missing == 123
+
+
+def run_story(container, script_manager=None):
+    scenes = script_manager or container.get_component(None, "script_manager")
+    tag = None
+    while True:
+        scene, kwargs = scenes.get_next_scene(tag)
+        if scene is None:
+            return
+        tag = scene(**kwargs)
+
+
+def test_scene_metadata_selection(script):
+    played = []
+    state = {"rich": False}
+
+    @Scene(default=True)
+    def intro():
+        played.append("intro")
+        return "shop"
+
+    @Scene(branch="shop", priority=1, if_true=lambda: state["rich"])
+    def jeweller():
+        played.append("jeweller")
+
+    @Scene(branch="shop", repeatable=False)
+    def bakery():
+        played.append("bakery")
+        state["rich"] = True
+
+    @Scene(after="bakery", priority=5)
+    def bread():
+        played.append("bread")
+        return "shop"
+
+    @Scene(after="bakery")
+    def cake():
+        played.append("cake")
+
+    @Scene(after="jeweller", probability=0.0)
+    def ring():
+        played.append("ring")
+
+    @Scene(if_true="missing_flag")
+    def hidden():
+        played.append("hidden")
+
+    @Scene()
+    def end():
+        played.append("end")
+
+    script.register(ScriptableDialogueManager)
+    for scene in [intro, jeweller, bakery, bread, cake, ring, hidden, end]:
+        script.register(scene)
+
+    run_story(script)
+
+    assert played == ["intro", "bakery", "bread", "jeweller", "end"]
+
+
+def test_flag_conditions_are_checked_when_playing(script):
+    played = []
+    script.store = {}
+
+    @Scene()
+    def hub():
+        played.append("hub")
+        return "secret"
+
+    @Scene(if_true="ending.good", repeatable=False)
+    def secret():
+        played.append("secret")
+
+    @Scene()
+    def ending():
+        played.append("ending")
+        if not script.store:
+            script.store["ending.good"] = True
+            return "hub"
+
+    script.register(ScriptableDialogueManager)
+    for scene in [hub, secret, ending]:
+        script.register(scene)
+
+    run_story(script)
+
+    # the flag set by the ending opens the secret scene on the next visit
+    assert played == ["hub", "ending", "hub", "secret", "ending"]
+
+
+def test_scene_state_restores_played_scenes(script):
+    played = []
+
+    @Scene(repeatable=False)
+    def once():
+        played.append("once")
+
+    @Scene()
+    def again():
+        played.append("again")
+        return "once"
+
+    script.register(ScriptableDialogueManager)
+    script.register(once)
+    script.register(again)
+    scenes = script.get_component(None, "script_manager")
+    state = scenes.save_state()
+
+    run_story(script, scenes)
+    # jumping back to a played scene that isn't repeatable ends the line
+    assert played == ["once", "again"]
+
+    scenes.load_state(state)
+    played.clear()
+    run_story(script, scenes)
+    assert played == ["once", "again"]
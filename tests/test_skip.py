@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+from calliopy.core.dialogue import DialogueManager, SceneScheduler
+from calliopy.core.skip import ReadLog, SkipManager, line_key
+from calliopy.core.story import StoryRunner, compile_story
+
+
+def make_dialogue(path):
+    skip = SkipManager(SimpleNamespace(flags={"read_log": str(path)}))
+    skip.start()
+    dial = DialogueManager(SceneScheduler())
+    dial.set_skip(skip)
+    return dial, skip
+
+
+def story(dial):
+    def scene():
+        dial.say("Alice", "Hello")
+        dial.narrate("The wind blows")
+        dial.pause(2)
+        dial.choice("Stay", "Leave")
+        dial.say("Alice", "Bye")
+    return scene
+
+
+def switches(dial, scene):
+    dial.scheduler.run_scene(scene)
+    count = 1
+    while not dial.scheduler.current.dead:
+        dial.scheduler.resume()
+        count += 1
+    return count
+
+
+def test_read_log_appends_new_keys(tmp_path):
+    path = tmp_path / "read.bin"
+    log = ReadLog(path)
+    assert log.add(1) and log.add(2) and not log.add(1)
+    log.save()
+    log.add(3)
+    log.save()
+    assert path.stat().st_size == 3 * 8
+    restored = ReadLog(path)
+    restored.load()
+    assert 1 in restored and 3 in restored and len(restored) == 3
+
+
+def test_line_key_is_stable():
+    assert line_key("intro", 10, "Hi") == line_key("intro", 10, "Hi")
+    assert line_key("intro", 10, "Hi") != line_key("intro", 11, "Hi")
+
+
+def test_skip_runs_through_read_lines(tmp_path):
+    path = tmp_path / "read.bin"
+    dial, skip = make_dialogue(path)
+    assert switches(dial, story(dial)) == 6
+    skip.save()
+
+    dial, skip = make_dialogue(path)
+    skip.toggle()
+    # runs to the choice, which also ends skip mode
+    assert switches(dial, story(dial)) == 3
+    assert skip.skipped == 2
+    assert not skip.active
+
+
+def test_skip_stops_at_unread_line(tmp_path):
+    dial, skip = make_dialogue(tmp_path / "read.bin")
+    skip.toggle()
+    dial.scheduler.run_scene(story(dial))
+    assert dial.current_text == "Hello"
+    assert not skip.active
+
+
+def test_lines_are_keyed_by_scene_line(tmp_path):
+    dial, skip = make_dialogue(tmp_path / "read.bin")
+
+    def say(text):
+        # helper like Character.say, the scene's line is used
+        dial.say("Alice", text)
+
+    def scene():
+        say("Hi")
+        say("Hi")
+
+    switches(dial, scene)
+    assert len(skip.read) == 2
+
+
+def test_story_lines_are_keyed_by_instruction(tmp_path):
+    dial, skip = make_dialogue(tmp_path / "read.bin")
+    program = compile_story('label tale\n"Hi"\n"Hi"\nBob: Hi\nBob: Hi\n')
+    runner = StoryRunner(dial, None, None)
+    switches(dial, lambda: runner.run(program, 0))
+    assert len(skip.read) == 4
@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+import pytest
+from utils import ScriptableDialogueManager
+
+from calliopy.core.container import CalliopyContainer
+from calliopy.core.script import ScriptManager
+from calliopy.core import story
+from calliopy.core.story import (
+        OP_CHOICE, OP_NARRATE, OP_SAY, Program, StoryRunner,
+        StoryScriptError, compile_story, load_program, story_scenes,
+)
+
+SCRIPT = '''
+# the first label runs first
+label intro
+"The world is bright."
+show alice happy at left with fadein
+Alice: Bob! Are you ready?
+choice
+    "Absolutely!" -> forest
+    "Let me think"
+    "Not really..." -> alone
+Bob: "Hmm: let me think."
+jump forest
+
+label forest
+play birds
+emote bob grumpy
+Bob: What a forest.
+hide alice
+end
+
+label alone
+pause 1.5
+"Alice leaves alone."
+'''
+
+
+class StoryDialogue(ScriptableDialogueManager):
+    def narrate(self, text):
+        self.say_log.append((None, text))
+
+    def pause(self, seconds=None, blocking=False):
+        pass
+
+
+class Chars:
+    def __init__(self):
+        self.log = []
+        self.characters = {}
+
+    def show(self, image, mood=None, pos=None, animation=None):
+        self.log.append(("show", image, mood, pos, animation))
+
+    def hide(self, image):
+        self.log.append(("hide", image))
+
+
+def test_compile_story():
+    program = compile_story(SCRIPT, "test")
+
+    assert list(program.labels) == ["intro", "forest", "alone"]
+    intro = program.labels["intro"]
+    assert program.code[intro] == (OP_NARRATE, "The world is bright.")
+    assert program.code[intro + 2] == (OP_SAY, "Alice", "Bob! Are you ready?")
+    assert program.code[intro + 3] == (
+        OP_CHOICE,
+        ("Absolutely!", "Let me think", "Not really..."),
+        ("forest", None, "alone"),
+    )
+    assert program.code[intro + 4] == (OP_SAY, "Bob", "Hmm: let me think.")
+    assert Program.load(program.dump()) == program
+
+
+@pytest.mark.parametrize("text, lineno", [
+    ('"Outside"', 1),
+    ('label a\nchoice\nBob: hi', 3),
+    ('label a\nlabel a', 2),
+    ('label a\nshow bob at nowhere', 2),
+    ('label a\nwhat is this', 2),
+])
+def test_compile_errors(text, lineno):
+    with pytest.raises(StoryScriptError) as e:
+        compile_story(text, "bad")
+    assert e.value.lineno == lineno
+
+
+def test_load_program_uses_cache(tmp_path, monkeypatch):
+    path = tmp_path / "tale.story"
+    path.write_text(SCRIPT, encoding="utf-8")
+    cache = tmp_path / "cache"
+    program = load_program(path, cache)
+    assert len(list(cache.iterdir())) == 1
+
+    def fail(*args):
+        raise AssertionError("compiled again")
+    monkeypatch.setattr(story, "compile_story", fail)
+    assert load_program(path, cache) == program
+
+    path.write_text(SCRIPT + '"Epilogue"\n', encoding="utf-8")
+    monkeypatch.undo()
+    assert load_program(path, cache).code[-2] == (OP_NARRATE, "Epilogue")
+
+
+@pytest.mark.parametrize("choices, said, shown", [
+    # labels that end continue with the next label
+    ([0], ["Bob! Are you ready?", "What a forest.", "Alice leaves alone."], 2),
+    ([1], ["Bob! Are you ready?", "Hmm: let me think.", "What a forest.",
+           "Alice leaves alone."], 2),
+    ([2], ["Bob! Are you ready?", "Alice leaves alone."], 1),
+])
+def test_story_runs_as_scenes(choices, said, shown):
+    container = CalliopyContainer()
+    container.register(StoryDialogue)
+    container.register(ScriptManager)
+    container.register(StoryRunner)
+    chars = Chars()
+    audio = SimpleNamespace(played=[])
+    audio.play = audio.played.append
+    runner = container.get_component(None, "story")
+    runner.chars = chars
+    runner.audio = audio
+    for scene in story_scenes(compile_story(SCRIPT, "story_test")):
+        container.register(scene)
+    dial = container.get_component(None, "dial")
+    dial.script(choices)
+
+    scenes = container.get_component(None, "script_manager")
+    tag = None
+    while True:
+        scene, kwargs = scenes.get_next_scene(tag)
+        if scene is None:
+            break
+        tag = scene(**kwargs)
+
+    assert [text for _, text in dial.say_log[1:]] == said
+    shows = [entry for entry in chars.log if entry[0] == "show"]
+    assert len(shows) == shown
+    assert shows[0] == ("show", "alice", "happy", "left", "fadein")
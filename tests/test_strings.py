@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+import pytest
+
+from calliopy.core.backlog import Backlog
+from calliopy.core.dialogue import DialogueManager, SceneScheduler
+from calliopy.core.strings import (
+        StringManager, StringTable, extract_strings, write_table,
+)
+from calliopy.gui.backlog import BacklogProvider
+
+FRENCH = {
+    "intro.hello": "Bonjour !",
+    "Where are we?": "Où sommes-nous ?",
+    "Stay": "Rester",
+    "Go": "Partir",
+}
+
+
+def test_table_lookup(tmp_path):
+    path = write_table(FRENCH, tmp_path / "fr.stb")
+    table = StringTable(path)
+    assert len(table) == 4
+    for key, text in FRENCH.items():
+        assert table.get(key) == text
+    assert table.get("missing") is None
+    table.close()
+
+    empty = StringTable(write_table({}, tmp_path / "empty.stb"))
+    assert empty.get("intro.hello") is None
+    empty.close()
+
+
+def test_bad_table(tmp_path):
+    path = tmp_path / "bad.stb"
+    path.write_bytes(b"not a table at all")
+    with pytest.raises(ValueError):
+        StringTable(path)
+
+
+def test_dialogue_switches_locale(tmp_path):
+    write_table(FRENCH, tmp_path / "fr.stb")
+    write_table({"intro.hello": "Hello!"}, tmp_path / "en.stb")
+    strings = StringManager(SimpleNamespace(flags={
+        "strings.path": str(tmp_path), "locale": "en",
+    }))
+    dial = DialogueManager(SceneScheduler())
+    dial.set_strings(strings)
+    shown = []
+
+    def scene():
+        dial.say("Alice", "intro.hello")
+        dial.narrate("Where are we?")
+        dial.choice("Stay", "Go")
+
+    def play():
+        dial.scheduler.run_scene(scene)
+        shown.append(dial.current_text)
+        dial.scheduler.resume()
+        shown.append(dial.current_text)
+        dial.scheduler.resume()
+        shown.append(dial.options)
+        dial.choice_result = 0
+        dial.scheduler.resume()
+
+    play()
+    assert shown == ["Hello!", "Where are we?", ["Stay", "Go"]]
+    shown.clear()
+    assert strings.set_locale("fr")
+    play()
+    assert shown == ["Bonjour !", "Où sommes-nous ?", ["Rester", "Partir"]]
+    # a missing table keeps the current locale
+    assert not strings.set_locale("de")
+    assert strings.locale == "fr"
+    strings.close()
+    assert strings.resolve("intro.hello") == "intro.hello"
+
+
+def test_backlog_follows_locale(tmp_path):
+    write_table(FRENCH, tmp_path / "fr.stb")
+    strings = StringManager(SimpleNamespace(flags={
+        "strings.path": str(tmp_path),
+    }))
+    dial = DialogueManager(SceneScheduler())
+    dial.set_strings(strings)
+    backlog = Backlog(SimpleNamespace(flags={}))
+    dial.set_backlog(backlog)
+    provider = BacklogProvider(backlog)
+    provider.set_strings(strings)
+
+    def scene():
+        dial.say("Alice", "intro.hello")
+        dial.choice("Stay", "Go")
+
+    dial.scheduler.run_scene(scene)
+    dial.scheduler.resume()
+    dial.choice_result = 1
+    dial.scheduler.resume()
+
+    def rows():
+        row = SimpleNamespace(text="")
+        texts = []
+        for i in range(provider.count()):
+            provider.bind(row, i)
+            texts.append(row.text)
+        return texts
+
+    assert rows() == ["Alice: intro.hello", "> Go"]
+    # lines shown before the switch change language too
+    assert strings.set_locale("fr")
+    assert rows() == ["Alice: Bonjour !", "> Partir"]
+    strings.close()
+
+
+def test_extract_strings(tmp_path):
+    (tmp_path / "scenes.py").write_text(
+        "def intro(dial):\n"
+        "    dial.say('Alice', 'Hi there')\n"
+        "    dial.narrate(f'Computed {1}')\n"
+        "    dial.choice('Stay', 'Go')\n"
+    )
+    (tmp_path / "tale.story").write_text(
+        'label tale\n"It rains."\nBob: Hello\n'
+    )
+    assert extract_strings([tmp_path]) == {
+        s: s for s in ["Hi there", "Stay", "Go", "It rains.", "Hello"]
+    }
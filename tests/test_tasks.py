@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+import time
+from calliopy.core.tasks import TaskQueue
+
+
+def queue(flags=None):
+    return TaskQueue(SimpleNamespace(flags=flags or {}))
+
+
+def counting(n, out):
+    for i in range(n):
+        out.append(i)
+        yield
+    return n
+
+
+def test_jobs_run_round_robin_and_complete():
+    tasks = queue()
+    a, b, results = [], [], []
+    tasks.submit(counting(2, a), on_done=results.append)
+    tasks.submit(counting(3, b), on_done=results.append)
+    tasks.run()
+    assert a == [0, 1] and b == [0, 1, 2]
+    assert results == [2, 3]
+    assert tasks.pending() == 0
+    assert tasks.completed == 2
+    assert tasks.deferred_frames == 0
+
+
+def test_expired_deadline_defers_work():
+    tasks = queue()
+    out = []
+    tasks.submit(counting(5, out))
+    assert tasks.run(time.perf_counter() - 1) == 0
+    assert out == []
+    assert tasks.pending() == 1
+    assert tasks.deferred_frames == 1
+
+
+def test_budget_limits_steps():
+    tasks = queue({"tasks.budget": "1"})
+
+    def slow():
+        while True:
+            time.sleep(0.002)
+            yield
+
+    tasks.submit(slow())
+    assert tasks.run() == 1
+    assert tasks.deferred_frames == 1
+    tasks.on_shutdown()
+    assert tasks.pending() == 0
+
+
+def test_failing_job_is_dropped():
+    tasks = queue()
+
+    def broken():
+        yield
+        raise ValueError("boom")
+
+    tasks.submit(broken())
+    tasks.run_all()
+    assert tasks.pending() == 0
+    assert tasks.completed == 0
@@ -0,0 +1,57 @@
+import json
+import pytest
+from calliopy.core import dialogue
+from calliopy.core.dialogue import SceneScheduler
+from calliopy.diagnostics.tracing import Tracer
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    tracer.begin("frame")
+    tracer.instant("scene_tag")
+    tracer.end("frame")
+    assert tracer.events == []
+    tracer.start()
+    tracer.stop()
+    tracer.begin("frame")
+    assert tracer.events == []
+
+
+def test_raising_scene_keeps_spans_balanced(monkeypatch):
+    tracer = Tracer()
+    monkeypatch.setattr(dialogue, "tracer", tracer)
+    tracer.start()
+    scheduler = SceneScheduler()
+
+    def scene():
+        scheduler.main.switch()
+        raise RuntimeError("broken scene")
+
+    scheduler.run_scene(scene)
+    with pytest.raises(RuntimeError):
+        scheduler.resume()
+    assert [e[0] for e in tracer.events] == ["B", "E", "B", "E"]
+
+
+def test_events_are_exported_as_chrome_trace(tmp_path):
+    tracer = Tracer()
+    tracer.start()
+    tracer.begin("frame", "frontend")
+    tracer.instant("scene_tag", "script", tag="end")
+    tracer.end("frame", "frontend")
+    path = tracer.save(tmp_path / "trace.json")
+
+    data = json.loads(path.read_text())
+    events = data["traceEvents"]
+    assert [e["ph"] for e in events] == ["B", "i", "E"]
+    assert events[1]["args"] == {"tag": "end"}
+    assert events[0]["ts"] <= events[1]["ts"] <= events[2]["ts"]
+
+
+def test_events_over_limit_are_dropped():
+    tracer = Tracer(max_events=2)
+    tracer.start()
+    for _ in range(5):
+        tracer.instant("event")
+    assert len(tracer.events) == 2
+    assert tracer.dropped == 3
@@ -0,0 +1,76 @@
+from calliopy.gui.ui import ListView, ListProvider, Style
+
+
+class Numbers(ListProvider):
+    name = "numbers"
+
+    def __init__(self, size):
+        self.size = size
+        self.binds = 0
+
+    def count(self):
+        return self.size
+
+    def bind(self, row, index):
+        self.binds += 1
+        row.text = str(index)
+
+
+class Dispatcher:
+    def __init__(self, provider):
+        self.provider = provider
+
+    def get_provider(self, name):
+        return self.provider
+
+
+def make_list(size, height=100):
+    style = Style()
+    style.parse(f"list {{ height: {height}; row-height: 10; overscan: 2; }}")
+    provider = Numbers(size)
+    view = ListView(style, dispatcher=Dispatcher(provider), provider="numbers")
+    view.compute_layout(0, 0, 200, height)
+    return view, provider
+
+
+def test_pool_size_does_not_depend_on_data_size():
+    small, _ = make_list(50)
+    big, provider = make_list(100_000)
+    assert len(small.children) == len(big.children)
+    assert len(big.children) == 15
+    assert provider.binds == 15
+
+
+def test_scroll_rebinds_only_new_rows():
+    view, provider = make_list(1000)
+    provider.binds = 0
+    view.scroll = 50
+    view.layout_rows()
+    assert provider.binds == 3
+    texts = sorted(int(row.text) for row, _ in view.visible_rows())
+    assert texts == list(range(3, 18))
+
+
+def test_rows_are_positioned_relative_to_scroll():
+    view, _ = make_list(1000)
+    view.scroll = 55
+    view.layout_rows()
+    rows = {index: row for row, index in view.visible_rows()}
+    assert rows[6].rect.y == 5
+    assert rows[5].rect.y == -5
+
+
+def test_scroll_is_clamped():
+    view, _ = make_list(20)
+    view.scroll = 10_000
+    view.layout_rows()
+    assert view.scroll == 100
+    indices = sorted(index for _, index in view.visible_rows())
+    assert indices[-1] == 19
+
+
+def test_missing_provider_gives_empty_list():
+    style = Style()
+    view = ListView(style, provider="numbers")
+    view.compute_layout(0, 0, 200, 100)
+    assert list(view.visible_rows()) == []